@@ -1,11 +1,13 @@
 """Simulation API routes"""
-from fastapi import APIRouter
+import os
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-from sim.types import SimSnapshot, RoutingDecision
+from sim.types import RoutingBatchResult, RoutingDecision
 from sim.scenario import get_preset_scenarios, apply_scenario, scenario_from_prompt
 from sim.agent_routing_bandit import RoutingController
 from sim.agent_failure import FailureAgent
+from sim.state_query import build_query, query_state
 from sim import world_instance
 
 router = APIRouter()
@@ -13,13 +15,53 @@ router = APIRouter()
 
 # Initialize agents
 routing_controller = RoutingController(world_instance)
-failure_agent = FailureAgent(world_instance)
-
-
-@router.get("/sim/state", response_model=SimSnapshot)
-def get_state():
-    """Get current simulation state"""
-    return world_instance.get_snapshot()
+# The background advance_world_time task owns the clock of the shared world;
+# a step only acts on it and reads the metrics
+failure_agent = FailureAgent(world_instance, advance=lambda dt: None)
+if os.getenv("FAILURE_AGENT_WEIGHTS"):
+    # Trained offline (batch_sim.py train-failure); the live world only evaluates them
+    try:
+        failure_agent.load(os.environ["FAILURE_AGENT_WEIGHTS"])
+        print(f"[Sim] Loaded failure agent weights from {os.environ['FAILURE_AGENT_WEIGHTS']}")
+    except (OSError, ValueError) as e:
+        print(f"[Sim] Could not load FAILURE_AGENT_WEIGHTS: {e}")
+
+
+@router.get("/sim/state")
+def get_state(
+    link_offset: int = 0,
+    link_limit: Optional[int] = None,
+    fields: Optional[str] = None,
+    region: Optional[str] = None,
+    bbox: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    """
+    Get current simulation state.
+
+    Without query options this is the full SimSnapshot (links paged by
+    link_offset / link_limit). Otherwise:
+      - fields: sections and/or section.field, comma separated
+        (time_s, metrics, nodes, links, pending_jobs, active_routes), e.g.
+        "metrics,nodes" or "links.id,links.rtt_ms"
+      - region: only nodes in this region, links touching them, routes to
+        them and jobs from that region
+      - bbox: min_lon,min_lat,max_lon,max_lat; only nodes inside it (LEO
+        nodes at their current subpoint), with links and routes as for region
+      - limit / cursor: at most `limit` rows per list section; pass the
+        returned next_cursor to get the next page
+    """
+    if fields is None and region is None and bbox is None and limit is None and cursor is None:
+        return world_instance.get_snapshot(
+            link_offset=max(0, link_offset),
+            link_limit=None if link_limit is None else max(0, link_limit),
+        )
+    try:
+        query = build_query(fields=fields, region=region, bbox=bbox, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return query_state(world_instance, query)
 
 
 @router.post("/sim/step_routing", response_model=Optional[RoutingDecision])
@@ -30,6 +72,21 @@ def step_routing():
     return decision
 
 
+@router.post("/sim/step_routing_batch", response_model=RoutingBatchResult)
+def step_routing_batch(count: Optional[int] = None, time_budget_ms: Optional[float] = None):
+    """
+    Route many pending jobs in one call, most urgent first.
+
+    Stops after `count` jobs or `time_budget_ms` (whichever comes first), or
+    when no jobs are pending; with neither, routes up to 256 jobs.
+    """
+    if count is not None and count < 1:
+        raise HTTPException(status_code=400, detail="count must be at least 1")
+    if time_budget_ms is not None and time_budget_ms <= 0:
+        raise HTTPException(status_code=400, detail="time_budget_ms must be positive")
+    return routing_controller.decide_batch(max_jobs=count, time_budget_ms=time_budget_ms)
+
+
 @router.post("/sim/step_failure")
 def step_failure():
     """Step failure agent"""
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Headless batch simulation
+Runs the orbital tick plus the routing World on simulated time, as fast as
+the CPU allows, and writes per-tick metrics to a columnar .npz file (one
+array per metric, plus the run config as JSON).
+
+Single run:
+    python batch_sim.py run --duration-s 86400 --tick-s 60 --scenario asia_sports_final \
+        --seed 1 --offload 30 --out runs/asia.npz
+
+Parameter sweep (orbitOffloadPercent x scenario x seed) over a process pool:
+    python batch_sim.py sweep --duration-s 86400 --tick-s 60 --offload 10 30 50 \
+        --scenario default asia_sports_final --seed 1 2 3 --out-dir runs --workers 4
+
+Offline FailureAgent training on K cloned Worlds with random failures
+(weights for FAILURE_AGENT_WEIGHTS):
+    python batch_sim.py train-failure --envs 16 --workers 4 --steps 5000 --out failure_agent.npy
+"""
+import argparse
+import asyncio
+import contextlib
+import functools
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Constellations loaded in this process, by satellite count (0 = cached TLEs)
+_constellations: Dict[int, List] = {}
+
+
+@dataclass
+class RunConfig:
+    scenario_id: str = "default"  # Preset from sim.scenario, applied to the routing World
+    seed: int = 0
+    orbit_offload_percent: float = 30.0
+    mode: str = "normal"
+    duration_s: float = 3600.0
+    tick_s: float = 60.0  # Simulated seconds per orbital tick
+    start: Optional[str] = None  # ISO 8601, default now (UTC); the resolved time is saved with the run
+    satellites: int = 0  # Dummy constellation size; 0 = Starlink TLEs (cache or CelesTrak)
+    routing: bool = True  # Also run the routing World (event-driven, 1 s job arrivals)
+    out: str = "batch_run.npz"
+
+
+def resolve_start(start: Optional[str]) -> str:
+    """ISO 8601 start time (UTC if no zone given); None means now"""
+    resolved = datetime.fromisoformat(start) if start else datetime.now(timezone.utc)
+    if resolved.tzinfo is None:
+        resolved = resolved.replace(tzinfo=timezone.utc)
+    return resolved.isoformat()
+
+
+def load_constellation(count: int) -> List:
+    """sgp4 records for the run, shared by every run in this process"""
+    if count not in _constellations:
+        from services.starlink import get_starlink_service
+        if count > 0:
+            _constellations[count] = get_starlink_service().use_dummy_satellites(count)
+        else:
+            import main
+            _constellations[count] = asyncio.run(main.fetch_tles())
+    return _constellations[count]
+
+
+def run(config: RunConfig, quiet: bool = False) -> Dict:
+    """Simulate one configuration, write its metrics file and return a summary"""
+    import main
+    from sim.events import EventEngine
+    from sim.scenario import PRESET_SCENARIOS
+    from sim.workload import WorkloadSampler
+    from sim.world import World
+
+    if config.scenario_id != "default" and config.scenario_id not in {s.id for s in PRESET_SCENARIOS}:
+        raise ValueError(f"Unknown scenario '{config.scenario_id}'")
+
+    # Every random source the tick touches follows the run seed
+    random.seed(config.seed)
+    main.workload_sampler = WorkloadSampler(config.seed)
+
+    # Pinned in the config so the metrics file can be reproduced from its own config
+    config = replace(config, start=resolve_start(config.start))
+    start = datetime.fromisoformat(config.start)
+    constellation = load_constellation(config.satellites)
+    scenario = {"mode": config.mode, "orbitOffloadPercent": config.orbit_offload_percent}
+
+    engine = None
+    if config.routing:
+        world = World(seed=config.seed)
+        asyncio.run(world.initialize(constellation))
+        engine = EventEngine(world, start=start, seed=config.seed)
+        if config.scenario_id != "default":
+            engine.schedule_scenario(0.0, config.scenario_id)
+
+    ticks = int(config.duration_s // config.tick_s)
+    columns: Dict[str, List] = {}
+    started = time.perf_counter()
+    for tick in range(ticks):
+        sim_s = tick * config.tick_s
+        with contextlib.ExitStack() as stack:
+            if quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            state = main.compute_sim_state(
+                start + timedelta(seconds=sim_s), scenario, tick, constellation
+            )
+            row = {
+                "time_s": sim_s,
+                "sunlit_fraction": (
+                    sum(sat.sunlit for sat in state.satellites) / len(state.satellites) if state.satellites else 0.0
+                ),
+                **state.metrics.model_dump(),
+                **state.workload.model_dump(),
+            }
+            if engine is not None:
+                engine.run_until(sim_s + config.tick_s)
+                row.update({f"world_{name}": value for name, value in engine.world.get_performance_metrics().items()})
+                row["world_pending_jobs"] = len(engine.world.jobs)
+                row["world_active_routes"] = len(engine.world.active_routes)
+                row["world_completed_jobs"] = engine.world.completed_jobs
+        for name, value in row.items():
+            columns.setdefault(name, []).append(value)
+
+    wall_s = time.perf_counter() - started
+    out = Path(config.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        out,
+        config=np.array(json.dumps(asdict(config))),
+        **{name: np.asarray(values) for name, values in columns.items()},
+    )
+    summary = {
+        "out": str(out),
+        "ticks": ticks,
+        "wall_s": round(wall_s, 3),
+        "speedup": round(ticks * config.tick_s / wall_s, 1) if wall_s > 0 else None,
+    }
+    if engine is not None:
+        summary["world"] = {key: engine.stats[key] for key in ("events", "routed", "completed", "slo_violations")}
+    return summary
+
+
+def sweep_configs(base: RunConfig, offloads: List[float], scenarios: List[str], seeds: List[int], out_dir: str) -> List[RunConfig]:
+    """One config per offload x scenario x seed, each writing its own file under out_dir"""
+    # Every run simulates the same period, so runs differ only in the swept parameters
+    start = resolve_start(base.start)
+    configs = []
+    for offload, scenario_id, seed in itertools.product(offloads, scenarios, seeds):
+        name = f"{scenario_id}_offload{offload:g}_seed{seed}.npz"
+        configs.append(RunConfig(**{
+            **asdict(base),
+            "scenario_id": scenario_id,
+            "seed": seed,
+            "orbit_offload_percent": offload,
+            "start": start,
+            "out": str(Path(out_dir) / name),
+        }))
+    return configs
+
+
+def sweep(configs: List[RunConfig], workers: Optional[int] = None) -> List[Dict]:
+    """Run configs across a process pool; failed runs are reported, not raised"""
+    results = []
+    # Spawned workers, as in SimWorker: each imports the simulation fresh
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(run, config, True): config for config in configs}
+        for future in as_completed(futures):
+            config = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"out": config.out, "error": str(e)}
+            print(f"[Batch] {json.dumps(result)}")
+            results.append(result)
+    return results
+
+
+def train_failure(args) -> Dict:
+    """Train a FailureAgent on a VecFailureEnv and save its weights"""
+    from sim.agent_failure import FailureAgent
+    from sim.replay import ReplayBuffer
+    from sim.vec_env import STATE_DIM, FailureEnvConfig, VecFailureEnv, train_failure_agent
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    config = FailureEnvConfig(
+        episode_steps=args.episode_steps,
+        jobs_per_rate_unit=args.jobs_per_rate_unit,
+        start=args.start,
+    )
+    agent = FailureAgent()
+    replay = ReplayBuffer(args.replay_size, STATE_DIM, seed=args.seed)
+    make_satellites = functools.partial(load_constellation, args.satellites)
+    with VecFailureEnv(args.envs, make_satellites, config, seed=args.seed, workers=args.workers) as vec_env:
+        stats = train_failure_agent(agent, vec_env, args.steps, replay, batch_size=args.batch_size)
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    agent.save(str(out))
+    return {"out": str(out), **stats}
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Headless orbital compute simulation")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train-failure", help="Train the failure agent offline")
+    train.add_argument("--envs", type=int, default=8, help="Cloned Worlds stepped in lockstep")
+    train.add_argument("--workers", type=int, default=0, help="Processes to spread the Worlds over (0 = in process)")
+    train.add_argument("--steps", type=int, default=2000, help="Lockstep steps (each yields one transition per World)")
+    train.add_argument("--episode-steps", type=int, default=600)
+    train.add_argument("--jobs-per-rate-unit", type=float, default=20.0, help="Job arrival scale (live world: 100)")
+    train.add_argument("--batch-size", type=int, default=256)
+    train.add_argument("--replay-size", type=int, default=100_000)
+    train.add_argument("--satellites", type=int, default=0, help="Use N dummy satellites instead of Starlink TLEs")
+    train.add_argument("--start", default=None, help="Simulated start time (ISO 8601, default now)")
+    train.add_argument("--seed", type=int, default=0)
+    train.add_argument("--out", default="failure_agent.npy")
+    for name in ("run", "sweep"):
+        sub = commands.add_parser(name)
+        sub.add_argument("--duration-s", type=float, default=3600.0, help="Simulated duration")
+        sub.add_argument("--tick-s", type=float, default=60.0, help="Simulated seconds per orbital tick")
+        sub.add_argument("--start", default=None, help="Simulated start time (ISO 8601, default now)")
+        sub.add_argument("--mode", default="normal")
+        sub.add_argument("--satellites", type=int, default=0, help="Use N dummy satellites instead of Starlink TLEs")
+        sub.add_argument("--no-routing", action="store_true", help="Skip the routing World")
+        if name == "run":
+            sub.add_argument("--scenario", default="default")
+            sub.add_argument("--seed", type=int, default=0)
+            sub.add_argument("--offload", type=float, default=30.0, help="orbitOffloadPercent")
+            sub.add_argument("--out", default="batch_run.npz")
+        else:
+            sub.add_argument("--scenario", nargs="+", default=["default"])
+            sub.add_argument("--seed", type=int, nargs="+", default=[0])
+            sub.add_argument("--offload", type=float, nargs="+", default=[30.0], help="orbitOffloadPercent values")
+            sub.add_argument("--out-dir", default="batch_runs")
+            sub.add_argument("--workers", type=int, default=None)
+    return parser.parse_args()
+
+
+def cli():
+    args = _parse_args()
+    if args.command == "train-failure":
+        print(f"[Batch] {json.dumps(train_failure(args))}")
+        return
+    base = RunConfig(
+        duration_s=args.duration_s,
+        tick_s=args.tick_s,
+        start=args.start,
+        mode=args.mode,
+        satellites=args.satellites,
+        routing=not args.no_routing,
+    )
+    if args.command == "run":
+        config = RunConfig(**{
+            **asdict(base),
+            "scenario_id": args.scenario,
+            "seed": args.seed,
+            "orbit_offload_percent": args.offload,
+            "out": args.out,
+        })
+        print(f"[Batch] {json.dumps(run(config))}")
+    else:
+        configs = sweep_configs(base, args.offload, args.scenario, args.seed, args.out_dir)
+        print(f"[Batch] Running {len(configs)} configurations")
+        sweep(configs, args.workers)
+
+
+if __name__ == "__main__":
+    cli()
@@ -3,23 +3,19 @@
 Script to check CelesTrak TLE availability and download Starlink TLEs
 """
 import asyncio
+import time
 import httpx
-from pathlib import Path
+
+from services.starlink import CELESTRAK_URLS, REQUEST_HEADERS, get_starlink_service, is_blocked_response
+from services.tle_catalog import parse_tle_text, write_catalog_cache
 
 async def check_celestrak():
     """Check if CelesTrak is accessible and count Starlink satellites"""
-    urls = [
-        "https://celestrak.org/NORAD/elements/gp.php?GROUP=starlink&FORMAT=tle",
-        "https://celestrak.org/NORAD/elements/starlink.txt",
+    urls = CELESTRAK_URLS + [
         "https://celestrak.org/api/v1/gp.php?GROUP=starlink&FORMAT=tle",
     ]
     
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/plain",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://celestrak.org/",
-    }
+    headers = REQUEST_HEADERS
     
     print("Checking CelesTrak endpoints...")
     print("=" * 60)
@@ -29,46 +25,36 @@ async def check_celestrak():
             try:
                 print(f"\nTrying: {url}")
                 response = await client.get(url, headers=headers, follow_redirects=True)
-                response.raise_for_status()
                 
                 text = response.text.strip()
                 
-                # Check if we got HTML (403 page) instead of TLE data
-                if text.startswith("<!DOCTYPE") or text.startswith("<html") or "403" in text or "Forbidden" in text:
-                    print(f"  ❌ Got 403 Forbidden (HTML page)")
+                # Check if we got a 403 / 429 or an HTML page instead of TLE data
+                if is_blocked_response(text, response.status_code):
+                    print(f"  ❌ Blocked (HTTP {response.status_code} or HTML page)")
                     continue
+                response.raise_for_status()
                 
-                # Parse TLEs
+                # Parse TLEs (3 lines each: name, line1, line2)
                 lines = text.split("\n")
                 print(f"  ✓ Got {len(lines)} lines")
-                
-                # Count TLE sets (3 lines each: name, line1, line2)
-                tle_count = 0
-                valid_tles = []
-                for i in range(0, len(lines) - 1, 3):
-                    if i + 2 < len(lines):
-                        name = lines[i].strip()
-                        line1 = lines[i + 1].strip()
-                        line2 = lines[i + 2].strip()
-                        if line1.startswith("1 ") and line2.startswith("2 "):
-                            tle_count += 1
-                            if len(valid_tles) < 3:
-                                valid_tles.append((name, line1, line2))
+                catalog = parse_tle_text(text)
+                tle_count = len(catalog)
                 
                 print(f"  ✓ Found {tle_count} Starlink satellites")
                 
                 if tle_count > 0:
                     print(f"\n  Sample TLEs:")
-                    for name, line1, line2 in valid_tles:
+                    for name, line1, line2 in zip(catalog.names[:3], catalog.line1[:3], catalog.line2[:3]):
                         print(f"    {name}")
                         print(f"    {line1[:70]}...")
                         print(f"    {line2[:70]}...")
                     
-                    # Save to cache
-                    cache_file = Path("tle_cache.txt")
-                    cache_file.write_text(text)
-                    print(f"\n  ✓ Saved {tle_count} satellites to {cache_file}")
-                    print(f"  ✓ File size: {len(text)} bytes")
+                    # Save to the shared cache (text + binary catalog) used by the server
+                    service = get_starlink_service()
+                    write_catalog_cache(catalog, service.cache_file)
+                    service.cache_time_file.write_text(str(time.time()))
+                    print(f"\n  ✓ Saved {tle_count} satellites to {service.cache_file}")
+                    print(f"  ✓ File size: {service.cache_file.stat().st_size} bytes")
                     
                     return tle_count, url
                     
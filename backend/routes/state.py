@@ -1,12 +1,21 @@
 """
 FastAPI routes for SystemState endpoints
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timezone
 from services.starlink import get_starlink_service
-from services.orbit_model import propagate_satellites, find_nearest_gateway
+from services.orbit_model import propagate_satellites, find_nearest_gateways
+from services.snapshots import EncodedPayload, encode_payload, payload_response
+from services.state_codec import (
+    COLUMNAR_MEDIA_TYPE,
+    dictionary_encode,
+    encode_columns,
+    pack_bits,
+    prefixed_index_column,
+    wants_columnar,
+)
 import asyncio
 
 # Import these at function level to avoid circular import
@@ -61,89 +70,153 @@ class SystemStateUpdate(BaseModel):
     workloads: Optional[List[WorkloadProfileModel]] = None
     phase: Optional[str] = None
 
+def _ground_site_models(sim_state) -> List[GroundSiteModel]:
+    return [
+        GroundSiteModel(
+            id=site.id,
+            name=site.label,
+            lat=site.lat,
+            lon=site.lon,
+            capacityMW=site.powerMw,
+            baseLatencyMs=45.0,
+            energyPricePerMWh=site.energyPrice,
+            carbonKgPerMWh=site.carbonIntensity,
+            activeJobs=site.jobsRunning,
+        )
+        for site in sim_state.groundSites
+    ]
+
+def _default_workloads(sim_state) -> List[WorkloadProfileModel]:
+    return [
+        WorkloadProfileModel(
+            type="ai_inference",
+            demandMW=20.0,
+            orbitShare=sim_state.metrics.orbitSharePercent / 100,
+        )
+    ]
+
+def _system_metrics(sim_state) -> SystemMetricsModel:
+    return SystemMetricsModel(
+        avgLatencyMs=sim_state.metrics.avgLatencyMs,
+        totalEnergyCostUSD=sim_state.metrics.energyCostGround + sim_state.metrics.energyCostOrbit,
+        totalCarbonKgPerMWh=sim_state.metrics.carbonGround + sim_state.metrics.carbonOrbit,
+        orbitSharePercent=sim_state.metrics.orbitSharePercent,
+    )
+
+# Columnar /api/state body, built at most once per published tick
+_columnar_cache = {"tick": None, "payload": None}
+
+def _columnar_system_state(snapshot, gateways) -> EncodedPayload:
+    """
+    SystemState with orbitalNodes as columns (see services/state_codec.py).
+    TLE lines are left out; clients fetch them once from /api/tle/starlink.
+    """
+    if _columnar_cache["tick"] == snapshot.tick:
+        return _columnar_cache["payload"]
+    
+    sim_state = snapshot.state
+    sats = sim_state.satellites
+    gateway_ids, latencies = find_nearest_gateways(
+        [sat.lat for sat in sats],
+        [sat.lon for sat in sats],
+        gateways,
+    )
+    gateway_indices, gateway_table = dictionary_encode(gateway_ids)
+    body = encode_columns(
+        len(sats),
+        [
+            ("id", "uint32", prefixed_index_column([sat.id for sat in sats], "sat_")),
+            ("lat", "float32", [sat.lat for sat in sats]),
+            ("lon", "float32", [sat.lon for sat in sats]),
+            ("altKm", "float32", [sat.alt_km for sat in sats]),
+            ("capacityMW", "float32", [sat.capacityMw for sat in sats]),
+            ("utilization", "float32", [sat.utilization for sat in sats]),
+            ("latencyMsToGateway", "float32", latencies),
+            ("gatewaySiteId", gateway_indices.dtype.name, gateway_indices),
+            ("isSunlit", "bits", pack_bits([sat.sunlit for sat in sats])),
+        ],
+        dictionaries={"gatewaySiteId": gateway_table},
+        meta={
+            "idPrefix": "sat_",
+            "timestamp": sim_state.time,
+            "phase": "SANDBOX",
+            "groundSites": [site.model_dump() for site in _ground_site_models(sim_state)],
+            "workloads": [workload.model_dump() for workload in _default_workloads(sim_state)],
+            "metrics": _system_metrics(sim_state).model_dump(),
+        },
+    )
+    payload = encode_payload(body, media_type=COLUMNAR_MEDIA_TYPE)
+    _columnar_cache["tick"] = snapshot.tick
+    _columnar_cache["payload"] = payload
+    return payload
+
 @router.get("/state", response_model=SystemStateModel)
-async def get_state():
-    """Get current system state"""
+async def get_state(request: Request, format: Optional[str] = None):
+    """Get current system state
+    
+    format: "json" (default) or "columnar"; the columnar media type in Accept also selects it
+    """
     # Import here to avoid circular import
-    from main import TOPOLOGY, sim_state, sim_lock
+    from main import TOPOLOGY, snapshots
     
-    async with sim_lock:
-        if sim_state is None:
-            raise HTTPException(status_code=503, detail="Simulation not initialized")
-        
-        # Convert legacy SimState to SystemState
-        starlink_service = get_starlink_service()
-        satellites = starlink_service.get_satellites()
-        
-        # Build orbital nodes - use sim_state satellites as primary source for now
-        # This avoids propagation errors and keeps the API stable
-        orbital_nodes = []
+    # Read the published snapshot once; the simulator never blocks this handler
+    snapshot = snapshots.current()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Simulation not initialized")
+    sim_state = snapshot.state
+    
+    if wants_columnar(request.headers.get("accept", ""), format):
         gateways = [{"id": gw["id"], "lat": gw["lat"], "lon": gw["lon"]} for gw in TOPOLOGY["gateways"]]
+        return payload_response(request, _columnar_system_state(snapshot, gateways))
+    
+    # Convert legacy SimState to SystemState
+    starlink_service = get_starlink_service()
+    
+    # Build orbital nodes - use sim_state satellites as primary source for now
+    # This avoids propagation errors and keeps the API stable
+    orbital_nodes = []
+    gateways = [{"id": gw["id"], "lat": gw["lat"], "lon": gw["lon"]} for gw in TOPOLOGY["gateways"]]
+    
+    # Nearest gateway for all satellites in one batched query
+    gateway_ids, latencies = find_nearest_gateways(
+        [sat.lat for sat in sim_state.satellites],
+        [sat.lon for sat in sim_state.satellites],
+        gateways,
+    )
+    
+    # Use sim_state satellites directly (they're already propagated by main.py)
+    for sat, gateway_id, latency in zip(sim_state.satellites, gateway_ids, latencies):  # Process all satellites
+        # TLE lines from the shared catalog (satellite ids map to catalog indices)
+        tle = starlink_service.get_tle(starlink_service.index_for_sat_id(sat.id))
         
-        # Use sim_state satellites directly (they're already propagated by main.py)
-        for sat in sim_state.satellites:  # Process all satellites
-            gateway_id, latency = find_nearest_gateway(sat.lat, sat.lon, gateways)
-            
-            # Try to get TLE data if available
-            tle_data = starlink_service.get_tle_list()
-            tle = {"tleLine1": "", "tleLine2": ""}
-            # Try to match by index (rough approximation)
-            sat_index = int(sat.id.split("_")[-1]) if "_" in sat.id else 0
-            if sat_index < len(tle_data):
-                tle = tle_data[sat_index]
-            
-            orbital_nodes.append(OrbitalNodeModel(
-                id=sat.id,
-                tleLine1=tle.get("tleLine1", ""),
-                tleLine2=tle.get("tleLine2", ""),
-                lat=sat.lat,
-                lon=sat.lon,
-                altKm=sat.alt_km,
-                capacityMW=sat.capacityMw,
-                utilization=sat.utilization,
-                isSunlit=sat.sunlit,
-                gatewaySiteId=gateway_id,
-                latencyMsToGateway=latency,
-            ))
-        
-        # Convert ground sites
-        ground_sites = [
-            GroundSiteModel(
-                id=site.id,
-                name=site.label,
-                lat=site.lat,
-                lon=site.lon,
-                capacityMW=site.powerMw,
-                baseLatencyMs=45.0,
-                energyPricePerMWh=site.energyPrice,
-                carbonKgPerMWh=site.carbonIntensity,
-                activeJobs=site.jobsRunning,
-            )
-            for site in sim_state.groundSites
-        ]
-        
-        # Default workloads
-        workloads = [
-            WorkloadProfileModel(
-                type="ai_inference",
-                demandMW=20.0,
-                orbitShare=sim_state.metrics.orbitSharePercent / 100,
-            )
-        ]
-        
-        return SystemStateModel(
-            timestamp=sim_state.time,
-            phase="SANDBOX",  # Will be managed by frontend
-            groundSites=ground_sites,
-            orbitalNodes=orbital_nodes,
-            workloads=workloads,
-            metrics=SystemMetricsModel(
-                avgLatencyMs=sim_state.metrics.avgLatencyMs,
-                totalEnergyCostUSD=sim_state.metrics.energyCostGround + sim_state.metrics.energyCostOrbit,
-                totalCarbonKgPerMWh=sim_state.metrics.carbonGround + sim_state.metrics.carbonOrbit,
-                orbitSharePercent=sim_state.metrics.orbitSharePercent,
-            ),
-        )
+        orbital_nodes.append(OrbitalNodeModel(
+            id=sat.id,
+            tleLine1=tle.get("tleLine1", ""),
+            tleLine2=tle.get("tleLine2", ""),
+            lat=sat.lat,
+            lon=sat.lon,
+            altKm=sat.alt_km,
+            capacityMW=sat.capacityMw,
+            utilization=sat.utilization,
+            isSunlit=sat.sunlit,
+            gatewaySiteId=gateway_id,
+            latencyMsToGateway=latency,
+        ))
+    
+    # Convert ground sites
+    ground_sites = _ground_site_models(sim_state)
+    
+    # Default workloads
+    workloads = _default_workloads(sim_state)
+    
+    return SystemStateModel(
+        timestamp=sim_state.time,
+        phase="SANDBOX",  # Will be managed by frontend
+        groundSites=ground_sites,
+        orbitalNodes=orbital_nodes,
+        workloads=workloads,
+        metrics=_system_metrics(sim_state),
+    )
 
 @router.post("/state/update", response_model=SystemStateModel)
 async def update_state(update: SystemStateUpdate):
@@ -151,84 +224,68 @@ async def update_state(update: SystemStateUpdate):
     # For now, just return current state
     # TODO: Implement actual state updates
     # Import here to avoid circular import
-    from main import TOPOLOGY, sim_state, sim_lock
+    from main import TOPOLOGY, snapshots
     
-    async with sim_lock:
-        if sim_state is None:
-            raise HTTPException(status_code=503, detail="Simulation not initialized")
-        
-        # Convert legacy SimState to SystemState (same as get_state)
-        starlink_service = get_starlink_service()
-        satellites = starlink_service.get_satellites()
-        
-        from datetime import datetime, timezone
-        now = datetime.now(timezone.utc)
-        nodes = propagate_satellites(satellites, now)
-        
-        # Build orbital nodes with gateway info
-        orbital_nodes = []
-        gateways = [{"id": gw["id"], "lat": gw["lat"], "lon": gw["lon"]} for gw in TOPOLOGY["gateways"]]
-        
-        for i, node in enumerate(nodes):
-            gateway_id, latency = find_nearest_gateway(node["lat"], node["lon"], gateways)
-            tle_data = starlink_service.get_tle_list()
-            tle = tle_data[i] if i < len(tle_data) else {"tleLine1": "", "tleLine2": ""}
-            
-            # Find corresponding satellite in sim_state
-            legacy_sat = next((s for s in sim_state.satellites if s.id == node["id"]), None)
-            
-            orbital_nodes.append(OrbitalNodeModel(
-                id=node["id"],
-                tleLine1=tle.get("tleLine1", ""),
-                tleLine2=tle.get("tleLine2", ""),
-                lat=node["lat"],
-                lon=node["lon"],
-                altKm=node["altKm"],
-                capacityMW=legacy_sat.capacityMw if legacy_sat else 0.003,
-                utilization=legacy_sat.utilization if legacy_sat else 0.0,
-                isSunlit=node["isSunlit"],
-                gatewaySiteId=gateway_id,
-                latencyMsToGateway=latency,
-            ))
-        
-        # Convert ground sites
-        ground_sites = [
-            GroundSiteModel(
-                id=site.id,
-                name=site.label,
-                lat=site.lat,
-                lon=site.lon,
-                capacityMW=site.powerMw,
-                baseLatencyMs=45.0,
-                energyPricePerMWh=site.energyPrice,
-                carbonKgPerMWh=site.carbonIntensity,
-                activeJobs=site.jobsRunning,
-            )
-            for site in sim_state.groundSites
-        ]
+    # Read the published snapshot once; the simulator never blocks this handler
+    snapshot = snapshots.current()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Simulation not initialized")
+    sim_state = snapshot.state
+    
+    # Convert legacy SimState to SystemState (same as get_state)
+    starlink_service = get_starlink_service()
+    satellites = starlink_service.get_satellites()
+    
+    from datetime import datetime, timezone
+    now = datetime.now(timezone.utc)
+    nodes = propagate_satellites(satellites, now)
+    
+    # Build orbital nodes with gateway info
+    orbital_nodes = []
+    gateways = [{"id": gw["id"], "lat": gw["lat"], "lon": gw["lon"]} for gw in TOPOLOGY["gateways"]]
+    
+    legacy_sats = {s.id: s for s in sim_state.satellites}
+    
+    gateway_ids, latencies = find_nearest_gateways(
+        [node["lat"] for node in nodes],
+        [node["lon"] for node in nodes],
+        gateways,
+    )
+    
+    for node, gateway_id, latency in zip(nodes, gateway_ids, latencies):
+        tle = starlink_service.get_tle(starlink_service.index_for_sat_id(node["id"]))
         
-        # Use updated workloads if provided
-        workloads = update.workloads if update.workloads else [
-            WorkloadProfileModel(
-                type="ai_inference",
-                demandMW=20.0,
-                orbitShare=sim_state.metrics.orbitSharePercent / 100,
-            )
-        ]
+        # Find corresponding satellite in sim_state
+        legacy_sat = legacy_sats.get(node["id"])
         
-        return SystemStateModel(
-            timestamp=sim_state.time,
-            phase=update.phase if update.phase else "SANDBOX",
-            groundSites=ground_sites,
-            orbitalNodes=orbital_nodes,
-            workloads=workloads,
-            metrics=SystemMetricsModel(
-                avgLatencyMs=sim_state.metrics.avgLatencyMs,
-                totalEnergyCostUSD=sim_state.metrics.energyCostGround + sim_state.metrics.energyCostOrbit,
-                totalCarbonKgPerMWh=sim_state.metrics.carbonGround + sim_state.metrics.carbonOrbit,
-                orbitSharePercent=sim_state.metrics.orbitSharePercent,
-            ),
-        )
+        orbital_nodes.append(OrbitalNodeModel(
+            id=node["id"],
+            tleLine1=tle.get("tleLine1", ""),
+            tleLine2=tle.get("tleLine2", ""),
+            lat=node["lat"],
+            lon=node["lon"],
+            altKm=node["altKm"],
+            capacityMW=legacy_sat.capacityMw if legacy_sat else 0.003,
+            utilization=legacy_sat.utilization if legacy_sat else 0.0,
+            isSunlit=node["isSunlit"],
+            gatewaySiteId=gateway_id,
+            latencyMsToGateway=latency,
+        ))
+    
+    # Convert ground sites
+    ground_sites = _ground_site_models(sim_state)
+    
+    # Use updated workloads if provided
+    workloads = update.workloads if update.workloads else _default_workloads(sim_state)
+    
+    return SystemStateModel(
+        timestamp=sim_state.time,
+        phase=update.phase if update.phase else "SANDBOX",
+        groundSites=ground_sites,
+        orbitalNodes=orbital_nodes,
+        workloads=workloads,
+        metrics=_system_metrics(sim_state),
+    )
 
 @router.get("/tle/starlink")
 async def get_tle_list():
@@ -0,0 +1,78 @@
+"""
+Earth Shadow Model
+Vectorized sunlit / eclipse classification for the whole fleet
+"""
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+SUN_RADIUS_KM = 696000.0
+
+
+def illumination_fraction(sat_positions_km: np.ndarray, sun_position_km: np.ndarray) -> np.ndarray:
+    """
+    Fraction of the solar disc visible from each satellite (conical shadow model).
+
+    Args:
+        sat_positions_km: (N, 3) geocentric satellite positions
+        sun_position_km: (3,) geocentric Sun position, in the same frame
+
+    Returns:
+        (N,) array in [0, 1]: 1 = fully sunlit, 0 = umbra, in between = penumbra
+    """
+    r = np.asarray(sat_positions_km, dtype=np.float64).reshape(-1, 3)
+    sun = np.asarray(sun_position_km, dtype=np.float64).reshape(3)
+
+    to_sun = sun - r
+    r_mag = np.linalg.norm(r, axis=1)
+    to_sun_mag = np.linalg.norm(to_sun, axis=1)
+
+    # Invalid vectors default to sunlit
+    valid = (r_mag > EARTH_RADIUS_KM) & (to_sun_mag > 0)
+    r_mag = np.where(valid, r_mag, 1.0)
+    to_sun_mag = np.where(valid, to_sun_mag, 1.0)
+
+    # Apparent radii of the Sun and Earth discs and their angular separation
+    a = np.arcsin(np.clip(SUN_RADIUS_KM / to_sun_mag, 0.0, 1.0))
+    b = np.arcsin(np.clip(EARTH_RADIUS_KM / r_mag, 0.0, 1.0))
+    cos_c = -np.einsum("ij,ij->i", r, to_sun) / (r_mag * to_sun_mag)
+    c = np.arccos(np.clip(cos_c, -1.0, 1.0))
+
+    fraction = np.ones(len(r))
+
+    umbra = c <= b - a
+    annular = c <= a - b
+    partial = (c < a + b) & ~umbra & ~annular
+
+    fraction[umbra] = 0.0
+    fraction[annular] = 1.0 - (b[annular] / a[annular]) ** 2
+
+    if partial.any():
+        ap, bp, cp = a[partial], b[partial], c[partial]
+        x = (cp ** 2 + ap ** 2 - bp ** 2) / (2.0 * cp)
+        y = np.sqrt(np.clip(ap ** 2 - x ** 2, 0.0, None))
+        overlap = (
+            ap ** 2 * np.arccos(np.clip(x / ap, -1.0, 1.0))
+            + bp ** 2 * np.arccos(np.clip((cp - x) / bp, -1.0, 1.0))
+            - cp * y
+        )
+        fraction[partial] = 1.0 - overlap / (np.pi * ap ** 2)
+
+    fraction[~valid] = 1.0
+    return np.clip(fraction, 0.0, 1.0)
+
+
+def sunlit_mask(
+    sat_positions_km: np.ndarray,
+    sun_position_km: np.ndarray,
+    penumbra_is_shadow: bool = True,
+) -> np.ndarray:
+    """
+    Sunlit flag for each satellite.
+
+    By default penumbra counts as shadow (reduced power), matching how the
+    power model treats partially eclipsed satellites.
+    """
+    fraction = illumination_fraction(sat_positions_km, sun_position_km)
+    if penumbra_is_shadow:
+        return fraction >= 1.0
+    return fraction > 0.0
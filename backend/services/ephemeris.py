@@ -0,0 +1,129 @@
+"""
+Sun Ephemeris Table
+Geocentric Sun vectors precomputed from de421.bsp and evaluated by linear
+interpolation, so simulation ticks never call into the JPL kernel.
+
+Tables cover fixed windows of TABLE_WINDOW_S (plus one step either side) and
+are written once to EPHEMERIS_CACHE_DIR as .npy files of rows
+(unix_s, x_km, y_km, z_km). Every process memory-maps the same files, so
+process-mode workers and batch sweeps share one copy through the page cache.
+
+With hourly knots the Sun's direction moves ~0.04 deg between samples and the
+linear interpolation error stays around 1e-5 deg or less, far inside the
+shadow model's tolerance.
+"""
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+EPHEMERIS_CACHE_DIR = Path(os.getenv("EPHEMERIS_CACHE_DIR", "ephemeris_cache"))
+TABLE_STEP_S = 3600.0
+TABLE_WINDOW_S = 30 * 86400.0
+TABLE_VERSION = 1
+
+
+class SunEphemeris:
+    """Sun position relative to Earth (km, same frame as skyfield's positions) at any time"""
+
+    def __init__(self, cache_dir: Path = EPHEMERIS_CACHE_DIR, step_s: float = TABLE_STEP_S, window_s: float = TABLE_WINDOW_S):
+        self.cache_dir = Path(cache_dir)
+        self.step_s = step_s
+        self.window_s = window_s
+        self._tables: Dict[int, np.ndarray] = {}  # window index -> (rows, 4) table
+        self._kernel = None
+        self._lock = threading.Lock()
+
+    def sun_vector_km(self, t: datetime) -> np.ndarray:
+        """(3,) Earth -> Sun vector at t (timezone-aware)"""
+        unix_s = t.timestamp()
+        table = self._table(int(unix_s // self.window_s))
+        # Knots are evenly spaced, so the bracketing row is found directly
+        row = int((unix_s - table[0, 0]) // self.step_s)
+        weight = (unix_s - table[row, 0]) / self.step_s
+        return (1.0 - weight) * table[row, 1:] + weight * table[row + 1, 1:]
+
+    def sun_vectors_km(self, unix_s) -> np.ndarray:
+        """(N, 3) Earth -> Sun vectors at the given Unix times"""
+        unix_s = np.atleast_1d(np.asarray(unix_s, dtype=np.float64))
+        out = np.empty((len(unix_s), 3))
+        windows = np.floor(unix_s / self.window_s).astype(np.int64)
+        for window in np.unique(windows).tolist():
+            rows = windows == window
+            table = self._table(window)
+            for axis in range(3):
+                out[rows, axis] = np.interp(unix_s[rows], table[:, 0], table[:, axis + 1])
+        return out
+
+    def _path(self, window: int) -> Path:
+        return self.cache_dir / f"sun_v{TABLE_VERSION}_{int(self.step_s)}s_{int(self.window_s)}s_{window}.npy"
+
+    def _table(self, window: int) -> np.ndarray:
+        table = self._tables.get(window)
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._tables.get(window)
+            if table is None:
+                table = self._load(window)
+                if table is None:
+                    table = self._build(window)
+                self._tables[window] = table
+            return table
+
+    def _load(self, window: int) -> Optional[np.ndarray]:
+        path = self._path(window)
+        if not path.exists():
+            return None
+        try:
+            table = np.load(path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"[Ephemeris] Ignoring unreadable table {path}: {e}")
+            return None
+        if table.ndim != 2 or table.shape[1] != 4:
+            print(f"[Ephemeris] Ignoring malformed table {path}")
+            return None
+        return table
+
+    def _build(self, window: int) -> np.ndarray:
+        from skyfield.api import load
+
+        if self._kernel is None:
+            eph = load("de421.bsp")
+            self._kernel = (load.timescale(), eph["earth"], eph["sun"])
+        ts, earth_obj, sun_obj = self._kernel
+
+        start = window * self.window_s - self.step_s
+        count = int(round(self.window_s / self.step_s)) + 3
+        unix_s = start + self.step_s * np.arange(count)
+        # Whole days go in the day field: seconds past the end of a day would count leap seconds
+        days, seconds = np.divmod(unix_s, 86400.0)
+        t = ts.utc(1970, 1, 1 + days.astype(np.int64), 0, 0, seconds)
+        sun_vec = np.asarray(sun_obj.at(t).position.km) - np.asarray(earth_obj.at(t).position.km)
+        table = np.column_stack([unix_s, np.broadcast_to(sun_vec.reshape(3, -1), (3, count)).T])
+
+        path = self._path(window)
+        try:
+            # Written under a per-process name and renamed, so concurrent builders never see a partial file
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+            np.save(tmp_path, table)
+            os.replace(tmp_path, path)
+            print(f"[Ephemeris] Built Sun table {path.name} ({count} samples)")
+            return np.load(path, mmap_mode="r")
+        except OSError as e:
+            print(f"[Ephemeris] Could not cache Sun table ({e}); keeping it in memory")
+            return table
+
+
+_sun_ephemeris: Optional[SunEphemeris] = None
+
+
+def get_sun_ephemeris() -> SunEphemeris:
+    global _sun_ephemeris
+    if _sun_ephemeris is None:
+        _sun_ephemeris = SunEphemeris()
+    return _sun_ephemeris
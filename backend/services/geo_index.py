@@ -0,0 +1,118 @@
+"""
+Geo Index
+Batched nearest-neighbour and radius queries over ground sites, gateways or
+satellite subpoints, using 3D unit vectors on the sphere
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Upper bound on the (queries x points) block held in memory at once
+_BLOCK_ELEMENTS = 4_000_000
+
+
+def to_unit_vectors(lat_deg, lon_deg) -> np.ndarray:
+    """Convert latitude/longitude arrays (degrees) to (N, 3) unit vectors"""
+    lat = np.radians(np.asarray(lat_deg, dtype=np.float64).ravel())
+    lon = np.radians(np.asarray(lon_deg, dtype=np.float64).ravel())
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=1)
+
+
+def dot_to_km(dot: np.ndarray) -> np.ndarray:
+    """Great-circle distance from the dot product of two unit vectors"""
+    chord = np.sqrt(np.clip(2.0 - 2.0 * dot, 0.0, 4.0))
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+def km_to_dot(distance_km: float) -> float:
+    """Inverse of dot_to_km, used to turn a radius into a dot-product threshold"""
+    return float(np.cos(min(distance_km / EARTH_RADIUS_KM, np.pi)))
+
+
+class GeoIndex:
+    """
+    Static index over a set of points on the Earth's surface.
+
+    Built once from lat/lon arrays; queries take arrays of query points and
+    are answered block-wise with a single matrix product per block, so the
+    cost is a handful of NumPy calls regardless of how many points are indexed.
+    """
+
+    def __init__(self, lat_deg, lon_deg, ids: Optional[Sequence[str]] = None):
+        self.unit = to_unit_vectors(lat_deg, lon_deg)
+        self.ids: List[str] = list(ids) if ids is not None else [str(i) for i in range(len(self.unit))]
+
+    @classmethod
+    def from_sites(cls, sites: List[Dict]) -> "GeoIndex":
+        """Build from topology entries with "id", "lat" and "lon" keys"""
+        return cls(
+            [site["lat"] for site in sites],
+            [site["lon"] for site in sites],
+            [site["id"] for site in sites],
+        )
+
+    def __len__(self) -> int:
+        return len(self.unit)
+
+    def _blocks(self, query: np.ndarray):
+        rows = max(1, _BLOCK_ELEMENTS // max(1, len(self.unit)))
+        for start in range(0, len(query), rows):
+            block = query[start:start + rows]
+            yield start, block @ self.unit.T
+
+    def nearest(self, lat_deg, lon_deg, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest indexed points for each query point.
+
+        Returns:
+            (indices, distances_km), both (Q, k) and sorted nearest first
+        """
+        query = to_unit_vectors(lat_deg, lon_deg)
+        k = min(k, len(self.unit))
+        indices = np.empty((len(query), k), dtype=np.int64)
+        dots = np.empty((len(query), k))
+        if k == 0:
+            return indices, dots
+
+        for start, block in self._blocks(query):
+            if k == 1:
+                idx = np.argmax(block, axis=1)[:, None]
+            else:
+                idx = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            best = np.take_along_axis(block, idx, axis=1)
+            order = np.argsort(-best, axis=1)
+            indices[start:start + len(block)] = np.take_along_axis(idx, order, axis=1)
+            dots[start:start + len(block)] = np.take_along_axis(best, order, axis=1)
+
+        return indices, dot_to_km(dots)
+
+    def within_radius(self, lat_deg, lon_deg, radius_km: float) -> List[np.ndarray]:
+        """Indices of indexed points within `radius_km` of each query point"""
+        query = to_unit_vectors(lat_deg, lon_deg)
+        threshold = km_to_dot(radius_km)
+        results: List[np.ndarray] = []
+        for _, block in self._blocks(query):
+            mask = block >= threshold
+            results.extend(np.flatnonzero(row) for row in mask)
+        return results
+
+    def ids_for(self, indices: np.ndarray) -> List[str]:
+        """Map index array to point ids"""
+        return [self.ids[i] for i in np.asarray(indices).ravel().tolist()]
+
+
+# Indexes over static topology lists, keyed by their contents
+_site_indexes: Dict[tuple, GeoIndex] = {}
+
+
+def get_site_index(sites: List[Dict]) -> GeoIndex:
+    """Get a cached GeoIndex for a topology list (gateways, groundSites)"""
+    key = tuple((site["id"], site["lat"], site["lon"]) for site in sites)
+    index = _site_indexes.get(key)
+    if index is None:
+        index = GeoIndex.from_sites(sites)
+        _site_indexes[key] = index
+    return index
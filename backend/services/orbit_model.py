@@ -5,61 +5,13 @@ Handles satellite position, sunlight calculation, and latency modeling
 import math
 from datetime import datetime, timezone
 from typing import List, Dict, Tuple
-from skyfield.api import load, EarthSatellite
-from skyfield.positionlib import Geocentric
+import numpy as np
+from skyfield.api import EarthSatellite
 
-ts = load.timescale()
-
-# Load ephemeris once
-eph = load("de421.bsp")
-earth_obj = eph["earth"]
-sun_obj = eph["sun"]
-
-def compute_sunlit(sat_pos: Geocentric, earth_pos: Geocentric, sun_pos: Geocentric) -> bool:
-    """
-    Determine if satellite is sunlit (not in Earth's shadow)
-    """
-    sat_vec = sat_pos.position.km
-    earth_vec = earth_pos.position.km
-    sun_vec = sun_pos.position.km
-    
-    # Vector from Earth to satellite
-    sat_rel = [sat_vec[i] - earth_vec[i] for i in range(3)]
-    # Vector from Earth to Sun
-    sun_rel = [sun_vec[i] - earth_vec[i] for i in range(3)]
-    
-    # Calculate magnitudes
-    sat_mag = math.sqrt(sum(sat_rel[i] ** 2 for i in range(3)))
-    sun_mag = math.sqrt(sum(sun_rel[i] ** 2 for i in range(3)))
-    
-    if sat_mag == 0 or sun_mag == 0:
-        return True
-    
-    # Normalize vectors
-    sat_rel_norm = [sat_rel[i] / sat_mag for i in range(3)]
-    sun_rel_norm = [sun_rel[i] / sun_mag for i in range(3)]
-    
-    # Dot product
-    dot_norm = sum(sat_rel_norm[i] * sun_rel_norm[i] for i in range(3))
-    dot_norm = max(-1.0, min(1.0, dot_norm))
-    
-    # Earth radius
-    earth_radius_km = 6371.0
-    sat_dist = sat_mag
-    shadow_angle = math.asin(earth_radius_km / sat_dist) if sat_dist > earth_radius_km else math.pi / 2
-    umbra_angle = math.pi - shadow_angle
-    
-    # Check if in shadow
-    if dot_norm <= 0:
-        angle_rad = math.acos(dot_norm)
-        if angle_rad > umbra_angle:
-            return False
-        # Penumbra threshold
-        penumbra_threshold = math.radians(100)
-        if angle_rad > penumbra_threshold:
-            return False
-    
-    return True
+from services.eclipse import sunlit_mask
+from services.ephemeris import get_sun_ephemeris
+from services.geo_index import get_site_index
+from services.trajectory import get_positions_source
 
 def propagate_satellites(
     satellites: List[EarthSatellite],
@@ -68,32 +20,23 @@ def propagate_satellites(
     """
     Propagate all satellites to given time and return orbital node data
     """
-    skyfield_t = ts.from_datetime(t)
-    earth_pos = earth_obj.at(skyfield_t)
-    sun_pos = sun_obj.at(skyfield_t)
+    propagation = get_positions_source(satellites).propagate(t)
+    ok = propagation.ok[:, 0]
+    positions = propagation.positions_km[:, 0, :]
+    sun_vec = get_sun_ephemeris().sun_vector_km(t)
+    sunlit_flags = np.ones(len(ok), dtype=bool)
+    sunlit_flags[ok] = sunlit_mask(positions[ok], sun_vec)
     
     nodes = []
-    for i, sat in enumerate(satellites):
-        try:
-            geocentric = sat.at(skyfield_t)
-            subpoint = geocentric.subpoint()
-            
-            lat = subpoint.latitude.degrees
-            lon = subpoint.longitude.degrees
-            alt_km = subpoint.elevation.km
-            
-            is_sunlit = compute_sunlit(geocentric, earth_pos, sun_pos)
-            
-            nodes.append({
-                "id": f"sat_{i}",
-                "lat": lat,
-                "lon": lon,
-                "altKm": alt_km,
-                "isSunlit": is_sunlit,
-                "geocentric": geocentric,
-            })
-        except Exception:
-            continue
+    for i in np.flatnonzero(ok).tolist():
+        nodes.append({
+            "id": f"sat_{i}",
+            "lat": float(propagation.lat_deg[i, 0]),
+            "lon": float(propagation.lon_deg[i, 0]),
+            "altKm": float(propagation.alt_km[i, 0]),
+            "isSunlit": bool(sunlit_flags[i]),
+            "position": positions[i],
+        })
     
     return nodes
 
@@ -138,17 +81,26 @@ def find_nearest_gateway(
     """
     Find nearest gateway to satellite and return (gateway_id, latency_ms)
     """
-    min_dist = float("inf")
-    nearest_id = ""
-    
-    for gw in gateways:
-        latency = calculate_latency_to_gateway(
-            sat_lat, sat_lon, 550,  # Assume ~550km altitude
-            gw["lat"], gw["lon"]
-        )
-        if latency < min_dist:
-            min_dist = latency
-            nearest_id = gw["id"]
-    
-    return nearest_id, min_dist
+    ids, latencies = find_nearest_gateways([sat_lat], [sat_lon], gateways)
+    return ids[0], latencies[0]
 
+def find_nearest_gateways(
+    sat_lats,
+    sat_lons,
+    gateways: List[Dict],
+    sat_alt_km: float = 550.0
+) -> Tuple[List[str], List[float]]:
+    """
+    Batched find_nearest_gateway: nearest gateway id and latency (ms) for
+    arrays of satellite subpoints
+    """
+    index = get_site_index(gateways)
+    if len(index) == 0:
+        count = len(np.atleast_1d(sat_lats))
+        return [""] * count, [float("inf")] * count
+    indices, ground_dist = index.nearest(sat_lats, sat_lons)
+    
+    # Same model as calculate_latency_to_gateway, evaluated for the whole batch
+    total_dist = np.sqrt(ground_dist[:, 0] ** 2 + sat_alt_km ** 2)
+    latency_ms = (total_dist / 299792.458) * 1000 + 2.0
+    return index.ids_for(indices[:, 0]), latency_ms.tolist()
@@ -0,0 +1,183 @@
+"""
+Vectorized Constellation Propagator
+Propagates the whole TLE set in one sgp4 SatrecArray call and converts the
+TEME positions to geodetic subpoints with NumPy
+"""
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from sgp4.api import SatrecArray, jday
+
+# WGS84 ellipsoid
+WGS84_A_KM = 6378.137
+WGS84_F = 1.0 / 298.257223563
+WGS84_E2 = WGS84_F * (2.0 - WGS84_F)
+
+# Geocentric altitude band for usable positions: below it the elements describe
+# a decayed or reentering object, far above it sgp4 is extrapolating stale TLEs
+MIN_ALTITUDE_KM = 180.0
+MAX_ALTITUDE_KM = 50000.0
+
+
+@dataclass
+class PropagationResult:
+    """Arrays for N satellites x M times"""
+    positions_km: np.ndarray  # (N, M, 3) TEME (Earth-centred inertial)
+    velocities_km_s: np.ndarray  # (N, M, 3) TEME
+    lat_deg: np.ndarray  # (N, M)
+    lon_deg: np.ndarray  # (N, M)
+    alt_km: np.ndarray  # (N, M)
+    ok: np.ndarray  # (N, M) bool, False where sgp4 reported an error or the position is implausible
+
+
+def plausible_positions(errors: np.ndarray, positions_km: np.ndarray) -> np.ndarray:
+    """(N, M) mask of sgp4 results without error, finite and inside the altitude band"""
+    with np.errstate(invalid="ignore", over="ignore"):
+        radius = np.linalg.norm(positions_km, axis=-1)
+        return (
+            (errors == 0)
+            & np.isfinite(positions_km).all(axis=-1)
+            & (radius >= WGS84_A_KM + MIN_ALTITUDE_KM)
+            & (radius <= WGS84_A_KM + MAX_ALTITUDE_KM)
+        )
+
+
+def julian_dates(times: Sequence[datetime]):
+    """Split datetimes into (jd, fr) arrays as expected by sgp4"""
+    jd = np.empty(len(times))
+    fr = np.empty(len(times))
+    for i, t in enumerate(times):
+        if t.tzinfo is not None:
+            t = t.astimezone(timezone.utc)
+        jd[i], fr[i] = jday(t.year, t.month, t.day, t.hour, t.minute, t.second + t.microsecond / 1e6)
+    return jd, fr
+
+
+def gmst_rad(jd: np.ndarray, fr: np.ndarray) -> np.ndarray:
+    """Greenwich mean sidereal time (IAU-82, same model sgp4 uses for TEME)"""
+    tut1 = ((jd - 2451545.0) + fr) / 36525.0
+    seconds = (
+        -6.2e-6 * tut1 ** 3
+        + 0.093104 * tut1 ** 2
+        + (876600.0 * 3600.0 + 8640184.812866) * tut1
+        + 67310.54841
+    )
+    return np.mod(np.radians(seconds / 240.0), 2.0 * math.pi)
+
+
+def teme_to_geodetic(positions_km: np.ndarray, jd: np.ndarray, fr: np.ndarray):
+    """
+    Convert TEME positions (..., M, 3) to WGS84 latitude, longitude and altitude.
+    Polar motion is ignored, which is well below the resolution we display.
+    """
+    theta = gmst_rad(jd, fr)
+    cos_t = np.cos(theta)
+    sin_t = np.sin(theta)
+
+    x = positions_km[..., 0]
+    y = positions_km[..., 1]
+    z = positions_km[..., 2]
+
+    # Rotate into the Earth-fixed frame
+    x_ecef = cos_t * x + sin_t * y
+    y_ecef = -sin_t * x + cos_t * y
+
+    lon = np.arctan2(y_ecef, x_ecef)
+    p = np.hypot(x_ecef, y_ecef)
+
+    # Fixed-point iteration on geodetic latitude; converges to sub-metre in 3 steps for LEO
+    lat = np.arctan2(z, p * (1.0 - WGS84_E2))
+    for _ in range(3):
+        sin_lat = np.sin(lat)
+        n = WGS84_A_KM / np.sqrt(1.0 - WGS84_E2 * sin_lat ** 2)
+        lat = np.arctan2(z + WGS84_E2 * n * sin_lat, p)
+
+    sin_lat = np.sin(lat)
+    cos_lat = np.cos(lat)
+    n = WGS84_A_KM / np.sqrt(1.0 - WGS84_E2 * sin_lat ** 2)
+    # Use the polar form near the poles where cos(lat) -> 0
+    alt = np.where(
+        np.abs(cos_lat) > 1e-6,
+        p / np.where(np.abs(cos_lat) > 1e-6, cos_lat, 1.0) - n,
+        np.abs(z) - n * (1.0 - WGS84_E2),
+    )
+    return np.degrees(lat), np.degrees(lon), alt
+
+
+class ConstellationPropagator:
+    """
+    Holds the constellation as a single SatrecArray.
+
+    Accepts Skyfield EarthSatellite objects (their `.model` is used) or raw
+    sgp4 Satrec records, in the order that defines satellite indices.
+    """
+
+    def __init__(self, satellites: Sequence):
+        self.satrecs = [getattr(sat, "model", sat) for sat in satellites]
+        self._array: Optional[SatrecArray] = SatrecArray(self.satrecs) if self.satrecs else None
+
+    def __len__(self) -> int:
+        return len(self.satrecs)
+
+    def propagate(self, times: Union[datetime, Sequence[datetime]]) -> PropagationResult:
+        """Propagate every satellite to every time in one NumPy call"""
+        if isinstance(times, datetime):
+            times = [times]
+        jd, fr = julian_dates(times)
+        m = len(jd)
+
+        if self._array is None:
+            empty = np.empty((0, m))
+            return PropagationResult(
+                positions_km=np.empty((0, m, 3)),
+                velocities_km_s=np.empty((0, m, 3)),
+                lat_deg=empty,
+                lon_deg=empty,
+                alt_km=empty,
+                ok=np.empty((0, m), dtype=bool),
+            )
+
+        errors, r, v = self._array.sgp4(jd, fr)
+        ok = plausible_positions(errors, r)
+        lat, lon, alt = teme_to_geodetic(r, jd, fr)
+        return PropagationResult(
+            positions_km=r,
+            velocities_km_s=v,
+            lat_deg=lat,
+            lon_deg=lon,
+            alt_km=alt,
+            ok=ok,
+        )
+
+    def propagate_jd(self, jd: np.ndarray, fr: np.ndarray, indices: Optional[np.ndarray] = None):
+        """Raw sgp4 (errors, r, v) at Julian dates, for all satellites or only `indices`"""
+        if indices is not None:
+            array = SatrecArray([self.satrecs[i] for i in np.asarray(indices).tolist()])
+        elif self._array is not None:
+            array = self._array
+        else:
+            return np.empty((0, len(jd)), dtype=np.uint8), np.empty((0, len(jd), 3)), np.empty((0, len(jd), 3))
+        return array.sgp4(np.asarray(jd, dtype=np.float64), np.asarray(fr, dtype=np.float64))
+
+
+# Propagators are cheap to build but not free; keep one per satellite list.
+# Entries hold the list itself: an id alone could be reused by a new TLE list
+# once the old one is freed, and would then serve stale orbits.
+_propagators: Dict[int, Tuple[List, ConstellationPropagator]] = {}
+_MAX_CACHED_PROPAGATORS = 4
+
+
+def get_propagator(satellites: List) -> ConstellationPropagator:
+    """Get a propagator for `satellites`, rebuilding only when the list changes"""
+    entry = _propagators.get(id(satellites))
+    if entry is not None and entry[0] is satellites and len(entry[1]) == len(satellites):
+        return entry[1]
+    _propagators.pop(id(satellites), None)
+    if len(_propagators) >= _MAX_CACHED_PROPAGATORS:
+        _propagators.pop(next(iter(_propagators)))
+    propagator = ConstellationPropagator(satellites)
+    _propagators[id(satellites)] = (satellites, propagator)
+    return propagator
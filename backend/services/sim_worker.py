@@ -0,0 +1,83 @@
+"""
+Simulation Worker
+Runs CPU-bound simulation steps off the event loop, either in a worker thread
+or in a separate process, so request latency does not depend on fleet size
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from typing import Callable, List, Optional
+
+from services.tle_catalog import TLECatalog
+
+# "inline" runs on the event loop (old behaviour), "thread" in a worker thread,
+# "process" in a child process (avoids the GIL, costs one pickle per tick)
+SIM_WORKER_MODES = ("inline", "thread", "process")
+DEFAULT_SIM_WORKER_MODE = "thread"
+
+
+def get_worker_mode() -> str:
+    """Worker mode from the SIM_WORKER_MODE environment variable"""
+    mode = os.getenv("SIM_WORKER_MODE", DEFAULT_SIM_WORKER_MODE).strip().lower()
+    if mode not in SIM_WORKER_MODES:
+        print(f"[SimWorker] Unknown SIM_WORKER_MODE '{mode}', using '{DEFAULT_SIM_WORKER_MODE}'")
+        mode = DEFAULT_SIM_WORKER_MODE
+    return mode
+
+
+class SimWorker:
+    """
+    Single-slot executor for simulation steps.
+
+    One worker per loop keeps steps strictly ordered; the caller awaits each
+    step before scheduling the next, so steps never overlap.
+    """
+
+    def __init__(self, mode: Optional[str] = None, name: str = "sim-worker"):
+        self.mode = mode or get_worker_mode()
+        self._executor: Optional[Executor] = None
+        if self.mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        elif self.mode == "process":
+            # Spawn rather than fork: the API process has a running event loop and threads
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    async def run(self, fn: Callable, *args):
+        """Run fn(*args) in the worker and await its result"""
+        if self._executor is None:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def catalog_for_transfer(catalog: TLECatalog) -> TLECatalog:
+    """Copy of the catalog without its Satrec records, which cannot be pickled"""
+    return replace(catalog, satrecs=[])
+
+
+# Catalog held inside a worker process, rebuilt only when the parent's catalog changes
+_worker_catalog_sha: Optional[str] = None
+_worker_satellites: List = []
+
+
+def sync_worker_catalog(source_sha256: str, catalog: Optional[TLECatalog]) -> Optional[List]:
+    """
+    Satellites for `source_sha256` inside a worker process.
+
+    Returns None when the worker does not hold that catalog yet and none was
+    sent; the parent then resends the step with the catalog attached.
+    """
+    global _worker_catalog_sha, _worker_satellites
+    if source_sha256 != _worker_catalog_sha:
+        if catalog is None:
+            return None
+        _worker_satellites = catalog.build_satrecs()
+        _worker_catalog_sha = source_sha256
+    return _worker_satellites
@@ -0,0 +1,89 @@
+"""
+Simulation Snapshots
+Double-buffered publication of simulation state: the tick builds the next
+state privately and publishes it with a single reference swap, so readers
+never wait on (or observe) a half-built tick
+"""
+import gzip
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Level 6 is within a few percent of level 9's size at a fraction of the cost
+GZIP_LEVEL = 6
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """A response body serialized once and served to every client as-is"""
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    media_type: str = "application/json"
+
+
+def encode_payload(body: bytes, media_type: str = "application/json") -> EncodedPayload:
+    """Pre-compress a body and derive its ETag from the content"""
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    return EncodedPayload(
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=GZIP_LEVEL),
+        etag=etag,
+        media_type=media_type,
+    )
+
+
+def payload_response(request: Request, payload: EncodedPayload) -> Response:
+    """
+    Serve pre-encoded bytes: 304 when the client already has this ETag,
+    otherwise the gzipped or raw body depending on Accept-Encoding.
+    """
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        tags |= {tag[2:] for tag in tags if tag.startswith("W/")}
+        if payload.etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        # GZipMiddleware leaves responses that already set Content-Encoding alone
+        headers["Content-Encoding"] = "gzip"
+        return Response(payload.gzip_body, media_type=payload.media_type, headers=headers)
+    return Response(payload.body, media_type=payload.media_type, headers=headers)
+
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    """One published tick; treat `state` as read-only once published"""
+    tick: int
+    state: Any
+    published_at: float
+    payloads: Dict[str, EncodedPayload] = field(default_factory=dict)  # /state bodies by format
+
+
+class SnapshotStore:
+    """
+    Holds the latest published snapshot.
+
+    There is a single writer (the simulation loop). Publishing replaces the
+    reference in one assignment, so readers either see the previous snapshot
+    or the new one and need no lock.
+    """
+
+    def __init__(self):
+        self._current: Optional[StateSnapshot] = None
+
+    def publish(self, tick: int, state: Any, payloads: Optional[Dict[str, EncodedPayload]] = None) -> StateSnapshot:
+        snapshot = StateSnapshot(tick=tick, state=state, published_at=time.time(), payloads=payloads or {})
+        self._current = snapshot
+        return snapshot
+
+    def current(self) -> Optional[StateSnapshot]:
+        """Latest snapshot, or None before the first tick"""
+        return self._current
@@ -1,152 +1,248 @@
 """
 Starlink TLE Service
-Handles fetching, caching, and serving Starlink TLE data
+Single owner of the Starlink TLE catalog: fetching, parsing, caching and ID mapping.
+Every module reads satellites and TLE lines from the shared instance.
 """
 import asyncio
-import json
 import time
 from pathlib import Path
 from typing import List, Dict, Optional
+
 import httpx
-from skyfield.api import load, EarthSatellite
+from sgp4.api import Satrec
+
+from services.tle_catalog import (
+    TLECatalog,
+    catalog_path_for,
+    load_catalog,
+    parse_tle_text,
+    save_catalog,
+)
+
+# CelesTrak rate limits to once every 2 hours, which is also how often its GP data updates
+CACHE_MAX_AGE_S = 2 * 60 * 60
+
+CELESTRAK_URLS = [
+    "https://celestrak.org/NORAD/elements/gp.php?GROUP=starlink&FORMAT=tle",
+    "https://celestrak.org/NORAD/elements/starlink.txt",
+]
+
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/plain",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://celestrak.org/",
+}
+
+
+def is_blocked_response(text: str, status_code: Optional[int] = None) -> bool:
+    """
+    CelesTrak answers rate-limited requests with 403 / 429 or an HTML page.
+    Only the status and the start of the body are checked: TLE lines
+    routinely contain "403". Payloads that pass are validated by parsing.
+    """
+    if status_code in (403, 429):
+        return True
+    head = text.lstrip()[:16].lower()
+    return head.startswith("<!doctype") or head.startswith("<html")
+
+
+def sat_id_for_index(index: int) -> str:
+    """Public satellite id for a catalog index"""
+    return f"sat_{index}"
 
-ts = load.timescale()
 
 class StarlinkService:
     """Service for managing Starlink TLE data with caching"""
-    
+
     def __init__(self, cache_dir: Path = Path(".")):
         self.cache_dir = cache_dir
         self.cache_file = cache_dir / "tle_cache.txt"
         self.cache_time_file = cache_dir / "tle_cache_time.txt"
-        self.cache_max_age = 2 * 60 * 60  # 2 hours
-        self.satellites: List[EarthSatellite] = []
-        self.tle_data: List[Dict[str, str]] = []
+        self.cache_max_age = CACHE_MAX_AGE_S
+        self.catalog: Optional[TLECatalog] = None
+        self.satellites: List[Satrec] = []
+        self._tle_data: Optional[List[Dict[str, str]]] = None
+        self._norad_index: Dict[int, int] = {}
+        self._last_fetch_attempt = 0.0
         self._lock = asyncio.Lock()
-    
-    async def fetch_and_cache_tles(self) -> List[EarthSatellite]:
+
+    def cache_age(self) -> Optional[float]:
+        """Seconds since the text cache was written, or None if there is no cache"""
+        if not (self.cache_file.exists() and self.cache_time_file.exists()):
+            return None
+        try:
+            return time.time() - float(self.cache_time_file.read_text().strip())
+        except Exception as e:
+            print(f"[StarlinkService] Error reading cache time: {e}")
+            return None
+
+    def is_stale(self) -> bool:
+        age = self.cache_age()
+        return age is None or age >= self.cache_max_age
+
+    async def load(self) -> List[Satrec]:
+        """
+        Load satellites for startup: serve any existing cache immediately
+        (even if expired) and only go to the network when there is none.
+        Use refresh_if_stale() to update an expired cache in the background.
+        """
+        if self.cache_file.exists():
+            async with self._lock:
+                sats = self._load_from_cache()
+            if sats:
+                return sats
+        return await self.fetch_and_cache_tles()
+
+    async def refresh_if_stale(self) -> bool:
+        """Fetch fresh TLEs if the cache has expired; returns True if the catalog changed"""
+        if not self.is_stale():
+            return False
+        # Don't retry faster than CelesTrak's rate limit after a failed attempt
+        if time.time() - self._last_fetch_attempt < self.cache_max_age:
+            return False
+        previous_sha = self.catalog.source_sha256 if self.catalog is not None else None
+        await self.fetch_and_cache_tles()
+        current_sha = self.catalog.source_sha256 if self.catalog is not None else None
+        return current_sha != previous_sha
+
+    async def fetch_and_cache_tles(self) -> List[Satrec]:
         """Fetch TLEs from CelesTrak with caching"""
         async with self._lock:
             # Check cache first
-            if self.cache_file.exists() and self.cache_time_file.exists():
-                try:
-                    cache_time = float(self.cache_time_file.read_text().strip())
-                    age = time.time() - cache_time
-                    if age < self.cache_max_age:
-                        print(f"[StarlinkService] Using cached TLEs (age: {age/3600:.1f} hours)")
-                        return self._load_from_cache()
-                except Exception as e:
-                    print(f"[StarlinkService] Error reading cache: {e}")
-            
+            age = self.cache_age()
+            if age is not None and age < self.cache_max_age:
+                print(f"[StarlinkService] Using cached TLEs (age: {age/3600:.1f} hours)")
+                sats = self._load_from_cache()
+                if sats:
+                    return sats
+
             # Fetch from CelesTrak
-            urls = [
-                "https://celestrak.org/NORAD/elements/gp.php?GROUP=starlink&FORMAT=tle",
-                "https://celestrak.org/NORAD/elements/starlink.txt",
-            ]
-            
+            self._last_fetch_attempt = time.time()
             async with httpx.AsyncClient() as client:
-                for url in urls:
+                for url in CELESTRAK_URLS:
                     try:
                         print(f"[StarlinkService] Fetching from: {url}")
-                        headers = {
-                            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-                            "Accept": "text/plain",
-                            "Referer": "https://celestrak.org/",
-                        }
-                        response = await client.get(url, timeout=30.0, headers=headers, follow_redirects=True)
-                        
-                        if response.status_code == 200 and not response.text.strip().startswith("<!DOCTYPE"):
-                            sats = self._parse_tles(response.text)
-                            if len(sats) > 0:
+                        response = await client.get(url, timeout=30.0, headers=REQUEST_HEADERS, follow_redirects=True)
+
+                        if response.status_code == 200 and not is_blocked_response(response.text, response.status_code):
+                            catalog = parse_tle_text(response.text)
+                            if len(catalog) > 0:
+                                self._set_catalog(catalog)
                                 self._save_to_cache(response.text)
-                                self.satellites = sats
-                                print(f"[StarlinkService] Loaded {len(sats)} satellites from {url}")
-                                return sats
+                                print(f"[StarlinkService] Loaded {len(catalog)} satellites from {url}")
+                                return self.satellites
                     except Exception as e:
                         print(f"[StarlinkService] Error fetching from {url}: {e}")
                         continue
-            
+
+            # Keep serving whatever we already had
+            if self.satellites:
+                return self.satellites
+
             # Fallback to cache even if expired
             if self.cache_file.exists():
                 print("[StarlinkService] Using expired cache as fallback")
-                return self._load_from_cache()
-            
+                sats = self._load_from_cache()
+                if sats:
+                    return sats
+
             # Last resort: create dummy satellites
             print("[StarlinkService] Creating dummy satellites")
-            return self._create_dummy_satellites()
-    
-    def _parse_tles(self, text: str) -> List[EarthSatellite]:
-        """Parse TLE text into EarthSatellite objects"""
-        lines = text.strip().split("\n")
-        sats = []
-        tle_data = []
-        
-        for i in range(0, len(lines) - 1, 3):
-            if i + 2 < len(lines):
-                name = lines[i].strip()
-                line1 = lines[i + 1].strip()
-                line2 = lines[i + 2].strip()
-                if line1.startswith("1 ") and line2.startswith("2 "):
-                    try:
-                        sat = EarthSatellite(line1, line2, name, ts)
-                        sats.append(sat)
-                        tle_data.append({
-                            "id": f"sat_{len(sats)}",
-                            "name": name,
-                            "tleLine1": line1,
-                            "tleLine2": line2,
-                        })
-                    except Exception as e:
-                        print(f"[StarlinkService] Error parsing satellite {name}: {e}")
-                        continue
-        
-        self.tle_data = tle_data
-        return sats
-    
-    def _load_from_cache(self) -> List[EarthSatellite]:
-        """Load satellites from cache file"""
+            return self.use_dummy_satellites()
+
+    def _set_catalog(self, catalog: TLECatalog):
+        """Swap in a new catalog; indices, ids and TLE lines all derive from it"""
+        if not catalog.satrecs:
+            catalog.build_satrecs()
+        self.catalog = catalog
+        self.satellites = catalog.satrecs
+        self._norad_index = {int(norad): i for i, norad in enumerate(catalog.norad_ids.tolist())}
+        self._tle_data = None
+
+    def _load_from_cache(self) -> List[Satrec]:
+        """Load satellites from the binary catalog (regenerated from the text cache if stale)"""
         try:
-            text = self.cache_file.read_text()
-            sats = self._parse_tles(text)
-            self.satellites = sats
-            return sats
+            self._set_catalog(load_catalog(self.cache_file))
+            return self.satellites
         except Exception as e:
             print(f"[StarlinkService] Error loading from cache: {e}")
             return []
-    
+
     def _save_to_cache(self, text: str):
-        """Save TLE text to cache"""
+        """Save TLE text to cache, along with its binary catalog"""
         try:
             self.cache_file.write_text(text)
             self.cache_time_file.write_text(str(time.time()))
+            if self.catalog is not None:
+                save_catalog(self.catalog, catalog_path_for(self.cache_file))
         except Exception as e:
             print(f"[StarlinkService] Error saving cache: {e}")
-    
-    def _create_dummy_satellites(self) -> List[EarthSatellite]:
-        """Create dummy satellites for testing"""
-        sats = []
-        for i in range(100):
-            try:
-                name = f"STARLINK-{i+1000}"
-                norad_id = 50000 + i
-                epoch_day = 325.0
-                mean_motion = 15.0
-                inclination = 53.0
-                raan = i * 3.6
-                
-                line1 = f"1 {norad_id:05d}U 23001A   {epoch_day:012.8f}  .00000000  00000+0  00000+0 0  9999"
-                line2 = f"2 {norad_id:05d} {inclination:8.4f} {raan:08.4f} 0000000   0.0000 270.0000 {mean_motion:11.8f}"
-                sat = EarthSatellite(line1, line2, name, ts)
-                sats.append(sat)
-            except Exception:
-                continue
-        return sats
-    
+
+    def use_dummy_satellites(self, count: int = 100) -> List[Satrec]:
+        """Replace the catalog with Starlink-like placeholder orbits for testing"""
+        lines = []
+        for i in range(count):
+            name = f"STARLINK-{i+1000}"
+            norad_id = 50000 + i
+            epoch_day = 325.0
+            mean_motion = 15.0
+            inclination = 53.0
+            raan = (i * 3.6) % 360.0
+
+            lines.append(name)
+            lines.append(f"1 {norad_id:05d}U 23001A   {epoch_day:012.8f}  .00000000  00000+0  00000+0 0  9999")
+            lines.append(f"2 {norad_id:05d} {inclination:8.4f} {raan:08.4f} 0000000   0.0000 270.0000 {mean_motion:11.8f}")
+        self._set_catalog(parse_tle_text("\n".join(lines)))
+        return self.satellites
+
+    def index_for_sat_id(self, sat_id: str) -> Optional[int]:
+        """Catalog index for a public satellite id ("sat_<index>")"""
+        prefix, _, suffix = sat_id.rpartition("_")
+        if prefix != "sat" or not suffix.isdigit():
+            return None
+        index = int(suffix)
+        return index if index < len(self.satellites) else None
+
+    def index_for_norad(self, norad_id: int) -> Optional[int]:
+        """Catalog index for a NORAD catalog number"""
+        return self._norad_index.get(int(norad_id))
+
+    def get_tle(self, index: Optional[int]) -> Dict[str, str]:
+        """TLE lines for a catalog index (empty lines if unknown)"""
+        if self.catalog is None or index is None or not (0 <= index < len(self.catalog)):
+            return {"tleLine1": "", "tleLine2": ""}
+        return {
+            "id": sat_id_for_index(index),
+            "name": str(self.catalog.names[index]),
+            "noradId": int(self.catalog.norad_ids[index]),
+            "tleLine1": str(self.catalog.line1[index]),
+            "tleLine2": str(self.catalog.line2[index]),
+        }
+
     def get_tle_list(self) -> List[Dict[str, str]]:
-        """Get TLE data as list of dicts"""
-        return self.tle_data
-    
-    def get_satellites(self) -> List[EarthSatellite]:
+        """Get TLE data as list of dicts (built once per catalog)"""
+        if self._tle_data is None:
+            if self.catalog is None:
+                return []
+            self._tle_data = [
+                {
+                    "id": sat_id_for_index(i),
+                    "name": name,
+                    "noradId": norad,
+                    "tleLine1": line1,
+                    "tleLine2": line2,
+                }
+                for i, (name, norad, line1, line2) in enumerate(zip(
+                    self.catalog.names.tolist(),
+                    self.catalog.norad_ids.tolist(),
+                    self.catalog.line1.tolist(),
+                    self.catalog.line2.tolist(),
+                ))
+            ]
+        return self._tle_data
+
+    def get_satellites(self) -> List[Satrec]:
         """Get current satellite list"""
         return self.satellites
 
@@ -159,4 +255,3 @@ def get_starlink_service() -> StarlinkService:
     if _starlink_service is None:
         _starlink_service = StarlinkService()
     return _starlink_service
-
@@ -0,0 +1,154 @@
+"""
+Columnar State Codec
+Compact binary encoding for satellite state responses: one typed array per
+field instead of one JSON object per satellite.
+
+Layout (little-endian):
+    b"OCS1"                 magic
+    uint32                  header length in bytes
+    header                  UTF-8 JSON, space-padded so the data starts 8-byte aligned
+    data                    columns, each starting at an 8-byte aligned offset
+
+The header describes every column ({"name", "dtype", "offset", "length"},
+offsets relative to the start of the data), the row count, string
+dictionaries for dictionary-encoded columns, and the non-tabular part of the
+response under "meta". Column dtypes are float32, uint8, uint16, uint32 and
+"bits" (flags packed 8 per byte, least significant bit first), so clients can
+wrap each column in a typed array without copying.
+"""
+import json
+import struct
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"OCS1"
+CODEC_VERSION = 1
+COLUMNAR_MEDIA_TYPE = "application/vnd.orbital.columnar"
+_ALIGN = 8
+
+
+def pack_bits(flags) -> np.ndarray:
+    """Pack booleans 8 per byte, least significant bit first"""
+    return np.packbits(np.asarray(flags, dtype=bool), bitorder="little")
+
+
+def unpack_bits(packed: np.ndarray, count: int) -> np.ndarray:
+    return np.unpackbits(packed, count=count, bitorder="little").astype(bool)
+
+
+def dictionary_encode(values: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+    """Replace strings with indices into a table of the distinct values"""
+    table: Dict[str, int] = {}
+    indices = [table.setdefault(value, len(table)) for value in values]
+    dtype = np.uint16 if len(table) <= np.iinfo(np.uint16).max + 1 else np.uint32
+    return np.asarray(indices, dtype=dtype), list(table)
+
+
+def prefixed_index_column(ids: Sequence[str], prefix: str) -> np.ndarray:
+    """Encode ids of the form "<prefix><n>" (e.g. "sat_42") as their integer n"""
+    start = len(prefix)
+    return np.fromiter((int(sat_id[start:]) for sat_id in ids), dtype=np.uint32, count=len(ids))
+
+
+def _padding(length: int) -> int:
+    return (-length) % _ALIGN
+
+
+def encode_columns(
+    count: int,
+    columns: Iterable[Tuple[str, str, np.ndarray]],
+    dictionaries: Optional[Dict[str, List[str]]] = None,
+    meta: Optional[Dict] = None,
+) -> bytes:
+    """
+    Encode columns into a single buffer.
+
+    Args:
+        count: number of rows
+        columns: (name, dtype, array) triples; dtype is a NumPy dtype name or "bits"
+        dictionaries: string tables for dictionary-encoded columns, keyed by column name
+        meta: JSON-serializable non-tabular data
+    """
+    descriptors = []
+    chunks = []
+    offset = 0
+    for name, dtype, values in columns:
+        if dtype == "bits":
+            data = np.ascontiguousarray(values, dtype=np.uint8).tobytes()
+        else:
+            data = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<")).tobytes()
+        descriptors.append({"name": name, "dtype": dtype, "offset": offset, "length": len(data)})
+        chunks.append(data)
+        chunks.append(b"\0" * _padding(len(data)))
+        offset += len(data) + _padding(len(data))
+
+    header = json.dumps(
+        {
+            "version": CODEC_VERSION,
+            "count": int(count),
+            "columns": descriptors,
+            "dictionaries": dictionaries or {},
+            "meta": meta or {},
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    header += b" " * _padding(len(MAGIC) + 4 + len(header))
+
+    return b"".join([MAGIC, struct.pack("<I", len(header)), header] + chunks)
+
+
+def decode_columns(buffer: bytes) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Inverse of encode_columns; returns (header, columns). Bit columns are unpacked to bool"""
+    if buffer[:4] != MAGIC:
+        raise ValueError("Not a columnar state buffer")
+    (header_len,) = struct.unpack_from("<I", buffer, 4)
+    data_start = 8 + header_len
+    header = json.loads(buffer[8:data_start].decode("utf-8"))
+    columns = {}
+    for column in header["columns"]:
+        start = data_start + column["offset"]
+        raw = np.frombuffer(buffer, dtype=np.uint8, count=column["length"], offset=start)
+        if column["dtype"] == "bits":
+            columns[column["name"]] = unpack_bits(raw, header["count"])
+        else:
+            columns[column["name"]] = raw.view(np.dtype(column["dtype"]).newbyteorder("<"))
+    return header, columns
+
+
+def encode_satellites(satellites: Sequence, meta: Optional[Dict] = None, id_prefix: str = "sat_") -> bytes:
+    """
+    Encode /state satellites (objects with id, lat, lon, alt_km, sunlit,
+    utilization, capacityMw, nearestGatewayId and latencyMs attributes).
+    """
+    count = len(satellites)
+    gateway_indices, gateways = dictionary_encode([sat.nearestGatewayId for sat in satellites])
+    floats = np.array(
+        [(sat.lat, sat.lon, sat.alt_km, sat.utilization, sat.capacityMw, sat.latencyMs) for sat in satellites],
+        dtype=np.float32,
+    ).reshape(count, 6)
+    meta = dict(meta or {})
+    meta["idPrefix"] = id_prefix
+    return encode_columns(
+        count,
+        [
+            ("id", "uint32", prefixed_index_column([sat.id for sat in satellites], id_prefix)),
+            ("lat", "float32", floats[:, 0]),
+            ("lon", "float32", floats[:, 1]),
+            ("alt_km", "float32", floats[:, 2]),
+            ("utilization", "float32", floats[:, 3]),
+            ("capacityMw", "float32", floats[:, 4]),
+            ("latencyMs", "float32", floats[:, 5]),
+            ("nearestGatewayId", gateway_indices.dtype.name, gateway_indices),
+            ("sunlit", "bits", pack_bits([sat.sunlit for sat in satellites])),
+        ],
+        dictionaries={"nearestGatewayId": gateways},
+        meta=meta,
+    )
+
+
+def wants_columnar(accept: str, format: Optional[str] = None) -> bool:
+    """Columnar is opt-in: ?format=columnar or the columnar media type in Accept"""
+    if format is not None:
+        return format.lower() == "columnar"
+    return COLUMNAR_MEDIA_TYPE in (accept or "")
@@ -0,0 +1,237 @@
+"""
+State Stream
+Keyframe + delta encoding of simulation state for Server-Sent Events, and a
+broadcaster that fans each tick's frame out to every connected client.
+
+Protocol (event name / data):
+    keyframe  {"tick", "positions", "state"}: full /state JSON plus the
+              quantized positions that following deltas are relative to
+    delta     {"tick", "baseTick", "positions", "sunlit", "utilization",
+              "capacityMw", "latencyMs", "gateway", "summary"}
+
+Rows are satellites in keyframe order. Positions are quantized (lat/lon in
+POSITION_QUANTUM_DEG, altitude in ALTITUDE_QUANTUM_KM); deltas carry
+little-endian int16 changes of the quantized values, base64 encoded, with
+longitude changes wrapped to the shortest direction. Scalar fields are sent
+as [row, value] pairs only when they moved by more than their threshold
+from the last value sent on the shared stream. A client that has applied
+every delta since the encoder last resynced stays within that threshold of
+the server; one that joined from a later keyframe (exact values at that
+tick) can be off by up to twice the threshold until a row is next sent. A
+keyframe is sent instead of a delta whenever the satellite set changes.
+"""
+import asyncio
+import base64
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+import numpy as np
+
+from services.state_codec import prefixed_index_column
+
+POSITION_QUANTUM_DEG = 1e-3  # ~110 m
+ALTITUDE_QUANTUM_KM = 0.01
+UTILIZATION_THRESHOLD = 0.05
+CAPACITY_THRESHOLD_MW = 1e-5
+LATENCY_THRESHOLD_MS = 0.5
+
+_LON_RANGE_Q = int(round(360.0 / POSITION_QUANTUM_DEG))
+_INT16_MAX = np.iinfo(np.int16).max
+
+# Queued frames per client before it is considered too slow and resynced
+SUBSCRIBER_QUEUE_SIZE = 8
+KEEPALIVE_S = 15.0
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Keeps GZipMiddleware (and nginx) from buffering the stream
+    "Content-Encoding": "identity",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: bytes, event_id: Optional[int] = None) -> bytes:
+    """Format one Server-Sent Event (data must not contain newlines)"""
+    head = f"event: {event}\n" + (f"id: {event_id}\n" if event_id is not None else "")
+    return head.encode("utf-8") + b"data: " + data + b"\n\n"
+
+
+def _b64(values: np.ndarray, dtype: str) -> str:
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode("ascii")
+
+
+def quantize_positions(lat, lon, alt_km) -> np.ndarray:
+    """(N, 3) int64 quantized lat, lon (wrapped to [-180, 180)) and altitude"""
+    q_lon = np.rint(np.asarray(lon) / POSITION_QUANTUM_DEG).astype(np.int64)
+    q_lon = (q_lon + _LON_RANGE_Q // 2) % _LON_RANGE_Q - _LON_RANGE_Q // 2
+    return np.stack(
+        [
+            np.rint(np.asarray(lat) / POSITION_QUANTUM_DEG).astype(np.int64),
+            q_lon,
+            np.rint(np.asarray(alt_km) / ALTITUDE_QUANTUM_KM).astype(np.int64),
+        ],
+        axis=1,
+    )
+
+
+def _changes(rows: np.ndarray, values: np.ndarray, decimals: int) -> List[list]:
+    return [[row, value] for row, value in zip(rows.tolist(), np.round(values, decimals).tolist())]
+
+
+@dataclass(frozen=True)
+class StreamFrame:
+    """Encoded messages for one tick"""
+    tick: int
+    keyframe: bytes
+    delta: Optional[bytes]  # None when clients must resync from the keyframe
+    base_tick: Optional[int]
+
+
+class StateDeltaEncoder:
+    """
+    Turns consecutive SimStates into stream frames.
+
+    Not thread-safe; frames must be encoded in tick order by a single caller.
+    """
+
+    def __init__(self):
+        self._tick: Optional[int] = None
+        self._ids: Optional[np.ndarray] = None
+        self._positions: Optional[np.ndarray] = None
+        self._sunlit: Optional[np.ndarray] = None
+        self._gateways: List[str] = []
+        # Last values sent to clients, per thresholded field
+        self._sent: Dict[str, np.ndarray] = {}
+
+    def encode(self, tick: int, state, state_json: bytes) -> StreamFrame:
+        sats = state.satellites
+        count = len(sats)
+        ids = prefixed_index_column([sat.id for sat in sats], "sat_")
+        floats = np.array(
+            [(sat.lat, sat.lon, sat.alt_km, sat.utilization, sat.capacityMw, sat.latencyMs) for sat in sats],
+            dtype=np.float64,
+        ).reshape(count, 6)
+        positions = quantize_positions(floats[:, 0], floats[:, 1], floats[:, 2])
+        sunlit = np.array([sat.sunlit for sat in sats], dtype=bool)
+        gateways = [sat.nearestGatewayId for sat in sats]
+        scalars = {"utilization": floats[:, 3], "capacityMw": floats[:, 4], "latencyMs": floats[:, 5]}
+
+        keyframe = sse_event("keyframe", b"".join([
+            b'{"tick":', str(tick).encode("ascii"),
+            b',"positions":', json.dumps(self._positions_block(positions)).encode("utf-8"),
+            b',"state":', state_json, b"}",
+        ]), tick)
+
+        delta = None
+        if self._tick is not None and np.array_equal(ids, self._ids):
+            delta = self._encode_delta(tick, state, positions, sunlit, gateways, scalars)
+
+        if delta is None:
+            # Clients resync to exact values
+            self._sent = {name: values.copy() for name, values in scalars.items()}
+
+        base_tick = self._tick if delta is not None else None
+        self._tick = tick
+        self._ids = ids
+        self._positions = positions
+        self._sunlit = sunlit
+        self._gateways = gateways
+        return StreamFrame(tick=tick, keyframe=keyframe, delta=delta, base_tick=base_tick)
+
+    @staticmethod
+    def _positions_block(positions: np.ndarray) -> Dict:
+        return {
+            "quantumDeg": POSITION_QUANTUM_DEG,
+            "altQuantumKm": ALTITUDE_QUANTUM_KM,
+            "lat": _b64(positions[:, 0], "<i4"),
+            "lon": _b64(positions[:, 1], "<i4"),
+            "alt": _b64(positions[:, 2], "<i4"),
+        }
+
+    def _encode_delta(self, tick, state, positions, sunlit, gateways, scalars) -> Optional[bytes]:
+        change = positions - self._positions
+        change[:, 1] = (change[:, 1] + _LON_RANGE_Q // 2) % _LON_RANGE_Q - _LON_RANGE_Q // 2
+        if change.size and np.abs(change).max() > _INT16_MAX:
+            return None  # Jumped too far for int16 deltas; send a keyframe instead
+
+        flipped = np.flatnonzero(sunlit != self._sunlit)
+        message = {
+            "tick": tick,
+            "baseTick": self._tick,
+            "positions": {
+                "lat": _b64(change[:, 0], "<i2"),
+                "lon": _b64(change[:, 1], "<i2"),
+                "alt": _b64(change[:, 2], "<i2"),
+            },
+            "sunlit": [[row, flag] for row, flag in zip(flipped.tolist(), sunlit[flipped].tolist())],
+            "gateway": [
+                [row, gateway]
+                for row, (gateway, previous) in enumerate(zip(gateways, self._gateways))
+                if gateway != previous
+            ],
+            "summary": state.model_dump(exclude={"satellites"}),
+        }
+        thresholds = {
+            "utilization": (UTILIZATION_THRESHOLD, 4),
+            "capacityMw": (CAPACITY_THRESHOLD_MW, 6),
+            "latencyMs": (LATENCY_THRESHOLD_MS, 2),
+        }
+        for name, (threshold, decimals) in thresholds.items():
+            values = scalars[name]
+            sent = self._sent[name]
+            rows = np.flatnonzero(np.abs(values - sent) > threshold)
+            sent[rows] = values[rows]
+            message[name] = _changes(rows, values[rows], decimals)
+
+        return sse_event("delta", json.dumps(message, separators=(",", ":")).encode("utf-8"), tick)
+
+
+class StateBroadcaster:
+    """
+    Fan-out of stream frames to SSE subscribers.
+
+    New subscribers start from the latest keyframe; every later tick is one
+    delta per subscriber. A subscriber that falls behind is resynced with a
+    keyframe rather than buffering without bound.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._latest: Optional[StreamFrame] = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, frame: StreamFrame):
+        """Send a frame to every subscriber (call from the event loop)"""
+        in_sequence = (
+            frame.delta is not None
+            and self._latest is not None
+            and frame.base_tick == self._latest.tick
+        )
+        message = frame.delta if in_sequence else frame.keyframe
+        self._latest = frame
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(frame.keyframe)
+
+    async def subscribe(self) -> AsyncIterator[bytes]:
+        """Yield SSE messages for one client until it disconnects"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            if self._latest is not None:
+                yield self._latest.keyframe
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            self._subscribers.discard(queue)
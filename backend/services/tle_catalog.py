@@ -0,0 +1,186 @@
+"""
+Binary TLE Catalog
+Parses TLE text once into columnar SGP4 elements and keeps a versioned .npz
+copy next to the text cache so later boots skip text parsing entirely
+"""
+import hashlib
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from sgp4.api import Satrec, WGS72
+
+# Bump when the on-disk layout changes; older files are regenerated
+CATALOG_VERSION = 1
+
+# SGP4 epoch origin used by sgp4init (1949 December 31 00:00 UT)
+SGP4_EPOCH_JD = 2433281.5
+
+# Mean elements needed to rebuild a Satrec with sgp4init
+ELEMENT_FIELDS = ["bstar", "ndot", "nddot", "ecco", "argpo", "inclo", "mo", "no_kozai", "nodeo"]
+
+
+@dataclass
+class TLECatalog:
+    """Columnar TLE set; index i is the satellite's position in the catalog"""
+    names: np.ndarray  # (N,) str
+    norad_ids: np.ndarray  # (N,) int64
+    epoch_jd: np.ndarray  # (N,) whole Julian date of epoch
+    epoch_fr: np.ndarray  # (N,) fractional day of epoch
+    elements: np.ndarray  # (N, len(ELEMENT_FIELDS)) float64
+    line1: np.ndarray  # (N,) str
+    line2: np.ndarray  # (N,) str
+    source_sha256: str = ""
+    satrecs: List[Satrec] = field(default_factory=list, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.norad_ids)
+
+    def to_text(self) -> str:
+        """Render back to 3-line TLE text"""
+        return "\n".join(
+            f"{name}\n{line1}\n{line2}"
+            for name, line1, line2 in zip(self.names.tolist(), self.line1.tolist(), self.line2.tolist())
+        )
+
+    def build_satrecs(self) -> List[Satrec]:
+        """Rebuild sgp4 records from the stored elements (no text parsing)"""
+        satrecs = []
+        epochs = (self.epoch_jd - SGP4_EPOCH_JD) + self.epoch_fr
+        for i in range(len(self)):
+            sat = Satrec()
+            el = self.elements[i]
+            sat.sgp4init(
+                WGS72, "i", int(self.norad_ids[i]), float(epochs[i]),
+                el[0], el[1], el[2], el[3], el[4], el[5], el[6], el[7], el[8],
+            )
+            satrecs.append(sat)
+        self.satrecs = satrecs
+        return satrecs
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def parse_tle_text(text: str) -> TLECatalog:
+    """Parse 3-line TLE text (name, line 1, line 2) into a catalog"""
+    lines = text.strip().split("\n")
+    names, line1s, line2s, satrecs = [], [], [], []
+
+    for i in range(0, len(lines) - 1, 3):
+        if i + 2 < len(lines):
+            name = lines[i].strip()
+            line1 = lines[i + 1].strip()
+            line2 = lines[i + 2].strip()
+            if line1.startswith("1 ") and line2.startswith("2 "):
+                try:
+                    sat = Satrec.twoline2rv(line1, line2)
+                except Exception as e:
+                    print(f"[TLECatalog] Error parsing satellite {name}: {e}")
+                    continue
+                names.append(name)
+                line1s.append(line1)
+                line2s.append(line2)
+                satrecs.append(sat)
+
+    catalog = TLECatalog(
+        names=np.array(names, dtype=str),
+        norad_ids=np.array([sat.satnum for sat in satrecs], dtype=np.int64),
+        epoch_jd=np.array([sat.jdsatepoch for sat in satrecs], dtype=np.float64),
+        epoch_fr=np.array([sat.jdsatepochF for sat in satrecs], dtype=np.float64),
+        elements=np.array(
+            [[getattr(sat, f) for f in ELEMENT_FIELDS] for sat in satrecs], dtype=np.float64
+        ).reshape(len(satrecs), len(ELEMENT_FIELDS)),
+        line1=np.array(line1s, dtype=str),
+        line2=np.array(line2s, dtype=str),
+        source_sha256=text_sha256(text),
+        satrecs=satrecs,
+    )
+    return catalog
+
+
+def save_catalog(catalog: TLECatalog, path: Path):
+    """Write the catalog as an uncompressed .npz (atomic replace)"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            version=np.array(CATALOG_VERSION),
+            source_sha256=np.array(catalog.source_sha256),
+            # Text columns are stored as ASCII bytes (TLEs are ASCII) to keep the file small
+            names=np.char.encode(catalog.names, "ascii", "replace"),
+            norad_ids=catalog.norad_ids,
+            epoch_jd=catalog.epoch_jd,
+            epoch_fr=catalog.epoch_fr,
+            elements=catalog.elements,
+            line1=catalog.line1.astype(bytes),
+            line2=catalog.line2.astype(bytes),
+        )
+    os.replace(tmp_path, path)
+
+
+def read_catalog(path: Path, expected_sha256: Optional[str] = None) -> Optional[TLECatalog]:
+    """Read a binary catalog; returns None if missing, stale or another version"""
+    if not path.exists():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != CATALOG_VERSION:
+                return None
+            source_sha256 = str(data["source_sha256"])
+            if expected_sha256 is not None and source_sha256 != expected_sha256:
+                return None
+            catalog = TLECatalog(
+                names=data["names"].astype(str),
+                norad_ids=data["norad_ids"],
+                epoch_jd=data["epoch_jd"],
+                epoch_fr=data["epoch_fr"],
+                elements=data["elements"],
+                line1=data["line1"].astype(str),
+                line2=data["line2"].astype(str),
+                source_sha256=source_sha256,
+            )
+    except Exception as e:
+        print(f"[TLECatalog] Could not read {path}: {e}")
+        return None
+    catalog.build_satrecs()
+    return catalog
+
+
+def catalog_path_for(text_path: Path) -> Path:
+    """Binary catalog lives next to the text cache: tle_cache.txt -> tle_cache.npz"""
+    return text_path.with_suffix(".npz")
+
+
+def write_catalog_cache(catalog: TLECatalog, text_path: Path):
+    """Write the text cache and its matching binary catalog"""
+    text = catalog.to_text()
+    text_path.write_text(text)
+    catalog.source_sha256 = text_sha256(text)
+    save_catalog(catalog, catalog_path_for(text_path))
+
+
+def load_catalog(text_path: Path, text: Optional[str] = None) -> TLECatalog:
+    """
+    Load the catalog for a TLE text file, using the binary copy when it was
+    built from identical text and regenerating it otherwise.
+    """
+    if text is None:
+        text = text_path.read_text()
+    sha = text_sha256(text)
+    cache_path = catalog_path_for(text_path)
+
+    catalog = read_catalog(cache_path, expected_sha256=sha)
+    if catalog is not None:
+        return catalog
+
+    catalog = parse_tle_text(text)
+    if len(catalog) > 0:
+        try:
+            save_catalog(catalog, cache_path)
+        except Exception as e:
+            print(f"[TLECatalog] Warning: Could not write {cache_path}: {e}")
+    return catalog
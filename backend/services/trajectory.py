@@ -0,0 +1,234 @@
+"""
+Trajectory Cache
+Propagates the constellation at coarse knots (TRAJECTORY_KNOT_S apart) in one
+sgp4 batch per block of knots, then serves positions at any tick time by
+cubic Hermite interpolation of the knot positions and velocities.
+
+For LEO the interpolation error scales as knot^4: about 0.3 m at 60 s knots.
+Each block is checked against direct sgp4 for the whole fleet at the
+quarter points of every interval. Smooth-orbit Hermite error peaks at the
+midpoint (16/9 of its quarter-point value), but velocities that disagree
+with the positions give an error that vanishes there and peaks near the
+quarter points, so the quarter-point error scaled by 16/9 bounds both. If
+the ERROR_PERCENTILE bound exceeds the budget the knot spacing is halved
+and the block rebuilt.
+Satellites whose sgp4 output leaves the plausible altitude band anywhere in
+a block, or whose velocities are inconsistent with their positions (the odd
+part of the quarter-point error, which shrinks only linearly with the knot
+spacing; typical of decayed or stale elements), are not interpolated in that
+block: they are propagated directly at each requested time and left out of
+the budget, so they never force the knots down. Which satellites are valid
+(ok) is therefore the same as for direct propagation.
+
+Caches belong to one satellite list; a TLE refresh produces a new list and
+therefore a new cache.
+"""
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from services.propagator import (
+    ConstellationPropagator,
+    PropagationResult,
+    get_propagator,
+    plausible_positions,
+    teme_to_geodetic,
+)
+
+DEFAULT_KNOT_S = 60.0
+KNOTS_PER_BLOCK = 60
+MAX_ERROR_KM = 0.01
+MIN_KNOT_S = 5.0
+# The budget applies to this percentile of per-satellite worst errors; the
+# maximum is kept in last_max_error_km
+ERROR_PERCENTILE = 99.9
+# Velocity/position mismatch (km/s) beyond which a satellite's sgp4 output is
+# treated as incoherent; fresh Starlink elements stay below 0.0002
+INCOHERENT_VELOCITY_KM_S = 0.001
+MAX_CACHED_BLOCKS = 3
+
+_UNIX_EPOCH_JD = 2440587.5
+
+
+def get_knot_s() -> float:
+    """Knot spacing from TRAJECTORY_KNOT_S (0 disables the cache)"""
+    try:
+        return float(os.getenv("TRAJECTORY_KNOT_S", DEFAULT_KNOT_S))
+    except ValueError:
+        print(f"[Trajectory] Invalid TRAJECTORY_KNOT_S, using {DEFAULT_KNOT_S}")
+        return DEFAULT_KNOT_S
+
+
+def _jd_fr(unix_s: np.ndarray):
+    days, seconds = np.divmod(np.asarray(unix_s, dtype=np.float64), 86400.0)
+    return _UNIX_EPOCH_JD + days, seconds / 86400.0
+
+
+@dataclass
+class _Block:
+    start_s: float
+    knot_s: float
+    positions_km: np.ndarray  # (N, K + 1, 3)
+    velocities_km_s: np.ndarray  # (N, K + 1, 3)
+    interpolated: np.ndarray  # (N,) satellites served from the knots
+    direct: Optional[ConstellationPropagator] = None  # The others, propagated at each requested time
+
+
+class TrajectoryCache:
+    """Interpolated positions for one constellation; a drop-in for ConstellationPropagator.propagate"""
+
+    def __init__(self, propagator: ConstellationPropagator, knot_s: float = DEFAULT_KNOT_S, max_error_km: float = MAX_ERROR_KM):
+        self.propagator = propagator
+        self.knot_s = knot_s
+        self.max_error_km = max_error_km
+        self._blocks: "OrderedDict[tuple, _Block]" = OrderedDict()
+        self.last_error_km: Optional[float] = None
+        self.last_max_error_km: Optional[float] = None
+        self.last_direct = 0  # Satellites propagated directly in the last block
+        # The tick worker and request handlers may share a cache
+        self._lock = threading.Lock()
+
+    def propagate(self, times: Union[datetime, Sequence[datetime]]) -> PropagationResult:
+        """Positions for every satellite at every time, interpolated from the cached knots"""
+        if isinstance(times, datetime):
+            times = [times]
+        unix_s = np.array([t.timestamp() for t in times], dtype=np.float64)
+        n = len(self.propagator)
+        positions = np.empty((n, len(unix_s), 3))
+        velocities = np.empty((n, len(unix_s), 3))
+        ok = np.empty((n, len(unix_s)), dtype=bool)
+        for j, t in enumerate(unix_s.tolist()):
+            positions[:, j], velocities[:, j], ok[:, j] = self._interpolate(t)
+        jd, fr = _jd_fr(unix_s)
+        lat, lon, alt = teme_to_geodetic(positions, jd, fr)
+        return PropagationResult(
+            positions_km=positions,
+            velocities_km_s=velocities,
+            lat_deg=lat,
+            lon_deg=lon,
+            alt_km=alt,
+            ok=ok,
+        )
+
+    def _interpolate(self, t: float):
+        with self._lock:
+            block = self._block_for(t)
+        h = block.knot_s
+        i = min(int((t - block.start_s) // h), block.positions_km.shape[1] - 2)
+        s = (t - block.start_s - i * h) / h
+        p0, p1 = block.positions_km[:, i], block.positions_km[:, i + 1]
+        m0, m1 = block.velocities_km_s[:, i] * h, block.velocities_km_s[:, i + 1] * h
+        s2, s3 = s * s, s * s * s
+        position = (2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * m0 + (-2 * s3 + 3 * s2) * p1 + (s3 - s2) * m1
+        velocity = ((6 * s2 - 6 * s) * p0 + (3 * s2 - 4 * s + 1) * m0 + (-6 * s2 + 6 * s) * p1 + (3 * s2 - 2 * s) * m1) / h
+        ok = block.interpolated.copy()
+        if block.direct is not None:
+            rows = ~block.interpolated
+            errors, r, v = block.direct.propagate_jd(*_jd_fr(np.array([t])))
+            position[rows], velocity[rows] = r[:, 0], v[:, 0]
+            ok[rows] = plausible_positions(errors, r)[:, 0]
+        return position, velocity, ok
+
+    def _block_for(self, t: float) -> _Block:
+        while True:
+            span = self.knot_s * KNOTS_PER_BLOCK
+            key = (self.knot_s, int(t // span))
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+            block = self._build(key[1] * span)
+            if block is not None:
+                self._blocks[key] = block
+                while len(self._blocks) > MAX_CACHED_BLOCKS:
+                    self._blocks.popitem(last=False)
+                return block
+
+    def _build(self, start_s: float) -> Optional[_Block]:
+        """Propagate one block of knots; None if the knots had to be refined first"""
+        jd, fr = _jd_fr(start_s + self.knot_s * np.arange(KNOTS_PER_BLOCK + 1))
+        errors, r, v = self.propagator.propagate_jd(jd, fr)
+        # A satellite that is implausible at any knot is not interpolated in this block
+        interpolated = plausible_positions(errors, r).all(axis=1)
+        r[~interpolated] = 0.0
+        v[~interpolated] = 0.0
+        block = _Block(start_s=start_s, knot_s=self.knot_s, positions_km=r, velocities_km_s=v, interpolated=interpolated)
+
+        worst_km, mismatch_km_s = self._check(block)
+        interpolated &= mismatch_km_s <= INCOHERENT_VELOCITY_KM_S
+        worst_km = worst_km[interpolated]
+        error_km = float(np.percentile(worst_km, ERROR_PERCENTILE)) if len(worst_km) else 0.0
+        self.last_error_km = error_km
+        self.last_max_error_km = float(worst_km.max()) if len(worst_km) else 0.0
+        self.last_direct = int((~interpolated).sum())
+        if error_km > self.max_error_km and self.knot_s / 2 >= MIN_KNOT_S:
+            print(
+                f"[Trajectory] Interpolation error {error_km * 1000:.1f} m (p{ERROR_PERCENTILE:g}) over budget, "
+                f"knots {self.knot_s:g}s -> {self.knot_s / 2:g}s"
+            )
+            self.knot_s /= 2
+            self._blocks.clear()
+            return None
+        if self.last_direct:
+            block.direct = ConstellationPropagator([self.propagator.satrecs[i] for i in np.flatnonzero(~interpolated).tolist()])
+        return block
+
+    def _check(self, block: _Block):
+        """
+        Per-satellite (error bound in km, velocity mismatch in km/s) from the
+        interpolation error at the quarter points of every interval; satellites
+        sgp4 cannot propagate there get an infinite mismatch
+        """
+        n = len(block.interpolated)
+        worst = np.zeros(n)
+        mismatch = np.zeros(n)
+        valid = block.interpolated
+        if not valid.any():
+            return worst, mismatch
+        p0, p1 = block.positions_km[valid, :-1], block.positions_km[valid, 1:]
+        m0 = block.velocities_km_s[valid, :-1] * block.knot_s
+        m1 = block.velocities_km_s[valid, 1:] * block.knot_s
+        trusted = np.ones(int(valid.sum()), dtype=bool)
+        residuals = []
+        for s in (0.25, 0.75):
+            jd, fr = _jd_fr(block.start_s + block.knot_s * (np.arange(KNOTS_PER_BLOCK) + s))
+            errors, exact, _ = self.propagator.propagate_jd(jd, fr)
+            s2, s3 = s * s, s * s * s
+            interpolated = (2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * m0 + (-2 * s3 + 3 * s2) * p1 + (s3 - s2) * m1
+            checked = plausible_positions(errors[valid], exact[valid])
+            trusted &= checked.all(axis=1)
+            residuals.append(interpolated - np.where(checked[..., None], exact[valid], interpolated))
+        distance = np.maximum(np.linalg.norm(residuals[0], axis=-1), np.linalg.norm(residuals[1], axis=-1))
+        worst[valid] = distance.max(axis=1) * 16.0 / 9.0
+        # A constant velocity offset dv gives dv * h * s(1 - s)(1 - 2s): +-0.09375 dv h at the quarter points
+        odd = np.linalg.norm(residuals[0] - residuals[1], axis=-1).max(axis=1) / 2.0
+        mismatch[valid] = np.where(trusted, odd / (0.09375 * block.knot_s), np.inf)
+        return worst, mismatch
+
+
+# One cache per satellite list; a refreshed catalog is a new list
+_caches: Dict[int, TrajectoryCache] = {}
+_MAX_CACHED_TRAJECTORIES = 4
+
+
+def get_trajectory_cache(satellites: List) -> TrajectoryCache:
+    propagator = get_propagator(satellites)
+    cache = _caches.get(id(propagator))
+    if cache is None or cache.propagator is not propagator:
+        if len(_caches) >= _MAX_CACHED_TRAJECTORIES:
+            _caches.pop(next(iter(_caches)))
+        cache = TrajectoryCache(propagator, knot_s=get_knot_s())
+        _caches[id(propagator)] = cache
+    return cache
+
+
+def get_positions_source(satellites: List):
+    """Trajectory cache, or the plain propagator when TRAJECTORY_KNOT_S=0"""
+    if get_knot_s() <= 0:
+        return get_propagator(satellites)
+    return get_trajectory_cache(satellites)
@@ -1,15 +1,36 @@
 """Orbital Compute Simulation Module"""
-from .world import World
+import os
+
+from .history import DEFAULT_HISTORY_SIZE
+from .job_queue import DEFAULT_MAX_PENDING
+from .world import DEFAULT_MAX_ACTIVE_ROUTES, World
+from .workload import seed_from_env
 
 # Singleton instance
 _world_instance = None
 
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"[World] Ignoring invalid {name}={value!r}")
+        return default
+
 def get_world_instance() -> World:
     global _world_instance
     if _world_instance is None:
-        _world_instance = World()
+        # Memory caps (see World.__init__); history spills to disk only when a path is set
+        _world_instance = World(
+            max_pending_jobs=_env_int("WORLD_MAX_PENDING_JOBS", DEFAULT_MAX_PENDING),
+            max_active_routes=_env_int("WORLD_MAX_ACTIVE_ROUTES", DEFAULT_MAX_ACTIVE_ROUTES),
+            history_size=_env_int("WORLD_HISTORY_SIZE", DEFAULT_HISTORY_SIZE),
+            history_spill_path=os.getenv("WORLD_HISTORY_SPILL_PATH") or None,
+            seed=seed_from_env(),
+        )
     return _world_instance
 
 # Export for convenience
 world_instance = get_world_instance()
-
@@ -1,4 +1,6 @@
 """Failure response agent"""
+from typing import Callable, Optional
+
 import numpy as np
 from .env_failure import FailureEnvV1
 
@@ -6,10 +8,24 @@ from .env_failure import FailureEnvV1
 class FailureAgent:
     """
     Tiny Q-learning on 2 actions.
+
+    Learns online from step() on its own world, or offline from replayed
+    transitions (update_batch; see sim.vec_env.train_failure_agent). Weights
+    trained offline are loaded with load(), after which step() only evaluates.
+    advance is passed to FailureEnvV1 (see there).
     """
 
-    def __init__(self, world, state_dim: int = 4, lr: float = 0.05, gamma: float = 0.9, epsilon: float = 0.1):
-        self.env = FailureEnvV1(world)
+    def __init__(
+        self,
+        world=None,
+        state_dim: int = 4,
+        lr: float = 0.05,
+        gamma: float = 0.9,
+        epsilon: float = 0.1,
+        advance: Optional[Callable[[float], object]] = None,
+    ):
+        self.env = FailureEnvV1(world, advance=advance) if world is not None else None
+        self.learn_online = True
         self.lr = lr
         self.gamma = gamma
         self.epsilon = epsilon
@@ -27,6 +43,34 @@ class FailureAgent:
         q_vals = self._q_values(state)
         return int(np.argmax(q_vals))
 
+    def select_actions(self, states: np.ndarray) -> np.ndarray:
+        """Epsilon-greedy actions for a (K, state_dim) batch of states"""
+        greedy = np.argmax(states @ self.w.T, axis=1)
+        explore = np.random.rand(len(states)) < self.epsilon
+        return np.where(explore, np.random.randint(2, size=len(states)), greedy)
+
+    def update_batch(self, states, actions, rewards, next_states, dones) -> float:
+        """One mean Q-learning step over a minibatch of transitions; returns the mean |TD error|"""
+        q = np.einsum("ij,ij->i", states, self.w[actions])
+        q_next = np.where(dones, 0.0, (next_states @ self.w.T).max(axis=1))
+        td_error = rewards + self.gamma * q_next - q
+        grad = np.zeros_like(self.w)
+        np.add.at(grad, actions, td_error[:, None] * states)
+        self.w += self.lr * grad / len(actions)
+        return float(np.abs(td_error).mean())
+
+    def save(self, path: str):
+        np.save(path, self.w)
+
+    def load(self, path: str):
+        """Use weights trained offline; the live world is then only used for evaluation (greedy, no learning)"""
+        w = np.load(path)
+        if w.shape != self.w.shape:
+            raise ValueError(f"Expected weights of shape {self.w.shape}, got {w.shape}")
+        self.w = w.astype(np.float32)
+        self.learn_online = False
+        self.epsilon = 0.0
+
     def step(self):
         if self._last_state is None:
             state, _ = self.env.reset()
@@ -36,12 +80,13 @@ class FailureAgent:
         action = self.select_action(state)
         next_state, reward, done, info = self.env.step(action)
 
-        # Q-learning update
-        q_vals = self._q_values(state)
-        q_next = self._q_values(next_state)
-        target = reward + self.gamma * np.max(q_next)
-        td_error = target - q_vals[action]
-        self.w[action] += self.lr * td_error * state
+        if self.learn_online:
+            # Q-learning update
+            q_vals = self._q_values(state)
+            q_next = self._q_values(next_state)
+            target = reward + self.gamma * np.max(q_next)
+            td_error = target - q_vals[action]
+            self.w[action] += self.lr * td_error * state
 
         self._last_state = next_state
         self._last_action = action
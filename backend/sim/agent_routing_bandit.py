@@ -1,35 +1,55 @@
 """Routing bandit agent"""
+import time
 import numpy as np
 from typing import List, Optional
-from .types import Node, RoutingDecision, Job, SimSnapshot
-from .env_routing import RoutingEnvV1
+from .types import Node, RoutingDecision, RoutingBatchResult, Job, SimSnapshot
+from .env_routing import CANDIDATE_DIM, RoutingEnvV1, routing_reward
+
+# Jobs routed per call when neither a count nor a time budget is given
+DEFAULT_BATCH_SIZE = 256
+# Pending jobs fetched from the queue at a time
+BATCH_CHUNK = 256
 
 
 class RoutingBanditAgent:
     """
-    Contextual bandit: linear model per action, trained with simple SGD.
-    State_dim is fixed 8 from env; action space is 'candidate node index'.
-    To keep it RL-lite, we just learn a shared weight vector and perturb per action.
+    LinUCB contextual bandit over per-candidate features.
+
+    Every candidate node is a row of features (see RoutingEnvV1.candidate_features);
+    one shared linear model predicts the reward of routing the job there, and
+    the agent picks the highest upper confidence bound:
+
+        score = x @ theta + alpha * sqrt(x @ A_inv @ x)
+
+    A_inv is kept directly and updated with Sherman-Morrison after each reward,
+    so a decision costs O(candidates * dim^2) and an update O(dim^2), with no
+    matrix inversion.
     """
 
-    def __init__(self, state_dim: int = 8, lr: float = 0.01, epsilon: float = 0.1):
-        self.lr = lr
-        self.epsilon = epsilon
-        self.w = np.zeros(state_dim, dtype=np.float32)  # shared
+    def __init__(self, feature_dim: int = CANDIDATE_DIM, alpha: float = 1.0, ridge: float = 1.0):
+        self.alpha = alpha
+        self.A_inv = np.eye(feature_dim) / ridge
+        self.b = np.zeros(feature_dim)
+        self.theta = np.zeros(feature_dim)
+        self.updates = 0
+
+    def scores(self, features: np.ndarray) -> np.ndarray:
+        """UCB score per candidate row"""
+        width = np.sqrt(np.maximum(np.einsum("ij,ij->i", features @ self.A_inv, features), 0.0))
+        return features @ self.theta + self.alpha * width
 
-    def select_action(self, state: np.ndarray, num_actions: int) -> int:
-        if num_actions == 0:
+    def select_action(self, features: np.ndarray) -> int:
+        if len(features) == 0:
             return 0
-        if np.random.rand() < self.epsilon:
-            return np.random.randint(num_actions)
-        # simple scoring: same w for all actions
-        score = float(state @ self.w)
-        # action index doesn't matter for scoring; break ties randomly
-        return 0 if score >= 0 else np.random.randint(num_actions)
+        return int(np.argmax(self.scores(features)))
 
-    def update(self, state: np.ndarray, reward: float):
-        # gradient ascent on reward: dL/dw = reward * state
-        self.w += self.lr * reward * state
+    def update(self, x: np.ndarray, reward: float):
+        """Add one observation: A += x x^T (via Sherman-Morrison on A_inv), b += reward * x"""
+        A_inv_x = self.A_inv @ x
+        self.A_inv -= np.outer(A_inv_x, A_inv_x) / (1.0 + x @ A_inv_x)
+        self.b += reward * x
+        self.theta = self.A_inv @ self.b
+        self.updates += 1
 
 
 class RoutingController:
@@ -38,26 +58,26 @@ class RoutingController:
     """
 
     def __init__(self, world):
+        self.world = world
         self.env = RoutingEnvV1(world)
         self.agent = RoutingBanditAgent()
         self._last_state = None
         self._last_meta = None
 
     def decide_for_next_job(self) -> Optional[RoutingDecision]:
-        state, meta = self.env.reset()
-        candidate_nodes: List[Node] = meta.get("candidate_nodes", [])
-        job: Job = meta.get("job")
-        if not candidate_nodes or job is None:
-            return None
+        # One lock for the whole step, so features, candidates and the route
+        # agree and concurrent calls never interleave Sherman-Morrison updates
+        with self.world._lock:
+            state, meta = self.env.reset()
+            candidate_nodes: List[Node] = meta.get("candidate_nodes", [])
+            job: Job = meta.get("job")
+            if not candidate_nodes or job is None:
+                return None
 
-        action_idx = self.agent.select_action(state, len(candidate_nodes))
-        next_state, reward, done, info = self.env.step(action_idx, meta)
-        self.agent.update(state, reward)
-
-        # Update the routing decision source
-        decision = self.world.active_routes[-1] if self.world.active_routes else None
-        if decision:
-            decision.source = "agent"
+            features = self.env.candidate_features(job)
+            action_idx = self.agent.select_action(features)
+            next_state, reward, done, info = self.env.step(action_idx, meta)
+            self.agent.update(features[action_idx], reward)
 
         return RoutingDecision(
             job_id=job.id,
@@ -65,3 +85,46 @@ class RoutingController:
             source="agent",
         )
 
+    def decide_batch(self, max_jobs: Optional[int] = None, time_budget_ms: Optional[float] = None) -> RoutingBatchResult:
+        """
+        Route the most urgent pending jobs until max_jobs are routed, the time
+        budget runs out or the queue is empty (DEFAULT_BATCH_SIZE jobs if
+        neither limit is given).
+
+        The world lock is taken once and the candidate arrays fetched once;
+        each job is then one vectorized scoring pass over every candidate and
+        one Sherman-Morrison update, so later jobs in the batch see the routes
+        and learning of earlier ones.
+        """
+        started = time.perf_counter()
+        if max_jobs is None and time_budget_ms is None:
+            max_jobs = DEFAULT_BATCH_SIZE
+        world = self.world
+        decisions: List[RoutingDecision] = []
+        with world._lock:
+            table = world.candidate_table()
+            candidate_nodes = table["nodes"]
+            out_of_time = False
+            while candidate_nodes and not out_of_time:
+                remaining = BATCH_CHUNK if max_jobs is None else min(BATCH_CHUNK, max_jobs - len(decisions))
+                jobs = world.peek_next_jobs(remaining) if remaining > 0 else []
+                if not jobs:
+                    break
+                for job in jobs:
+                    if time_budget_ms is not None and (time.perf_counter() - started) * 1000 >= time_budget_ms:
+                        out_of_time = True
+                        break
+                    features = self.env.candidate_features(job, table)
+                    action = self.agent.select_action(features)
+                    node_id = candidate_nodes[action].id
+                    result = world.route_job(job.id, node_id, source="agent")
+                    reward = routing_reward(result["latency_ms"], result["cost_usd"], result["slo_violated"])
+                    self.agent.update(features[action], reward)
+                    decisions.append(RoutingDecision(job_id=job.id, target_node_id=node_id, source="agent"))
+            pending = len(world.jobs)
+
+        return RoutingBatchResult(
+            decisions=decisions,
+            pending_jobs=pending,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
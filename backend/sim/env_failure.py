@@ -1,6 +1,6 @@
 """Failure response RL-lite environment"""
 import numpy as np
-from typing import Dict
+from typing import Callable, Dict, Optional
 from .types import SimSnapshot
 
 
@@ -11,12 +11,19 @@ class FailureEnvV1:
     Reward: improvement in latency/SLO over next window.
     """
 
-    def __init__(self, world, window_size: int = 5):
+    def __init__(self, world, window_size: int = 5, advance: Optional[Callable[[float], object]] = None):
+        """
+        advance(dt_seconds) moves the world forward one step; defaults to
+        world.advance_time (wall-clock job arrivals, nothing routed). Offline
+        training passes an EventEngine-driven step instead (see vec_env), and
+        the live agent a no-op, since its world is advanced elsewhere.
+        """
         self.world = world
         self.window_size = window_size
+        self.advance = advance or (lambda dt: world.advance_time(dt_seconds=dt))
         self.history = []  # list of dicts with metrics
 
-    def _compute_metrics(self, snapshot: SimSnapshot) -> Dict:
+    def _compute_metrics(self, snapshot: Optional[SimSnapshot] = None) -> Dict:
         # Example metrics: avg latency, SLO violation rate
         # You need to have world compute these; here we assume:
         # world.get_performance_metrics() returns:
@@ -37,8 +44,8 @@ class FailureEnvV1:
 
     def reset(self):
         self.history.clear()
-        snap = self.world.get_snapshot()
-        self.history.append(self._compute_metrics(snap))
+        # Metrics are kept as running totals; no snapshot needed
+        self.history.append(self._compute_metrics())
         return self._encode_state(), {}
 
     def step(self, action: int):
@@ -50,9 +57,8 @@ class FailureEnvV1:
             self.world.trigger_global_reroute()
 
         # advance world a short time window
-        self.world.advance_time(dt_seconds=1.0)
-        snap = self.world.get_snapshot()
-        metrics = self._compute_metrics(snap)
+        self.advance(1.0)
+        metrics = self._compute_metrics()
         self.history.append(metrics)
         if len(self.history) > self.window_size:
             self.history.pop(0)
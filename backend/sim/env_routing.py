@@ -2,6 +2,31 @@
 import numpy as np
 from typing import List, Tuple, Dict, Optional
 from .types import SimSnapshot, Job, Node, RoutingDecision
+from .link_table import ROUTES_AT_FULL_CONGESTION
+
+STATE_DIM = 8
+# size_gb, flops (TFLOP), latency_slo_ms (s)
+JOB_FEATURE_SCALE = np.array([1.0, 1e12, 1000.0])
+# RTT aggregates in seconds; congestion is already 0-1
+LINK_STATS_SCALE = np.array([1000.0, 1000.0, 1000.0, 1.0, 1.0])
+
+# Per-candidate features scored by the routing agent (see candidate_features)
+CANDIDATE_FEATURES = (
+    "bias",
+    "latency",        # Route latency to the node (100 ms units)
+    "slo_violated",   # Route latency exceeds the job's latency SLO
+    "congestion",     # Active routes on the node, 0-1
+    "queue_wait",     # log1p(seconds until the node is free)
+    "sunlit",
+    "cost",           # Expected cost of the job on the node (milli-USD)
+    "exec_time",      # log1p(seconds of compute on the node)
+)
+CANDIDATE_DIM = len(CANDIDATE_FEATURES)
+
+
+def routing_reward(latency_ms, cost_usd, slo_violated):
+    """Cheap + fast + no SLO violation; works on scalars or arrays"""
+    return -0.001 * latency_ms - cost_usd - 5.0 * slo_violated
 
 
 class RoutingEnvV1:
@@ -13,52 +38,77 @@ class RoutingEnvV1:
     def __init__(self, world):
         """
         world: your sim engine with methods:
-          - get_snapshot() -> SimSnapshot
+          - peek_next_job() -> Optional[Job]
+          - get_candidate_nodes_for_job(job_id: str) -> List[Node]
+          - links: LinkTable
           - route_job(job_id: str, node_id: str) -> Dict with metrics
         """
         self.world = world
         self.last_job: Optional[Job] = None
         self.last_action_node: Optional[Node] = None
 
-    def _encode_state(self, snapshot: SimSnapshot, job: Job, candidate_nodes: List[Node]) -> np.ndarray:
+    def link_stats(self) -> np.ndarray:
+        """
+        Job-independent part of the state, scaled:
+        [avg_rtt, std_rtt, min_rtt, avg_congestion, max_congestion]
+        """
+        # The world caches these aggregates per tick, so this is O(1) per job
+        return (self.world.link_stats() / LINK_STATS_SCALE).astype(np.float32)
+
+    def encode_states(self, jobs: List[Job], link_stats: Optional[np.ndarray] = None) -> np.ndarray:
+        """(len(jobs), 8) state matrix; link_stats is shared by every row"""
+        if link_stats is None:
+            link_stats = self.link_stats()
+        states = np.empty((len(jobs), STATE_DIM), dtype=np.float32)
+        states[:, :3] = np.array(
+            [(job.size_gb, job.flops, job.latency_slo_ms) for job in jobs], dtype=np.float64
+        ).reshape(-1, 3) / JOB_FEATURE_SCALE
+        states[:, 3:] = link_stats
+        return states
+
+    def candidate_features(self, job: Job, table: Optional[Dict] = None) -> np.ndarray:
+        """
+        (len(candidates), CANDIDATE_DIM) feature matrix for routing `job`, one
+        row per node in world.get_candidate_nodes() order. Static columns come
+        from the world's cached candidate arrays and the dynamic ones (routes,
+        queue, sunlit) are gathered by node index, so no per-node Python runs.
+        """
+        world = self.world
+        if table is None:
+            table = world.candidate_table()
+        index = table["index"]
+        latency_ms = table["latency_ms"]
+        exec_s = job.flops / table["capacity_flops"]
+        features = np.empty((len(index), CANDIDATE_DIM))
+        features[:, 0] = 1.0
+        features[:, 1] = latency_ms / 100.0
+        features[:, 2] = latency_ms > job.latency_slo_ms
+        features[:, 3] = np.minimum(1.0, world.links.route_counts[index] / ROUTES_AT_FULL_CONGESTION)
+        features[:, 4] = np.log1p(world.node_queue_wait_s()[index])
+        features[:, 5] = world.node_sunlit()[index]
+        # Same cost model as World.route_job
+        features[:, 6] = exec_s * (table["power_cost_per_kwh"] / 1000.0) * 0.1 * 1000.0
+        features[:, 7] = np.log1p(exec_s)
+        return features
+
+    def _encode_state(self, snapshot: Optional[SimSnapshot], job: Job, candidate_nodes: List[Node]) -> np.ndarray:
         """
         Simple fixed-length vector.
         We only keep coarse features to keep bandit/Q cheap.
         """
-        # Example: [job_size, job_flops, job_latency_slo,
-        #           avg_rtt, std_rtt, min_rtt,
-        #           avg_congestion, max_congestion]
-        rtts = []
-        congestions = []
-        for link in snapshot.links:
-            rtts.append(link.rtt_ms)
-            congestions.append(link.congestion_level)
-
-        avg_rtt = np.mean(rtts) if rtts else 0.0
-        std_rtt = np.std(rtts) if rtts else 0.0
-        min_rtt = np.min(rtts) if rtts else 0.0
-        avg_cong = np.mean(congestions) if congestions else 0.0
-        max_cong = np.max(congestions) if congestions else 0.0
-
-        return np.array([
-            job.size_gb,
-            job.flops / 1e12,           # scale
-            job.latency_slo_ms / 1000,  # scale
-            avg_rtt / 1000,
-            std_rtt / 1000,
-            min_rtt / 1000,
-            avg_cong,
-            max_cong,
-        ], dtype=np.float32)
+        # [job_size, job_flops, job_latency_slo,
+        #  avg_rtt, std_rtt, min_rtt,
+        #  avg_congestion, max_congestion]
+        return self.encode_states([job])[0]
 
     def reset(self) -> Tuple[np.ndarray, Dict]:
-        snapshot = self.world.get_snapshot()
-        if not snapshot.pending_jobs:
-            return np.zeros(8, dtype=np.float32), {"candidate_nodes": []}
-        job = snapshot.pending_jobs[0]
+        # Most urgent pending job; no snapshot copy, so cost doesn't grow with the backlog
+        job = self.world.peek_next_job()
+        if job is None:
+            return np.zeros(STATE_DIM, dtype=np.float32), {"candidate_nodes": []}
         candidate_nodes = self.world.get_candidate_nodes_for_job(job.id)
         self.last_job = job
-        state = self._encode_state(snapshot, job, candidate_nodes)
+        state = self._encode_state(None, job, candidate_nodes)
         return state, {"candidate_nodes": candidate_nodes, "job": job}
 
     def step(self, action_idx: int, meta: Dict) -> Tuple[np.ndarray, float, bool, Dict]:
@@ -68,7 +118,7 @@ class RoutingEnvV1:
         job: Job = meta["job"]
         candidate_nodes: List[Node] = meta["candidate_nodes"]
         if not candidate_nodes:
-            return np.zeros(8, dtype=np.float32), 0.0, True, {"error": "no_candidates"}
+            return np.zeros(STATE_DIM, dtype=np.float32), 0.0, True, {"error": "no_candidates"}
 
         chosen_node = candidate_nodes[action_idx % len(candidate_nodes)]
         # route_job should return metrics for this job:
@@ -77,28 +127,24 @@ class RoutingEnvV1:
         #   "cost_usd": float,
         #   "slo_violated": bool
         # }
-        result = self.world.route_job(job.id, chosen_node.id)
+        result = self.world.route_job(job.id, chosen_node.id, source="agent")
         self.last_action_node = chosen_node
 
         latency_ms = result.get("latency_ms", 0.0)
         cost_usd = result.get("cost_usd", 0.0)
         slo_violated = result.get("slo_violated", False)
 
-        # Reward: cheap + fast + no SLO violation
-        reward = -0.001 * latency_ms - cost_usd
-        if slo_violated:
-            reward -= 5.0
+        reward = float(routing_reward(latency_ms, cost_usd, slo_violated))
 
         # Next state
-        snapshot = self.world.get_snapshot()
-        done = len(snapshot.pending_jobs) == 0
+        next_job = self.world.peek_next_job()
+        done = next_job is None
         if done:
-            next_state = np.zeros(8, dtype=np.float32)
+            next_state = np.zeros(STATE_DIM, dtype=np.float32)
             next_meta = {}
         else:
-            next_job = snapshot.pending_jobs[0]
             candidate_nodes2 = self.world.get_candidate_nodes_for_job(next_job.id)
-            next_state = self._encode_state(snapshot, next_job, candidate_nodes2)
+            next_state = self._encode_state(None, next_job, candidate_nodes2)
             next_meta = {"candidate_nodes": candidate_nodes2, "job": next_job}
 
         info = {"result": result, "chosen_node_id": chosen_node.id}
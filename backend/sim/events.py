@@ -0,0 +1,182 @@
+"""
+Discrete-event engine for World
+
+Runs the World on simulated time instead of wall-clock ticks: the clock jumps
+straight to the next event, so offline what-if studies run as fast as the
+events can be processed.
+
+Events (time-ordered heap):
+    tick       sample the next batch of jobs and record metrics
+    arrival    one job arrives; it is queued and handed to the router
+    world      a call on the World at a given time (fiber cuts, shell
+               outages, load changes, preset scenarios via apply_scenario)
+
+Route completions are not copied into this heap: the World already keeps
+them ordered by finish time (see World.complete_routes), and the engine
+interleaves them with its own events.
+"""
+import heapq
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .scenario import apply_scenario
+from .types import Job
+from .world import World
+
+TICK = 0
+ARRIVAL = 1
+WORLD = 2
+
+# (world, job) -> target node id, or None to leave the job pending
+Router = Callable[[World, Job], Optional[str]]
+
+
+class RoundRobinRouter:
+    """Spreads jobs over the nodes that can meet their latency SLO (all nodes if none can)"""
+
+    def __init__(self):
+        self._next: Dict[float, int] = {}
+
+    def __call__(self, world: World, job: Job) -> Optional[str]:
+        nodes = world.get_candidate_nodes(max_latency_ms=job.latency_slo_ms) or world.get_candidate_nodes()
+        if not nodes:
+            return None
+        position = self._next.get(job.latency_slo_ms, 0)
+        self._next[job.latency_slo_ms] = position + 1
+        return nodes[position % len(nodes)].id
+
+
+class EventEngine:
+    """
+    Event-driven driver for a World.
+
+    The World should be dedicated to the engine (not the live server's
+    instance): the engine owns its clock and holds its lock while running.
+    """
+
+    def __init__(
+        self,
+        world: World,
+        router: Optional[Router] = None,
+        start: Optional[datetime] = None,
+        tick_s: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        self.world = world
+        self.router = router or RoundRobinRouter()
+        self.start = start or datetime.now(timezone.utc)
+        self.tick_s = tick_s
+        self.rng = np.random.default_rng(seed)
+        self._heap: List[Tuple[float, int, int, object]] = []
+        self._seq = count()
+        self._ticks_started = False
+        self._completed_since_tick = 0
+        self.stats = {"events": 0, "arrivals": 0, "routed": 0, "unrouted": 0, "completed": 0, "slo_violations": 0}
+
+    @property
+    def now_s(self) -> float:
+        return self.world.time_s
+
+    def schedule(self, time_s: float, kind: int, payload=None):
+        heapq.heappush(self._heap, (time_s, next(self._seq), kind, payload))
+
+    def schedule_call(self, time_s: float, fn: Callable, *args):
+        """Call fn(*args) at time_s (e.g. World.cut_fiber_between)"""
+        self.schedule(time_s, WORLD, (fn, args))
+
+    def schedule_scenario(self, time_s: float, scenario_id: str):
+        """Apply a preset scenario at time_s"""
+        self.schedule_call(time_s, apply_scenario, self.world, scenario_id)
+
+    def schedule_fiber_cut(self, time_s: float, region_a: str, region_b: str, duration_s: Optional[float] = None):
+        self.schedule_call(time_s, self.world.cut_fiber_between, region_a, region_b)
+        if duration_s is not None:
+            self.schedule_call(time_s + duration_s, self.world.restore_fiber_between, region_a, region_b)
+
+    def schedule_shell_outage(self, time_s: float, shell_id: str, region: str, duration_s: Optional[float] = None):
+        self.schedule_call(time_s, self.world.disable_leo_shell, shell_id, region)
+        if duration_s is not None:
+            self.schedule_call(time_s + duration_s, self.world.enable_leo_shell, shell_id)
+
+    def schedule_load(self, time_s: float, region: str, multiplier: float, duration_s: Optional[float] = None):
+        self.schedule_call(time_s, self.world.set_regional_load, region, multiplier)
+        if duration_s is not None:
+            self.schedule_call(time_s + duration_s, self.world.set_regional_load, region, 1.0)
+
+    def run_until(self, end_s: float) -> Dict:
+        """Process every event up to end_s (simulated seconds) and return run statistics"""
+        world = self.world
+        started = time.perf_counter()
+        events_before = self.stats["events"]
+        if not self._ticks_started:
+            self._ticks_started = True
+            self.schedule(world.time_s, TICK)
+
+        heap = self._heap
+        with world._lock:
+            while heap and heap[0][0] <= end_s:
+                time_s, _, kind, payload = heapq.heappop(heap)
+                self._complete_until(time_s)
+                world.time_s = time_s
+                if kind == ARRIVAL:
+                    self._on_arrival(payload)
+                elif kind == TICK:
+                    self._on_tick()
+                else:
+                    fn, args = payload
+                    fn(*args)
+                self.stats["events"] += 1
+            self._complete_until(end_s)
+            world.time_s = max(world.time_s, end_s)
+
+        elapsed = time.perf_counter() - started
+        events = self.stats["events"] - events_before
+        return {
+            **self.stats,
+            "sim_time_s": world.time_s,
+            "wall_time_s": elapsed,
+            "events_per_s": events / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def _complete_until(self, time_s: float):
+        world = self.world
+        next_s = world.next_completion_s()
+        while next_s is not None and next_s <= time_s:
+            world.time_s = next_s
+            done = world.complete_routes()
+            self._completed_since_tick += done
+            self.stats["completed"] += done
+            self.stats["events"] += done
+            next_s = world.next_completion_s()
+
+    def _on_tick(self):
+        world = self.world
+        now = world.time_s
+        world.record_performance(self._completed_since_tick)
+        self._completed_since_tick = 0
+
+        jobs = world.sample_jobs(self.start + timedelta(seconds=now))
+        arrivals = np.sort(self.rng.uniform(now, now + self.tick_s, len(jobs))).tolist()
+        for arrival_s, job in zip(arrivals, jobs):
+            self.schedule(arrival_s, ARRIVAL, job)
+        self.schedule(now + self.tick_s, TICK)
+
+    def _on_arrival(self, job: Job):
+        world = self.world
+        world.jobs.push(job, world.time_s)
+        self.stats["arrivals"] += 1
+        node_id = self.router(world, job)
+        if node_id is None:
+            self.stats["unrouted"] += 1
+            return
+        result = world.route_job(job.id, node_id)
+        if "error" in result:
+            self.stats["unrouted"] += 1
+            return
+        self.stats["routed"] += 1
+        if result["slo_violated"]:
+            self.stats["slo_violations"] += 1
@@ -0,0 +1,60 @@
+"""Bounded performance history for the World"""
+import json
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional
+
+DEFAULT_HISTORY_SIZE = 3600  # One hour of 1 s ticks
+# Evicted records are appended to the spill file in batches of this size
+SPILL_BATCH = 256
+
+
+class PerformanceHistory:
+    """
+    Ring buffer of per-tick metric records.
+
+    Holds the newest `maxlen` records in memory. When `spill_path` is set,
+    records pushed out of the buffer are appended to it as JSON lines
+    instead of being discarded.
+    """
+
+    def __init__(self, maxlen: int = DEFAULT_HISTORY_SIZE, spill_path: Optional[str] = None):
+        self.maxlen = maxlen
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._records: Deque[Dict] = deque(maxlen=maxlen)
+        self._spill: List[Dict] = []
+        self.spilled = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._records)
+
+    def append(self, record: Dict):
+        if len(self._records) == self.maxlen and self.spill_path is not None:
+            # The oldest record is evicted; with maxlen 0 the new one goes straight to the spill file
+            self._spill.append(self._records[0] if self.maxlen else record)
+            if len(self._spill) >= SPILL_BATCH:
+                self.flush()
+        self._records.append(record)
+
+    def recent(self, count: int) -> List[Dict]:
+        """Newest `count` records, oldest first"""
+        if count <= 0:
+            return []
+        return list(self._records)[-count:]
+
+    def flush(self):
+        """Write pending evicted records to the spill file (also called on shutdown)"""
+        if not self._spill or self.spill_path is None:
+            return
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.spill_path.open("a", encoding="utf-8") as f:
+                for record in self._spill:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self.spilled += len(self._spill)
+        except OSError as e:
+            print(f"[World] Failed to spill performance history to {self.spill_path}: {e}")
+        self._spill = []
@@ -0,0 +1,120 @@
+"""Indexed pending-job store for the World"""
+import heapq
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .types import Job
+
+# Backlog cap; beyond it the oldest pending jobs are dropped
+DEFAULT_MAX_PENDING = 200_000
+# Routed jobs kept for lookups by active routes (metrics)
+DEFAULT_ROUTED_RETENTION = 50_000
+
+
+class JobQueue:
+    """
+    Pending jobs indexed by id and ordered by absolute deadline.
+
+    - lookup / removal by id: O(1) (dict)
+    - most urgent job: O(log n) amortized (heap with lazy deletion; entries
+      for jobs that were already removed or pushed again are skipped when
+      they surface)
+    - iteration: arrival order; every job gets an increasing arrival sequence
+      number, so a position in that order survives removals (items_after)
+
+    Both the backlog and the record of routed jobs are bounded.
+    """
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING, routed_retention: int = DEFAULT_ROUTED_RETENTION):
+        self.max_pending = max_pending
+        self.routed_retention = routed_retention
+        self._pending: "OrderedDict[str, Job]" = OrderedDict()
+        self._deadline_heap: List[Tuple[float, int, str]] = []
+        self._arrival_seq: Dict[str, int] = {}
+        self._routed: "OrderedDict[str, Job]" = OrderedDict()
+        self._seq = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._pending
+
+    def __iter__(self) -> Iterator[Job]:
+        return iter(self._pending.values())
+
+    def push(self, job: Job, arrival_s: float):
+        """Add a pending job; its priority is arrival time + deadline"""
+        self._pending.pop(job.id, None)  # A re-pushed id counts as a new arrival
+        self._pending[job.id] = job
+        self._arrival_seq[job.id] = self._seq
+        heapq.heappush(self._deadline_heap, (arrival_s + job.deadline_s, self._seq, job.id))
+        self._seq += 1
+        while len(self._pending) > self.max_pending:
+            dropped_id, _ = self._pending.popitem(last=False)
+            del self._arrival_seq[dropped_id]
+            self.dropped += 1
+        self._compact()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Pending job by id"""
+        return self._pending.get(job_id)
+
+    def lookup(self, job_id: str) -> Optional[Job]:
+        """Pending or recently routed job by id"""
+        job = self._pending.get(job_id)
+        return job if job is not None else self._routed.get(job_id)
+
+    def pop(self, job_id: str) -> Optional[Job]:
+        """Remove a pending job (it was routed) and remember it for lookups"""
+        job = self._pending.pop(job_id, None)
+        if job is not None:
+            del self._arrival_seq[job_id]
+            self._routed[job_id] = job
+            while len(self._routed) > self.routed_retention:
+                self._routed.popitem(last=False)
+        return job
+
+    def _is_live(self, entry: Tuple[float, int, str]) -> bool:
+        """Heap entry still belongs to a pending job (not removed or superseded by a re-push)"""
+        return self._arrival_seq.get(entry[2]) == entry[1]
+
+    def peek(self) -> Optional[Job]:
+        """Pending job with the earliest absolute deadline"""
+        heap = self._deadline_heap
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        return self._pending[heap[0][2]] if heap else None
+
+    def most_urgent(self, count: int) -> List[Job]:
+        """Up to `count` pending jobs by earliest absolute deadline (jobs stay pending)"""
+        heap = self._deadline_heap
+        taken: List[Tuple[float, int, str]] = []
+        while heap and len(taken) < count:
+            entry = heapq.heappop(heap)
+            if self._is_live(entry):
+                taken.append(entry)
+        # Stale entries popped on the way are dropped; live ones go back
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return [self._pending[entry[2]] for entry in taken]
+
+    def items_after(self, seq: int) -> Iterator[Tuple[int, Job]]:
+        """(arrival sequence, job) for pending jobs that arrived after sequence `seq`, in arrival order"""
+        for job in self._pending.values():
+            job_seq = self._arrival_seq[job.id]
+            if job_seq > seq:
+                yield job_seq, job
+
+    def to_list(self) -> List[Job]:
+        return list(self._pending.values())
+
+    def _compact(self):
+        """Rebuild the heap once stale entries outnumber live ones"""
+        if len(self._deadline_heap) > 2 * len(self._pending) + 1024:
+            self._deadline_heap = [entry for entry in self._deadline_heap if self._is_live(entry)]
+            heapq.heapify(self._deadline_heap)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._pending), "routed_retained": len(self._routed), "dropped": self.dropped}
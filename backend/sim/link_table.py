@@ -0,0 +1,125 @@
+"""Array-backed link store for the World"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .types import Link
+
+# Active routes on a link's endpoints at which it counts as fully congested
+ROUTES_AT_FULL_CONGESTION = 100.0
+
+
+class LinkTable:
+    """
+    Structure-of-arrays link store.
+
+    Links are rows; endpoints are integer node indices into `node_ids`.
+    Pydantic `Link` objects are only built on request (see `to_models`), and
+    link ids are the row number ("link_<row>").
+
+    Congestion is derived from per-node active route counts, which the World
+    updates as routes are added and dropped; the column is recomputed in one
+    vectorized pass the first time it is read after a change.
+    """
+
+    def __init__(self, node_ids: Sequence[str]):
+        self.node_ids: List[str] = list(node_ids)
+        self.node_index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.src = np.empty(0, dtype=np.int32)
+        self.dst = np.empty(0, dtype=np.int32)
+        self.rtt_ms = np.empty(0, dtype=np.float64)
+        self.packet_loss = np.empty(0, dtype=np.float64)
+        self.route_counts = np.zeros(len(self.node_ids), dtype=np.int64)
+        self._congestion: Optional[np.ndarray] = None
+        self._rtt_stats: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.src)
+
+    def add_links(self, src, dst, rtt_ms, packet_loss):
+        """Append links; src/dst are node index arrays, other columns broadcast"""
+        src = np.asarray(src, dtype=np.int32).ravel()
+        count = len(src)
+        self.src = np.concatenate([self.src, src])
+        self.dst = np.concatenate([self.dst, np.asarray(dst, dtype=np.int32).ravel()])
+        self.rtt_ms = np.concatenate([self.rtt_ms, np.broadcast_to(np.asarray(rtt_ms, dtype=np.float64), (count,))])
+        self.packet_loss = np.concatenate(
+            [self.packet_loss, np.broadcast_to(np.asarray(packet_loss, dtype=np.float64), (count,))]
+        )
+        self._congestion = None
+        self._rtt_stats = None
+
+    def record_route(self, node_index: int, delta: int = 1):
+        """Single-route form of record_routes"""
+        self.route_counts[node_index] += delta
+        self._congestion = None
+
+    def record_routes(self, node_indices, delta: int = 1):
+        """Add (or with delta=-1, remove) active routes ending at the given nodes"""
+        np.add.at(self.route_counts, np.asarray(node_indices, dtype=np.int64), delta)
+        self._congestion = None
+
+    @property
+    def congestion(self) -> np.ndarray:
+        """Per-link congestion (0-1): active routes ending at either endpoint, per ROUTES_AT_FULL_CONGESTION"""
+        if self._congestion is None:
+            counts = self.route_counts[self.src] + self.route_counts[self.dst]
+            self._congestion = np.minimum(1.0, counts / ROUTES_AT_FULL_CONGESTION)
+        return self._congestion
+
+    def rtt_stats(self) -> np.ndarray:
+        """[mean, std, min] RTT in ms; RTTs only change through add_links, so this is cached"""
+        if self._rtt_stats is None:
+            if len(self):
+                self._rtt_stats = np.array([self.rtt_ms.mean(), self.rtt_ms.std(), self.rtt_ms.min()])
+            else:
+                self._rtt_stats = np.zeros(3)
+        return self._rtt_stats
+
+    def congestion_stats(self) -> np.ndarray:
+        """[mean, max] congestion over all links (one pass over the column)"""
+        if not len(self):
+            return np.zeros(2)
+        congestion = self.congestion
+        return np.array([congestion.mean(), congestion.max()])
+
+    def node_indices(self, node_ids: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self.node_index[node_id] for node_id in node_ids), dtype=np.int32, count=len(node_ids))
+
+    def row_for_id(self, link_id: str) -> Optional[int]:
+        prefix, _, suffix = link_id.rpartition("_")
+        if prefix != "link" or not suffix.isdigit() or int(suffix) >= len(self):
+            return None
+        return int(suffix)
+
+    def to_model(self, row: int) -> Link:
+        return Link(
+            id=f"link_{row}",
+            src_id=self.node_ids[self.src[row]],
+            dst_id=self.node_ids[self.dst[row]],
+            rtt_ms=float(self.rtt_ms[row]),
+            packet_loss=float(self.packet_loss[row]),
+            congestion_level=float(self.congestion[row]),
+        )
+
+    def to_models(self, start: int = 0, stop: Optional[int] = None) -> List[Link]:
+        """Materialize Link models for rows [start, stop) only"""
+        rows = range(len(self))[start:stop]
+        if len(rows) == 0:
+            return []
+        src = self.src[rows.start:rows.stop].tolist()
+        dst = self.dst[rows.start:rows.stop].tolist()
+        rtt = self.rtt_ms[rows.start:rows.stop].tolist()
+        loss = self.packet_loss[rows.start:rows.stop].tolist()
+        congestion = self.congestion[rows.start:rows.stop].tolist()
+        return [
+            Link(
+                id=f"link_{row}",
+                src_id=self.node_ids[s],
+                dst_id=self.node_ids[d],
+                rtt_ms=r,
+                packet_loss=p,
+                congestion_level=c,
+            )
+            for row, s, d, r, p, c in zip(rows, src, dst, rtt, loss, congestion)
+        ]
@@ -0,0 +1,49 @@
+"""Experience replay for offline agent training"""
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring buffer of (state, action, reward, next_state, done)
+    transitions stored as preallocated arrays, so adding a batch from K
+    environments and sampling a minibatch are single NumPy operations.
+    """
+
+    def __init__(self, capacity: int, state_dim: int, seed: Optional[int] = None):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.rng = np.random.default_rng(seed)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Append one transition per row; the oldest are overwritten once full"""
+        count = len(actions)
+        rows = (self._next + np.arange(count)) % self.capacity
+        self.states[rows] = states
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        self.next_states[rows] = next_states
+        self.dones[rows] = dones
+        self._next = int((self._next + count) % self.capacity)
+        self._size = min(self.capacity, self._size + count)
+
+    def sample(self, batch_size: int) -> Dict[str, np.ndarray]:
+        """Uniform minibatch (with replacement) of stored transitions"""
+        rows = self.rng.integers(0, self._size, size=batch_size)
+        return {
+            "states": self.states[rows],
+            "actions": self.actions[rows],
+            "rewards": self.rewards[rows],
+            "next_states": self.next_states[rows],
+            "dones": self.dones[rows],
+        }
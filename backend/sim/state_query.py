@@ -0,0 +1,253 @@
+"""
+Partial views of the World for /api/sim/state
+
+A query selects sections (and optionally fields within them), filters nodes
+by region or bounding box, and pages every list section with an opaque
+cursor. Only the rows and fields that end up in the response are turned
+into dicts; links are filtered and sliced on the LinkTable arrays.
+
+Nodes and links are fixed when the World is initialized, so their cursor
+positions are row offsets. Pending jobs and active routes come and go
+between pages; their cursor positions are the arrival / routing sequence
+number of the last row returned, so later pages neither skip nor repeat
+rows that are still there (rows added since are included).
+"""
+import base64
+import binascii
+import itertools
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .types import Job, Node, RoutingDecision
+from .world import TOPOLOGY, World
+
+LIST_SECTIONS = ("nodes", "links", "pending_jobs", "active_routes")
+SECTIONS = ("time_s", "metrics") + LIST_SECTIONS
+LINK_FIELDS = ("id", "src_id", "dst_id", "rtt_ms", "packet_loss", "congestion_level")
+SECTION_FIELDS = {
+    "metrics": {"avg_latency_ms", "slo_violation_rate"},
+    "nodes": set(Node.model_fields),
+    "links": set(LINK_FIELDS),
+    "pending_jobs": set(Job.model_fields),
+    "active_routes": set(RoutingDecision.model_fields),
+}
+
+
+@dataclass
+class StateQuery:
+    sections: Tuple[str, ...] = SECTIONS
+    # section -> fields to keep (sections not listed keep every field)
+    fields: Dict[str, Set[str]] = field(default_factory=dict)
+    region: Optional[str] = None
+    bbox: Optional[Tuple[float, float, float, float]] = None  # min_lon, min_lat, max_lon, max_lat
+    limit: Optional[int] = None  # Rows per list section per page
+    # section -> cursor position: row offset (nodes, links) or last sequence number seen (pending_jobs, active_routes)
+    offsets: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def filters_nodes(self) -> bool:
+        return self.region is not None or self.bbox is not None
+
+
+def parse_fields(value: Optional[str]) -> Tuple[Tuple[str, ...], Dict[str, Set[str]]]:
+    """'nodes,links.id,links.rtt_ms' -> (("nodes", "links"), {"links": {"id", "rtt_ms"}})"""
+    if not value:
+        return SECTIONS, {}
+    sections: List[str] = []
+    fields: Dict[str, Set[str]] = {}
+    for item in (part.strip() for part in value.split(",")):
+        if not item:
+            continue
+        section, _, name = item.partition(".")
+        if section not in SECTIONS or (name and name not in SECTION_FIELDS.get(section, ())):
+            raise ValueError(f"Unknown field '{item}'")
+        if section not in sections:
+            sections.append(section)
+        if name:
+            fields.setdefault(section, set()).add(name)
+    return tuple(sections), fields
+
+
+def parse_bbox(value: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """'min_lon,min_lat,max_lon,max_lat'; min_lon > max_lon crosses the antimeridian"""
+    if not value:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    if min_lat > max_lat:
+        raise ValueError("bbox min_lat is greater than max_lat")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def encode_cursor(offsets: Dict[str, int]) -> str:
+    raw = json.dumps(offsets, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        offsets = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(offsets, dict) or not all(
+        section in LIST_SECTIONS and isinstance(offset, int) and offset >= 0
+        for section, offset in offsets.items()
+    ):
+        raise ValueError("Invalid cursor")
+    return offsets
+
+
+def build_query(
+    fields: Optional[str] = None,
+    region: Optional[str] = None,
+    bbox: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> StateQuery:
+    """Query from request parameters (raises ValueError on bad input)"""
+    sections, projections = parse_fields(fields)
+    offsets: Dict[str, int] = {}
+    if cursor:
+        offsets = decode_cursor(cursor)
+        # A cursor continues only the list sections that had rows left
+        sections = tuple(section for section in sections if section not in LIST_SECTIONS or section in offsets)
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    return StateQuery(
+        sections=sections,
+        fields=projections,
+        region=region,
+        bbox=parse_bbox(bbox),
+        limit=limit,
+        offsets=offsets,
+    )
+
+
+def _project(row: Dict, names: Optional[Set[str]]) -> Dict:
+    return row if names is None else {name: value for name, value in row.items() if name in names}
+
+
+def _node_mask(world: World, query: StateQuery) -> Optional[np.ndarray]:
+    """Selected nodes as a mask over world.links.node_ids (None = all nodes)"""
+    if not query.filters_nodes:
+        return None
+    node_ids = world.links.node_ids
+    mask = np.ones(len(node_ids), dtype=bool)
+    if query.region is not None:
+        mask &= np.array([world.nodes[node_id].region == query.region for node_id in node_ids], dtype=bool)
+    if query.bbox is not None:
+        lat, lon = _node_coordinates(world)
+        min_lon, min_lat, max_lon, max_lat = query.bbox
+        in_lon = (lon >= min_lon) & (lon <= max_lon) if min_lon <= max_lon else (lon >= min_lon) | (lon <= max_lon)
+        mask &= in_lon & (lat >= min_lat) & (lat <= max_lat)
+    return mask
+
+
+def _node_coordinates(world: World) -> Tuple[np.ndarray, np.ndarray]:
+    """Lat/lon for every node in world.links.node_ids order (NaN when unknown)"""
+    from services.trajectory import get_positions_source
+
+    index = world.links.node_index
+    lat = np.full(len(index), np.nan)
+    lon = np.full(len(index), np.nan)
+    for site in TOPOLOGY["groundSites"] + TOPOLOGY["gateways"]:
+        if site["id"] in index:
+            lat[index[site["id"]]] = site["lat"]
+            lon[index[site["id"]]] = site["lon"]
+    if world.satellites:
+        # LEO nodes are leo_<i> for satellite i; place them at the subpoint for the World's clock
+        propagation = get_positions_source(world.satellites).propagate(world.clock or datetime.now(timezone.utc))
+        rows = np.array([index[f"leo_{i}"] for i in range(len(world.satellites))])
+        ok = propagation.ok[:, 0]
+        lat[rows[ok]] = propagation.lat_deg[ok, 0]
+        lon[rows[ok]] = propagation.lon_deg[ok, 0]
+    return lat, lon
+
+
+def query_state(world: World, query: StateQuery) -> Dict:
+    """Evaluate a query against the world; list sections are paged and a next_cursor returned"""
+    result: Dict = {}
+    next_offsets: Dict[str, int] = {}
+    with world._lock:
+        node_mask = _node_mask(world, query)
+        selected_ids = (
+            None if node_mask is None
+            else {world.links.node_ids[i] for i in np.flatnonzero(node_mask).tolist()}
+        )
+
+        def page(section: str, rows) -> List:
+            """Slice [offset, offset + limit) from an iterable of rows, noting whether more remain"""
+            start = query.offsets.get(section, 0)
+            stop = None if query.limit is None else start + query.limit
+            items = list(itertools.islice(rows, start, None if stop is None else stop + 1))
+            if stop is not None and len(items) > query.limit:
+                items = items[:query.limit]
+                next_offsets[section] = stop
+            return items
+
+        def sequenced_page(section: str, rows) -> List:
+            """Up to limit rows from an iterable of (sequence, row) after the cursor's sequence number"""
+            items = list(itertools.islice(rows, None if query.limit is None else query.limit + 1))
+            if query.limit is not None and len(items) > query.limit:
+                items = items[:query.limit]
+                next_offsets[section] = items[-1][0]
+            return [row for _, row in items]
+
+        for section in query.sections:
+            names = query.fields.get(section)
+            if section == "time_s":
+                result["time_s"] = world.time_s
+            elif section == "metrics":
+                result["metrics"] = _project(world.get_performance_metrics(), names)
+            elif section == "nodes":
+                nodes = (node for node in world.nodes.values() if selected_ids is None or node.id in selected_ids)
+                result["nodes"] = [node.model_dump(include=names) for node in page(section, nodes)]
+            elif section == "links":
+                result["links"] = _links_page(world, query, node_mask, names, next_offsets)
+            elif section == "pending_jobs":
+                jobs = world.jobs.items_after(query.offsets.get(section, -1))
+                if query.region is not None:
+                    jobs = ((seq, job) for seq, job in jobs if job.region == query.region)
+                result["pending_jobs"] = [job.model_dump(include=names) for job in sequenced_page(section, jobs)]
+            elif section == "active_routes":
+                routes = world.routes_after(query.offsets.get(section, -1))
+                if selected_ids is not None:
+                    routes = ((seq, route) for seq, route in routes if route.target_node_id in selected_ids)
+                result["active_routes"] = [route.model_dump(include=names) for route in sequenced_page(section, routes)]
+
+    # Later pages only continue the sections that still have rows
+    result["next_cursor"] = encode_cursor(next_offsets) if next_offsets else None
+    return result
+
+
+def _links_page(world: World, query: StateQuery, node_mask, names: Optional[Set[str]], next_offsets: Dict[str, int]) -> List[Dict]:
+    links = world.links
+    rows = np.arange(len(links))
+    if node_mask is not None:
+        rows = rows[node_mask[links.src] | node_mask[links.dst]]
+    start = query.offsets.get("links", 0)
+    stop = len(rows) if query.limit is None else min(len(rows), start + query.limit)
+    if stop < len(rows):
+        next_offsets["links"] = stop
+    rows = rows[start:stop]
+
+    wanted = [name for name in LINK_FIELDS if names is None or name in names]
+    columns = {}
+    for name in wanted:
+        if name == "id":
+            columns[name] = [f"link_{row}" for row in rows.tolist()]
+        elif name in ("src_id", "dst_id"):
+            endpoints = links.src if name == "src_id" else links.dst
+            columns[name] = [links.node_ids[i] for i in endpoints[rows].tolist()]
+        elif name == "congestion_level":
+            columns[name] = links.congestion[rows].tolist()
+        else:
+            columns[name] = getattr(links, name)[rows].tolist()
+    return [dict(zip(wanted, values)) for values in zip(*(columns[name] for name in wanted))] if wanted else []
@@ -30,6 +30,8 @@ class Job(BaseModel):
     latency_slo_ms: float
     deadline_s: float
     jitter_tolerance_ms: float
+    job_class: Optional[str] = None
+    region: Optional[str] = None  # Set for regional surge traffic
 
 
 class RoutingDecision(BaseModel):
@@ -38,6 +40,12 @@ class RoutingDecision(BaseModel):
     source: Literal["agent", "rule_based"]
 
 
+class RoutingBatchResult(BaseModel):
+    decisions: List[RoutingDecision]
+    pending_jobs: int  # Still pending after the batch
+    elapsed_ms: float
+
+
 class SimSnapshot(BaseModel):
     time_s: float
     nodes: List[Node]
@@ -0,0 +1,267 @@
+"""
+Vectorized FailureEnvV1 rollouts for offline training
+
+K independent World clones, each driven by its own EventEngine on simulated
+time (jobs arrive and are routed, random failures come and go), step in
+lockstep: actions go in as one (K,) array and states, rewards and done flags
+come back as batched arrays. With workers > 0 the clones are split across
+spawned processes that step in parallel.
+
+Episodes restart automatically with a fresh World and new failures. Training
+never touches the live world_instance; load the resulting weights into the
+live FailureAgent to evaluate them (FAILURE_AGENT_WEIGHTS).
+"""
+import asyncio
+import multiprocessing
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .agent_failure import FailureAgent
+from .env_failure import FailureEnvV1
+from .events import EventEngine
+from .replay import ReplayBuffer
+from .workload import WorkloadSampler
+from .world import TOPOLOGY, World
+
+STATE_DIM = 4
+
+# Failures injected into training episodes: fiber cut between two ground
+# regions, all LEO nodes offline, or a 3x regional load surge
+FAILURE_KINDS = ("fiber_cut", "leo_outage", "load_surge")
+GROUND_REGIONS = sorted({site["region"] for site in TOPOLOGY["groundSites"]})
+
+
+@dataclass
+class FailureEnvConfig:
+    window_size: int = 5
+    episode_steps: int = 600  # Steps (simulated seconds) per episode
+    warmup_s: float = 30.0  # Simulated before the first observation, so routes exist
+    jobs_per_rate_unit: float = 20.0  # Lighter traffic than the live world (100) keeps steps cheap
+    failures_per_episode: int = 2
+    min_failure_s: float = 30.0
+    max_failure_s: float = 300.0
+    start: Optional[str] = None  # ISO 8601 start of simulated time, default now (UTC)
+
+
+class _FailureSim:
+    """One environment: a World, its EventEngine and a FailureEnvV1 on top"""
+
+    def __init__(self, satellites: List, config: FailureEnvConfig, seed: int):
+        self.satellites = satellites
+        self.config = config
+        self.rng = np.random.default_rng(seed)
+        self.start = datetime.fromisoformat(config.start) if config.start else datetime.now(timezone.utc)
+        if self.start.tzinfo is None:
+            self.start = self.start.replace(tzinfo=timezone.utc)
+        self.steps = 0
+        self.env: Optional[FailureEnvV1] = None
+
+    def reset(self) -> np.ndarray:
+        config = self.config
+        seed = int(self.rng.integers(2**31))
+        world = World(seed=seed)
+        world.workload = WorkloadSampler(seed, jobs_per_rate_unit=config.jobs_per_rate_unit)
+        asyncio.run(world.initialize(self.satellites))
+        engine = EventEngine(world, start=self.start, seed=seed)
+        self._schedule_failures(engine)
+        engine.run_until(config.warmup_s)
+
+        self.env = FailureEnvV1(
+            world,
+            window_size=config.window_size,
+            advance=lambda dt: engine.run_until(engine.now_s + dt),
+        )
+        self.steps = 0
+        state, _ = self.env.reset()
+        return state
+
+    def _schedule_failures(self, engine: EventEngine):
+        config = self.config
+        end_s = config.warmup_s + config.episode_steps
+        for _ in range(config.failures_per_episode):
+            at_s = float(self.rng.uniform(0.0, end_s))
+            duration_s = float(self.rng.uniform(config.min_failure_s, config.max_failure_s))
+            kind = FAILURE_KINDS[self.rng.integers(len(FAILURE_KINDS))]
+            if kind == "fiber_cut":
+                region_a, region_b = self.rng.choice(GROUND_REGIONS, size=2, replace=False).tolist()
+                engine.schedule_fiber_cut(at_s, region_a, region_b, duration_s)
+            elif kind == "leo_outage":
+                engine.schedule_shell_outage(at_s, "training_shell", "orbit", duration_s)
+            else:
+                engine.schedule_load(at_s, str(self.rng.choice(GROUND_REGIONS)), 3.0, duration_s)
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, np.ndarray, Tuple[float, float]]:
+        """(next_state, reward, done, state to act on next, (avg_latency_ms, slo_violation_rate))"""
+        next_state, reward, _, info = self.env.step(action)
+        self.steps += 1
+        done = self.steps >= self.config.episode_steps
+        metrics = info["metrics"]
+        return (
+            next_state,
+            reward,
+            done,
+            self.reset() if done else next_state,
+            (metrics["avg_latency_ms"], metrics["slo_violation_rate"]),
+        )
+
+
+class _LocalFailureEnvs:
+    """Lockstep stepping of several _FailureSim in this process"""
+
+    def __init__(self, make_satellites: Callable[[], List], config: FailureEnvConfig, seeds: List[int]):
+        satellites = make_satellites()
+        self.sims = [_FailureSim(satellites, config, seed) for seed in seeds]
+
+    def reset(self) -> np.ndarray:
+        return np.stack([sim.reset() for sim in self.sims])
+
+    def step(self, actions: np.ndarray):
+        results = [sim.step(int(action)) for sim, action in zip(self.sims, actions)]
+        next_states, rewards, dones, states, metrics = zip(*results)
+        return (
+            np.stack(next_states),
+            np.array(rewards, dtype=np.float32),
+            np.array(dones, dtype=bool),
+            np.stack(states),
+            np.array(metrics, dtype=np.float64),
+        )
+
+
+def _worker_main(conn, make_satellites, config, seeds):
+    """Process loop: hold a slice of the environments and answer reset / step / close"""
+    envs = _LocalFailureEnvs(make_satellites, config, seeds)
+    while True:
+        command, payload = conn.recv()
+        if command == "reset":
+            conn.send(envs.reset())
+        elif command == "step":
+            conn.send(envs.step(payload))
+        else:
+            conn.close()
+            return
+
+
+class VecFailureEnv:
+    """
+    K FailureEnvV1 environments on cloned Worlds, stepped together.
+
+    make_satellites builds the constellation (it runs in every worker process
+    with workers > 0, so it must be picklable, e.g. a module-level function or
+    functools.partial). Environment k is seeded from seed + k.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        make_satellites: Callable[[], List],
+        config: Optional[FailureEnvConfig] = None,
+        seed: int = 0,
+        workers: int = 0,
+    ):
+        self.num_envs = num_envs
+        self.config = config or FailureEnvConfig()
+        seeds = [seed + k for k in range(num_envs)]
+        self._local: Optional[_LocalFailureEnvs] = None
+        self._workers = []
+        if workers <= 0:
+            self._local = _LocalFailureEnvs(make_satellites, self.config, seeds)
+        else:
+            # Spawned workers, as in SimWorker and batch_sim sweeps
+            context = multiprocessing.get_context("spawn")
+            for chunk in np.array_split(np.arange(num_envs), min(workers, num_envs)):
+                parent, child = context.Pipe()
+                process = context.Process(
+                    target=_worker_main,
+                    args=(child, make_satellites, self.config, [seeds[k] for k in chunk.tolist()]),
+                    daemon=True,
+                )
+                process.start()
+                child.close()
+                self._workers.append((parent, process, chunk))
+        self.states = np.zeros((num_envs, STATE_DIM), dtype=np.float32)
+
+    def reset(self) -> np.ndarray:
+        if self._local is not None:
+            self.states = self._local.reset()
+        else:
+            for conn, _, _ in self._workers:
+                conn.send(("reset", None))
+            self.states = np.concatenate([conn.recv() for conn, _, _ in self._workers])
+        return self.states
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict]:
+        """
+        Apply one action per environment. Returns (next_states, rewards, dones,
+        info); environments that finished an episode are reset, and
+        self.states holds the states to act on next.
+        """
+        actions = np.asarray(actions)
+        if self._local is not None:
+            next_states, rewards, dones, states, metrics = self._local.step(actions)
+        else:
+            for conn, _, chunk in self._workers:
+                conn.send(("step", actions[chunk]))
+            parts = [conn.recv() for conn, _, _ in self._workers]
+            next_states, rewards, dones, states, metrics = (np.concatenate(column) for column in zip(*parts))
+        self.states = states
+        return next_states, rewards, dones, {"avg_latency_ms": metrics[:, 0], "slo_violation_rate": metrics[:, 1]}
+
+    def close(self):
+        for conn, process, _ in self._workers:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=5)
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def train_failure_agent(
+    agent: FailureAgent,
+    vec_env: VecFailureEnv,
+    steps: int,
+    replay: Optional[ReplayBuffer] = None,
+    batch_size: int = 256,
+    updates_per_step: int = 1,
+    learning_starts: int = 1000,
+) -> Dict:
+    """
+    Collect `steps` lockstep steps (steps * K transitions) into the replay
+    buffer and train the agent on uniformly sampled minibatches.
+    """
+    replay = replay or ReplayBuffer(capacity=100_000, state_dim=STATE_DIM)
+    states = vec_env.reset()
+    rewards_total = 0.0
+    td_errors: List[float] = []
+    started = time.perf_counter()
+    for _ in range(steps):
+        actions = agent.select_actions(states)
+        next_states, rewards, dones, _ = vec_env.step(actions)
+        replay.add_batch(states, actions, rewards, next_states, dones)
+        rewards_total += float(rewards.sum())
+        states = vec_env.states
+        if len(replay) >= learning_starts:
+            for _ in range(updates_per_step):
+                batch = replay.sample(batch_size)
+                td_errors.append(agent.update_batch(
+                    batch["states"], batch["actions"], batch["rewards"], batch["next_states"], batch["dones"]
+                ))
+    wall_s = time.perf_counter() - started
+    transitions = steps * vec_env.num_envs
+    return {
+        "transitions": transitions,
+        "wall_s": round(wall_s, 3),
+        "transitions_per_s": round(transitions / wall_s, 1) if wall_s > 0 else None,
+        "mean_reward": rewards_total / transitions if transitions else 0.0,
+        "mean_td_error": float(np.mean(td_errors[-100:])) if td_errors else None,
+    }
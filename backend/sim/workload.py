@@ -0,0 +1,133 @@
+"""Batched workload sampling shared by World.generate_jobs and main.generate_jobs"""
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .types import Job
+
+# Jobs per unit of hourly arrival rate, per tick
+JOBS_PER_RATE_UNIT = 100
+
+
+def seed_from_env() -> Optional[int]:
+    """Sampler seed from WORKLOAD_SEED (unset = nondeterministic)"""
+    value = os.getenv("WORKLOAD_SEED")
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        print(f"[Workload] Ignoring invalid WORKLOAD_SEED={value!r}")
+        return None
+
+
+@dataclass
+class JobBatch:
+    """One tick of sampled jobs as columns (row i is one job)"""
+    class_index: np.ndarray  # int, into class_names
+    size_gb: np.ndarray
+    deadline_ms: np.ndarray
+    region_index: np.ndarray  # int, into regions (-1 = no region)
+    class_names: List[str]
+    regions: List[str]
+
+    def __len__(self) -> int:
+        return len(self.size_gb)
+
+    def class_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.class_index, minlength=len(self.class_names))
+        return dict(zip(self.class_names, counts.tolist()))
+
+    def to_jobs(self, first_id: int) -> List[Job]:
+        """Job models with ids job_<first_id>, job_<first_id + 1>, ..."""
+        region_names = self.regions + [None]  # index -1 -> None
+        class_names = self.class_names
+        return [
+            # Values come straight from the sampler, so skip validation
+            Job.model_construct(
+                id=f"job_{first_id + i}",
+                size_gb=size_gb,
+                flops=size_gb * 1e9 * 1000,  # Rough estimate
+                latency_slo_ms=deadline_ms,
+                deadline_s=deadline_ms / 1000.0,
+                jitter_tolerance_ms=deadline_ms * 0.1,
+                job_class=class_names[class_index],
+                region=region_names[region_index],
+            )
+            for i, (size_gb, deadline_ms, class_index, region_index) in enumerate(zip(
+                self.size_gb.tolist(),
+                self.deadline_ms.tolist(),
+                self.class_index.tolist(),
+                self.region_index.tolist(),
+            ))
+        ]
+
+
+class WorkloadSampler:
+    """
+    Draws a whole tick of jobs from a workload profile with NumPy.
+
+    Class labels come from the profile's class fractions and sizes from each
+    class's size distribution (lognormal, anything else = 1 GB). Pass a seed
+    for reproducible job streams; jobs_per_rate_unit scales traffic (lighter
+    streams make offline training runs cheaper).
+    """
+
+    def __init__(self, seed: Optional[int] = None, jobs_per_rate_unit: float = JOBS_PER_RATE_UNIT):
+        self.rng = np.random.default_rng(seed)
+        self.jobs_per_rate_unit = jobs_per_rate_unit
+
+    def sample(self, profile: Dict, count: int) -> JobBatch:
+        """Sample `count` jobs without a region"""
+        return self._sample(profile, np.full(count, -1, dtype=np.int32), [])
+
+    def sample_tick(
+        self,
+        profile: Dict,
+        hour: int,
+        regional_multipliers: Optional[Dict[str, float]] = None,
+    ) -> JobBatch:
+        """
+        Jobs arriving in one tick at the given hour.
+
+        Baseline arrivals (rate * jobs_per_rate_unit) carry no region. Each
+        region with a multiplier m adds its own surge of (m - 1) times the
+        baseline, tagged with that region, so multipliers combine per region.
+        """
+        base = profile["hourly_arrival_rates"][hour % 24] * self.jobs_per_rate_unit
+        regions = []
+        counts = [int(base)]
+        for region, multiplier in (regional_multipliers or {}).items():
+            surge = int(base * max(0.0, multiplier - 1.0))
+            if surge:
+                regions.append(region)
+                counts.append(surge)
+        region_index = np.repeat(np.arange(-1, len(regions), dtype=np.int32), counts)
+        return self._sample(profile, region_index, regions)
+
+    def _sample(self, profile: Dict, region_index: np.ndarray, regions: List[str]) -> JobBatch:
+        classes = profile["job_classes"]
+        count = len(region_index)
+        weights = np.array([jc["fraction"] for jc in classes], dtype=np.float64)
+        class_index = np.searchsorted(
+            np.cumsum(weights), self.rng.random(count) * weights.sum(), side="right"
+        ).clip(max=len(classes) - 1)
+
+        lognormal = np.array([jc["size_dist"]["type"] == "lognormal" for jc in classes])
+        mu = np.array([jc["size_dist"].get("mu", 0.0) for jc in classes], dtype=np.float64)
+        sigma = np.array([jc["size_dist"].get("sigma", 0.0) for jc in classes], dtype=np.float64)
+        deadline_ms = np.array([jc["deadline_ms"] for jc in classes], dtype=np.float64)
+
+        size_gb = np.exp(mu[class_index] + sigma[class_index] * self.rng.standard_normal(count))
+        size_gb[~lognormal[class_index]] = 1.0
+
+        return JobBatch(
+            class_index=class_index,
+            size_gb=size_gb,
+            deadline_ms=deadline_ms[class_index],
+            region_index=region_index,
+            class_names=[jc["name"] for jc in classes],
+            regions=regions,
+        )
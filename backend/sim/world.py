@@ -1,15 +1,21 @@
 """World simulation engine - wraps existing sim logic"""
-import asyncio
+import heapq
 import json
 import math
-import random
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Sequence, Tuple
 import httpx
 
+import numpy as np
 from skyfield.api import load, EarthSatellite
-from .types import SimSnapshot, Node, Link, Job, RoutingDecision, NodeType
+from .types import SimSnapshot, Node, Job, RoutingDecision, NodeType
+from .link_table import LinkTable
+from .job_queue import DEFAULT_MAX_PENDING, JobQueue
+from .workload import WorkloadSampler
+from .history import DEFAULT_HISTORY_SIZE, PerformanceHistory
 
 # Import existing topology and workload profile
 TOPOLOGY = {
@@ -65,29 +71,71 @@ def haversine(lat1, lon1, lat2, lon2):
     return R * c
 
 
+# Cap on in-flight routes; beyond it the oldest are dropped
+DEFAULT_MAX_ACTIVE_ROUTES = 50_000
+
+
 class World:
     """World simulation engine"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_pending_jobs: int = DEFAULT_MAX_PENDING,
+        max_active_routes: int = DEFAULT_MAX_ACTIVE_ROUTES,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+        history_spill_path: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
         self.satellites: List[EarthSatellite] = []
         self.ts = load.timescale()
         self.time_s = 0.0
-        self.pending_jobs: List[Job] = []
-        self.active_routes: List[RoutingDecision] = []
+        # Pending jobs, indexed by id and ordered by deadline; routed jobs stay
+        # retrievable for as long as their route can be active
+        self.jobs = JobQueue(max_pending=max_pending_jobs, routed_retention=max_active_routes)
+        # In-flight routes by job id, in routing order; each completes once its
+        # node has worked through the job (see route_job / complete_routes)
+        self.max_active_routes = max_active_routes
+        self._routes: "OrderedDict[str, RoutingDecision]" = OrderedDict()
+        self._completions: List[tuple] = []  # (finish_s, seq, job_id) heap
+        self._node_busy_until = np.zeros(0)  # By node index (links.node_index)
+        self._route_seq = 0
+        self.completed_jobs = 0
+        self.evicted_routes = 0
+        # Running totals behind get_performance_metrics: job id -> (latency estimate, SLO violated)
+        self._route_estimates: Dict[str, tuple] = {}
+        # Routing sequence number per active route (see routes_after)
+        self._route_seqs: Dict[str, int] = {}
+        self._route_latency_total = 0.0
+        self._route_violations = 0
         self.nodes: Dict[str, Node] = {}
-        self.links: Dict[str, Link] = {}
+        self.links = LinkTable([])
         self.job_counter = 0
+        self.workload = WorkloadSampler(seed)
         self.regional_load_multipliers: Dict[str, float] = {}
         self.fiber_cuts: List[tuple] = []  # List of (region_a, region_b) pairs
         self.disabled_shells: Dict[str, str] = {}  # shell_id -> region
-        self.performance_history: List[Dict] = []
-        self._lock = asyncio.Lock()
+        # Routable nodes as arrays, rebuilt only when nodes, shells or fiber cuts change
+        self._candidates: Optional[Dict[str, object]] = None
+        self._candidate_lists: Dict[tuple, Tuple[Node, ...]] = {}
+        # Link aggregates for routing state, taken at most once per tick (see link_stats)
+        self._link_stats: Optional[np.ndarray] = None
+        # Wall-clock time of the last job sample, and the sunlit flags at that time (see node_sunlit)
+        self.clock: Optional[datetime] = None
+        self._sunlit: Optional[np.ndarray] = None
+        self.performance_history = PerformanceHistory(history_size, history_spill_path)
+        # advance_time runs in a worker thread while /api/sim routes run in the
+        # request threadpool; every mutation and snapshot goes through this lock
+        self._lock = threading.RLock()
         
     async def initialize(self, satellites: List[EarthSatellite]):
         """Initialize world with satellites"""
-        self.satellites = satellites
-        self._build_nodes()
-        self._build_links()
+        with self._lock:
+            self.satellites = satellites
+            self._build_nodes()
+            self._build_links()
+            self.invalidate_candidates()
+            self._link_stats = None
+            self._sunlit = None
         
     def _build_nodes(self):
         """Build node list from topology and satellites"""
@@ -130,205 +178,377 @@ class World:
             self.nodes[f"leo_{i}"] = node
     
     def _build_links(self):
-        """Build link list between nodes"""
-        self.links = {}
-        link_id = 0
+        """Build link table between nodes"""
+        old_index, old_busy_until = self.links.node_index, self._node_busy_until
+        self.links = LinkTable(list(self.nodes))
+        self._node_busy_until = np.zeros(len(self.links.node_ids))
+        for node_id, i in old_index.items():
+            if node_id in self.links.node_index:
+                self._node_busy_until[self.links.node_index[node_id]] = old_busy_until[i]
+        gateway_idx = self.links.node_indices([gw["id"] for gw in TOPOLOGY["gateways"]])
         
         # Links between LEO sats and gateways (simplified)
-        for i in range(len(self.satellites)):
-            leo_id = f"leo_{i}"
-            for gw in TOPOLOGY["gateways"]:
-                link = Link(
-                    id=f"link_{link_id}",
-                    src_id=leo_id,
-                    dst_id=gw["id"],
-                    rtt_ms=50.0,  # Simplified
-                    packet_loss=0.001,
-                    congestion_level=0.0,
-                )
-                self.links[f"link_{link_id}"] = link
-                link_id += 1
+        leo_idx = self.links.node_indices([f"leo_{i}" for i in range(len(self.satellites))])
+        self.links.add_links(
+            src=np.repeat(leo_idx, len(gateway_idx)),
+            dst=np.tile(gateway_idx, len(leo_idx)),
+            rtt_ms=50.0,  # Simplified
+            packet_loss=0.001,
+        )
                 
         # Links between gateways and ground sites
+        src, dst, rtts = [], [], []
         for gw in TOPOLOGY["gateways"]:
             for site in TOPOLOGY["groundSites"]:
                 dist_km = haversine(gw["lat"], gw["lon"], site["lat"], site["lon"])
-                rtt_ms = (dist_km / 300000.0) * 1000.0  # Speed of light
-                
-                link = Link(
-                    id=f"link_{link_id}",
-                    src_id=gw["id"],
-                    dst_id=site["id"],
-                    rtt_ms=rtt_ms,
-                    packet_loss=0.0001,
-                    congestion_level=0.0,
-                )
-                self.links[f"link_{link_id}"] = link
-                link_id += 1
-    
-    def get_snapshot(self) -> SimSnapshot:
-        """Get current simulation snapshot"""
-        return SimSnapshot(
-            time_s=self.time_s,
-            nodes=list(self.nodes.values()),
-            links=list(self.links.values()),
-            pending_jobs=self.pending_jobs.copy(),
-            active_routes=self.active_routes.copy(),
+                src.append(self.links.node_index[gw["id"]])
+                dst.append(self.links.node_index[site["id"]])
+                rtts.append((dist_km / 300000.0) * 1000.0)  # Speed of light
+        self.links.add_links(src=src, dst=dst, rtt_ms=rtts, packet_loss=0.0001)
+        
+        # Carry existing routes over to the new table
+        self._record_route_targets(list(self._routes.values()))
+    
+    def _record_route_targets(self, routes: List[RoutingDecision], delta: int = 1):
+        """Update per-node route counters for routes whose target is still a node"""
+        node_index = self.links.node_index
+        self.links.record_routes(
+            [node_index[route.target_node_id] for route in routes if route.target_node_id in node_index],
+            delta,
         )
     
-    def get_candidate_nodes_for_job(self, job_id: str) -> List[Node]:
-        """Get candidate nodes for routing a job"""
-        job = next((j for j in self.pending_jobs if j.id == job_id), None)
-        if not job:
-            return []
+    def get_snapshot(self, link_offset: int = 0, link_limit: Optional[int] = None) -> SimSnapshot:
+        """Get current simulation snapshot
         
-        # Filter nodes by capacity and type
-        # Only ground sites and LEO satellites can compute (not gateways)
-        candidates = []
-        for node in self.nodes.values():
-            # Skip gateways (they don't compute)
-            if node.id in [gw["id"] for gw in TOPOLOGY["gateways"]]:
-                continue
-            # Check if node is disabled
-            if node.node_type == "leo" and node.region in self.disabled_shells.values():
-                continue
-            # Only include nodes with capacity
-            if node.capacity_flops > 0:
-                candidates.append(node)
-        
-        return candidates
+        Links are materialized only for rows [link_offset, link_offset + link_limit)
+        (all of them when link_limit is None).
+        """
+        link_stop = None if link_limit is None else link_offset + link_limit
+        with self._lock:
+            return SimSnapshot(
+                time_s=self.time_s,
+                nodes=list(self.nodes.values()),
+                links=self.links.to_models(link_offset, link_stop),
+                pending_jobs=self.jobs.to_list(),
+                active_routes=list(self._routes.values()),
+            )
     
-    def route_job(self, job_id: str, node_id: str) -> Dict:
-        """Route a job to a node and return metrics"""
-        job = next((j for j in self.pending_jobs if j.id == job_id), None)
-        if not job:
-            return {"error": "job_not_found"}
-        
-        node = self.nodes.get(node_id)
-        if not node:
-            return {"error": "node_not_found"}
-        
-        # Remove from pending
-        self.pending_jobs = [j for j in self.pending_jobs if j.id != job_id]
-        
-        # Calculate latency (simplified)
+    @property
+    def active_routes(self) -> List[RoutingDecision]:
+        """In-flight routes in routing order (a copy)"""
+        with self._lock:
+            return list(self._routes.values())
+    
+    def routes_after(self, seq: int) -> Iterator[Tuple[int, RoutingDecision]]:
+        """(routing sequence, route) for active routes started after sequence `seq`, in routing order (hold _lock)"""
+        for job_id, route in self._routes.items():
+            route_seq = self._route_seqs[job_id]
+            if route_seq > seq:
+                yield route_seq, route
+
+    @property
+    def pending_jobs(self) -> List[Job]:
+        """Pending jobs in arrival order (a copy)"""
+        with self._lock:
+            return self.jobs.to_list()
+    
+    def peek_next_job(self) -> Optional[Job]:
+        """Most urgent pending job (earliest deadline)"""
+        with self._lock:
+            return self.jobs.peek()
+    
+    def peek_next_jobs(self, count: int) -> List[Job]:
+        """Up to `count` most urgent pending jobs, earliest deadline first"""
+        with self._lock:
+            return self.jobs.most_urgent(count)
+    
+    def invalidate_candidates(self):
+        """Drop cached candidate sets (call after changing node capacity)"""
+        with self._lock:
+            self._candidates = None
+            self._candidate_lists = {}
+    
+    def link_stats(self) -> np.ndarray:
+        """
+        [avg_rtt_ms, std_rtt_ms, min_rtt_ms, avg_congestion, max_congestion]
+        as of the last tick. Congestion moves with every route, but routing
+        state only needs it per tick, so the O(links) pass runs once per tick
+        instead of once per job; RTT aggregates are cached by the LinkTable.
+        """
+        with self._lock:
+            if self._link_stats is None:
+                self._link_stats = np.concatenate([self.links.rtt_stats(), self.links.congestion_stats()])
+            return self._link_stats
+    
+    def _route_latency_ms(self, node: Node) -> float:
+        """Route latency to a node (simplified): type baseline, doubled per fiber cut on its region"""
         latency_ms = 10.0  # Ground baseline
         if node.node_type == "leo":
             latency_ms = 50.0  # LEO baseline
         
         # Check for fiber cuts affecting this route
-        node_region = node.region
         for cut_a, cut_b in self.fiber_cuts:
-            if node_region in [cut_a, cut_b]:
+            if node.region in [cut_a, cut_b]:
                 latency_ms *= 2.0  # Degraded
+        return latency_ms
+    
+    def _candidate_table(self) -> Dict[str, object]:
+        """Routable nodes with their node index, region, route latency, capacity and price as arrays"""
+        if self._candidates is None:
+            # Only ground sites and LEO satellites can compute (not gateways)
+            gateway_ids = {gw["id"] for gw in TOPOLOGY["gateways"]}
+            disabled_regions = set(self.disabled_shells.values())
+            nodes = [
+                node for node in self.nodes.values()
+                if node.id not in gateway_ids
+                and not (node.node_type == "leo" and node.region in disabled_regions)
+                and node.capacity_flops > 0
+            ]
+            self._candidates = {
+                "nodes": nodes,
+                "index": self.links.node_indices([node.id for node in nodes]),
+                "capacity_flops": np.array([node.capacity_flops for node in nodes], dtype=np.float64),
+                "power_cost_per_kwh": np.array([node.power_cost_per_kwh for node in nodes], dtype=np.float64),
+                "region": np.array([node.region for node in nodes], dtype=object),
+                "node_type": np.array([node.node_type for node in nodes], dtype=object),
+                "latency_ms": np.array([self._route_latency_ms(node) for node in nodes], dtype=np.float64),
+            }
+        return self._candidates
+    
+    def candidate_table(self) -> Dict[str, object]:
+        """Cached candidate arrays, in get_candidate_nodes() order (do not modify)"""
+        with self._lock:
+            return self._candidate_table()
+    
+    def node_queue_wait_s(self) -> np.ndarray:
+        """Seconds until each node (by node index) has worked through its routed jobs"""
+        with self._lock:
+            return np.maximum(self._node_busy_until - self.time_s, 0.0)
+    
+    def node_sunlit(self) -> np.ndarray:
+        """
+        Sunlit flag per node index at the last job sample (ground nodes are
+        always True). Computed lazily and at most once per tick.
+        """
+        with self._lock:
+            if self._sunlit is None:
+                sunlit = np.ones(len(self.links.node_ids), dtype=bool)
+                if self.satellites:
+                    from services.ephemeris import get_sun_ephemeris
+                    from services.eclipse import sunlit_mask
+                    from services.trajectory import get_positions_source
+
+                    now = self.clock or datetime.now(timezone.utc)
+                    propagation = get_positions_source(self.satellites).propagate(now)
+                    ok = propagation.ok[:, 0]
+                    rows = self.links.node_indices([f"leo_{i}" for i in range(len(self.satellites))])
+                    sunlit[rows[ok]] = sunlit_mask(propagation.positions_km[ok, 0], get_sun_ephemeris().sun_vector_km(now))
+                self._sunlit = sunlit
+            return self._sunlit
+    
+    def get_candidate_nodes(
+        self,
+        region: Optional[str] = None,
+        node_type: Optional[str] = None,
+        max_latency_ms: Optional[float] = None,
+    ) -> Sequence[Node]:
+        """
+        Routable nodes, optionally filtered by region, node type and route latency.
+        Each distinct filter is computed once per topology change and cached;
+        the cached tuple itself is returned.
+        """
+        key = (region, node_type, max_latency_ms)
+        with self._lock:
+            cached = self._candidate_lists.get(key)
+            if cached is None:
+                table = self._candidate_table()
+                mask = np.ones(len(table["nodes"]), dtype=bool)
+                if region is not None:
+                    mask &= table["region"] == region
+                if node_type is not None:
+                    mask &= table["node_type"] == node_type
+                if max_latency_ms is not None:
+                    mask &= table["latency_ms"] <= max_latency_ms
+                nodes = table["nodes"]
+                cached = tuple(nodes[i] for i in np.flatnonzero(mask).tolist())
+                self._candidate_lists[key] = cached
+            return cached
+    
+    def get_candidate_nodes_for_job(
+        self,
+        job_id: str,
+        region: Optional[str] = None,
+        node_type: Optional[str] = None,
+        slo_feasible_only: bool = False,
+    ) -> List[Node]:
+        """Get candidate nodes for routing a job (optionally only nodes that can meet its latency SLO)"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return []
+            max_latency_ms = job.latency_slo_ms if slo_feasible_only else None
+            return list(self.get_candidate_nodes(region=region, node_type=node_type, max_latency_ms=max_latency_ms))
+    
+    def route_job(self, job_id: str, node_id: str, source: str = "rule_based") -> Dict:
+        """Route a job to a node and return metrics"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return {"error": "job_not_found"}
         
-        # Calculate cost
-        cost_usd = (job.flops / node.capacity_flops) * (node.power_cost_per_kwh / 1000.0) * 0.1
-        
-        # Check SLO violation
-        slo_violated = latency_ms > job.latency_slo_ms
+            node = self.nodes.get(node_id)
+            if not node:
+                return {"error": "node_not_found"}
         
-        # Create routing decision
-        decision = RoutingDecision(
-            job_id=job_id,
-            target_node_id=node_id,
-            source="rule_based",  # Will be updated by agent
-        )
-        self.active_routes.append(decision)
+            # Remove from pending
+            self.jobs.pop(job_id)
         
-        return {
-            "latency_ms": latency_ms,
-            "cost_usd": cost_usd,
-            "slo_violated": slo_violated,
-        }
-    
-    def generate_jobs(self, now: datetime):
-        """Generate new jobs based on workload profile"""
-        hour = now.hour
-        rate = WORKLOAD_PROFILE["hourly_arrival_rates"][hour % 24]
+            # Calculate latency (simplified)
+            latency_ms = self._route_latency_ms(node)
         
-        # Apply regional load multipliers
-        multiplier = 1.0
-        for region, mult in self.regional_load_multipliers.items():
-            multiplier = max(multiplier, mult)
+            # Calculate cost
+            cost_usd = (job.flops / node.capacity_flops) * (node.power_cost_per_kwh / 1000.0) * 0.1
         
-        num_jobs = int(rate * 100 * multiplier)
+            # Check SLO violation
+            slo_violated = latency_ms > job.latency_slo_ms
         
-        for _ in range(num_jobs):
-            job_class = random.choices(
-                WORKLOAD_PROFILE["job_classes"],
-                weights=[jc["fraction"] for jc in WORKLOAD_PROFILE["job_classes"]],
-            )[0]
-            
-            if job_class["size_dist"]["type"] == "lognormal":
-                mu = job_class["size_dist"]["mu"]
-                sigma = job_class["size_dist"]["sigma"]
-                size_gb = math.exp(random.normalvariate(mu, sigma))
-            else:
-                size_gb = 1.0
-            
-            # Estimate FLOPS from size
-            flops = size_gb * 1e9 * 1000  # Rough estimate
-            
-            job = Job(
-                id=f"job_{self.job_counter}",
-                size_gb=size_gb,
-                flops=flops,
-                latency_slo_ms=job_class["deadline_ms"],
-                deadline_s=job_class["deadline_ms"] / 1000.0,
-                jitter_tolerance_ms=job_class["deadline_ms"] * 0.1,
+            # Create routing decision
+            decision = RoutingDecision(
+                job_id=job_id,
+                target_node_id=node_id,
+                source=source,
             )
-            self.pending_jobs.append(job)
-            self.job_counter += 1
+            self._add_route(decision, job, node)
+        
+            return {
+                "latency_ms": latency_ms,
+                "cost_usd": cost_usd,
+                "slo_violated": slo_violated,
+            }
+    
+    def _add_route(self, decision: RoutingDecision, job: Job, node: Node):
+        """Start a route; the node works through its jobs one at a time at capacity_flops"""
+        index = self.links.node_index[node.id]
+        start_s = max(self.time_s, self._node_busy_until[index])
+        finish_s = start_s + job.flops / node.capacity_flops
+        self._node_busy_until[index] = finish_s
+        heapq.heappush(self._completions, (finish_s, self._route_seq, decision.job_id))
+        self._route_seqs[decision.job_id] = self._route_seq
+        self._route_seq += 1
+        self._routes[decision.job_id] = decision
+        self.links.record_route(index)
+        
+        # Metrics estimate (simplified): ground 10 ms, LEO 50 ms
+        latency = 10.0 if node.node_type == "ground" else 50.0
+        violated = latency > job.latency_slo_ms
+        self._route_estimates[decision.job_id] = (latency, violated)
+        self._route_latency_total += latency
+        self._route_violations += violated
+        
+        while len(self._routes) > self.max_active_routes:
+            _, oldest = self._routes.popitem(last=False)
+            self._release_routes([oldest])
+            self.evicted_routes += 1
+    
+    def _release_routes(self, routes: List[RoutingDecision]):
+        """Undo the congestion and metrics bookkeeping for routes removed from _routes"""
+        self._record_route_targets(routes, delta=-1)
+        for route in routes:
+            latency, violated = self._route_estimates.pop(route.job_id)
+            del self._route_seqs[route.job_id]
+            self._route_latency_total -= latency
+            self._route_violations -= violated
+        if not self._routes:
+            self._route_latency_total = 0.0  # Drop accumulated rounding error
+    
+    def next_completion_s(self) -> Optional[float]:
+        """Earliest scheduled route completion (may belong to a route that is already gone)"""
+        return self._completions[0][0] if self._completions else None
+    
+    def complete_routes(self) -> int:
+        """Retire routes whose job finished by the current time"""
+        finished = []
+        heap = self._completions
+        while heap and heap[0][0] <= self.time_s:
+            _, _, job_id = heapq.heappop(heap)
+            route = self._routes.pop(job_id, None)  # None when rerouted or evicted
+            if route is not None:
+                finished.append(route)
+        if finished:
+            self._release_routes(finished)
+            self.completed_jobs += len(finished)
+        if len(heap) > 2 * len(self._routes) + 1024:
+            # Drop entries for routes that are already gone
+            live = self._routes
+            self._completions = [entry for entry in heap if entry[2] in live]
+            heapq.heapify(self._completions)
+        return len(finished)
+    
+    def sample_jobs(self, now: datetime) -> List[Job]:
+        """One tick of new jobs from the workload profile and regional load multipliers (not queued)"""
+        if self.clock is None or now != self.clock:
+            self.clock = now
+            self._sunlit = None
+        batch = self.workload.sample_tick(WORKLOAD_PROFILE, now.hour, self.regional_load_multipliers)
+        jobs = batch.to_jobs(self.job_counter)
+        self.job_counter += len(batch)
+        return jobs
+    
+    def generate_jobs(self, now: datetime):
+        """Generate new jobs based on workload profile"""
+        for job in self.sample_jobs(now):
+            self.jobs.push(job, self.time_s)
     
     def advance_time(self, dt_seconds: float = 1.0):
         """Advance simulation time"""
-        self.time_s += dt_seconds
-        now = datetime.now(timezone.utc)
-        self.generate_jobs(now)
+        with self._lock:
+            self.time_s += dt_seconds
+            completed = self.complete_routes()
+            now = datetime.now(timezone.utc)
+            self.generate_jobs(now)
         
-        # Update link congestion (simplified)
-        for link in self.links.values():
-            # Increase congestion based on active routes using this link
-            active_count = sum(1 for route in self.active_routes 
-                             if route.target_node_id in [link.src_id, link.dst_id])
-            link.congestion_level = min(1.0, active_count / 100.0)
+            # Link congestion follows the route counters kept by route_job / complete_routes
+            self.record_performance(completed)
     
+    def record_performance(self, completed: int = 0):
+        """Append the current metrics to performance_history (once per tick)"""
+        with self._lock:
+            self._link_stats = None
+            self.performance_history.append({
+                "time_s": self.time_s,
+                "pending_jobs": len(self.jobs),
+                "active_routes": len(self._routes),
+                "completed": completed,
+                **self.get_performance_metrics(),
+            })
+    
+    def flush_history(self):
+        """Write the partial spill batch of performance_history (on shutdown)"""
+        with self._lock:
+            self.performance_history.flush()
+
     def get_performance_metrics(self) -> Dict:
-        """Get current performance metrics"""
-        if not self.active_routes:
+        """Get current performance metrics (kept up to date as routes start and finish)"""
+        with self._lock:
+            routes = len(self._routes)
+            if not routes:
+                return {
+                    "avg_latency_ms": 0.0,
+                    "slo_violation_rate": 0.0,
+                }
             return {
-                "avg_latency_ms": 0.0,
-                "slo_violation_rate": 0.0,
+                "avg_latency_ms": self._route_latency_total / routes,
+                "slo_violation_rate": self._route_violations / routes,
             }
-        
-        # Calculate from active routes (simplified)
-        total_latency = 0.0
-        violations = 0
-        for route in self.active_routes:
-            job = next((j for j in self.pending_jobs if j.id == route.job_id), None)
-            if job:
-                # Estimate latency
-                node = self.nodes.get(route.target_node_id)
-                if node:
-                    latency = 10.0 if node.node_type == "ground" else 50.0
-                    total_latency += latency
-                    if latency > job.latency_slo_ms:
-                        violations += 1
-        
-        avg_latency = total_latency / len(self.active_routes) if self.active_routes else 0.0
-        violation_rate = violations / len(self.active_routes) if self.active_routes else 0.0
-        
-        return {
-            "avg_latency_ms": avg_latency,
-            "slo_violation_rate": violation_rate,
-        }
     
     def trigger_global_reroute(self):
         """Trigger global rerouting of active jobs"""
-        # Simplified: just clear some active routes to force rerouting
-        if len(self.active_routes) > 10:
-            self.active_routes = self.active_routes[:len(self.active_routes) // 2]
+        with self._lock:
+            # Simplified: just clear some active routes to force rerouting
+            if len(self._routes) > 10:
+                keep = len(self._routes) // 2
+                dropped = [self._routes.popitem()[1] for _ in range(len(self._routes) - keep)]
+                self._release_routes(dropped)
     
     def set_regional_load(self, region: str, multiplier: float):
         """Set regional load multiplier"""
@@ -336,9 +556,25 @@ class World:
     
     def cut_fiber_between(self, region_a: str, region_b: str):
         """Cut fiber between two regions"""
-        self.fiber_cuts.append((region_a, region_b))
+        with self._lock:
+            self.fiber_cuts.append((region_a, region_b))
+            self.invalidate_candidates()
+    
+    def restore_fiber_between(self, region_a: str, region_b: str):
+        """Repair a fiber cut between two regions"""
+        with self._lock:
+            self.fiber_cuts = [cut for cut in self.fiber_cuts if set(cut) != {region_a, region_b}]
+            self.invalidate_candidates()
     
     def disable_leo_shell(self, shell_id: str, region: str):
         """Disable a LEO shell in a region"""
-        self.disabled_shells[shell_id] = region
+        with self._lock:
+            self.disabled_shells[shell_id] = region
+            self.invalidate_candidates()
+    
+    def enable_leo_shell(self, shell_id: str):
+        """Bring a disabled LEO shell back online"""
+        with self._lock:
+            self.disabled_shells.pop(shell_id, None)
+            self.invalidate_candidates()
 
@@ -0,0 +1,31 @@
+"""PerformanceHistory: bounded buffer with evicted records spilled to JSON lines"""
+import json
+
+from sim.history import PerformanceHistory
+
+
+def _spilled(path):
+    return [json.loads(line)["t"] for line in path.read_text().splitlines()]
+
+
+def test_evicted_records_spill_in_order(tmp_path):
+    path = tmp_path / "history.jsonl"
+    history = PerformanceHistory(maxlen=2, spill_path=str(path))
+    for t in range(5):
+        history.append({"t": t})
+    assert [record["t"] for record in history] == [3, 4]
+    # Below SPILL_BATCH nothing is written until flush
+    assert not path.exists()
+    history.flush()
+    assert _spilled(path) == [0, 1, 2]
+    assert history.spilled == 3
+
+
+def test_zero_maxlen_spills_every_record(tmp_path):
+    path = tmp_path / "history.jsonl"
+    history = PerformanceHistory(maxlen=0, spill_path=str(path))
+    for t in range(3):
+        history.append({"t": t})
+    assert len(history) == 0
+    history.flush()
+    assert _spilled(path) == [0, 1, 2]
@@ -0,0 +1,78 @@
+"""JobQueue: pending jobs by id, ordered by absolute deadline, with bounded memory"""
+from sim.job_queue import JobQueue
+from sim.types import Job
+
+
+def _job(job_id, deadline_s):
+    return Job(id=job_id, size_gb=1.0, flops=1e12, latency_slo_ms=100.0, deadline_s=deadline_s, jitter_tolerance_ms=10.0)
+
+
+def test_peek_returns_earliest_absolute_deadline():
+    queue = JobQueue()
+    queue.push(_job("late", 50.0), arrival_s=0.0)
+    queue.push(_job("early", 5.0), arrival_s=10.0)
+    queue.push(_job("middle", 1.0), arrival_s=30.0)
+    assert queue.peek().id == "early"
+    assert [job.id for job in queue.most_urgent(2)] == ["early", "middle"]
+    # most_urgent leaves jobs pending and the order intact
+    assert len(queue) == 3
+    assert queue.peek().id == "early"
+
+
+def test_pop_skips_removed_jobs_and_keeps_lookup():
+    queue = JobQueue()
+    queue.push(_job("a", 1.0), arrival_s=0.0)
+    queue.push(_job("b", 2.0), arrival_s=0.0)
+    assert queue.pop("a").id == "a"
+    assert "a" not in queue
+    assert queue.get("a") is None
+    assert queue.lookup("a").id == "a"
+    assert queue.peek().id == "b"
+    assert [job.id for job in queue.most_urgent(5)] == ["b"]
+    assert queue.pop("missing") is None
+
+
+def test_iteration_is_arrival_order():
+    queue = JobQueue()
+    for i, deadline in enumerate([3.0, 1.0, 2.0]):
+        queue.push(_job(f"job_{i}", deadline), arrival_s=0.0)
+    assert [job.id for job in queue] == ["job_0", "job_1", "job_2"]
+
+
+def test_backlog_and_retention_are_bounded():
+    queue = JobQueue(max_pending=3, routed_retention=2)
+    for i in range(5):
+        queue.push(_job(f"job_{i}", 1.0), arrival_s=float(i))
+    assert [job.id for job in queue] == ["job_2", "job_3", "job_4"]
+    assert queue.dropped == 2
+    assert queue.peek().id == "job_2"
+    for job_id in ("job_2", "job_3", "job_4"):
+        queue.pop(job_id)
+    assert queue.lookup("job_2") is None
+    assert queue.lookup("job_4").id == "job_4"
+    assert queue.stats() == {"pending": 0, "routed_retained": 2, "dropped": 2}
+    assert queue.peek() is None
+
+
+def test_items_after_keeps_position_across_removals():
+    queue = JobQueue()
+    for i in range(5):
+        queue.push(_job(f"j{i}", 1.0), arrival_s=0.0)
+    first = list(queue.items_after(-1))[:2]
+    assert [job.id for _, job in first] == ["j0", "j1"]
+    queue.pop("j0")
+    queue.pop("j3")
+    queue.push(_job("j5", 1.0), arrival_s=0.0)
+    assert [job.id for _, job in queue.items_after(first[-1][0])] == ["j2", "j4", "j5"]
+
+
+def test_repushed_job_uses_its_new_deadline_once():
+    queue = JobQueue()
+    queue.push(_job("a", 1.0), arrival_s=0.0)
+    queue.push(_job("b", 5.0), arrival_s=0.0)
+    # Pushed again with a later deadline: the old heap entry must not count
+    queue.push(_job("a", 10.0), arrival_s=0.0)
+    assert queue.peek().id == "b"
+    assert [job.id for job in queue.most_urgent(5)] == ["b", "a"]
+    assert [job.id for job in queue] == ["b", "a"]
+    assert len(queue) == 2
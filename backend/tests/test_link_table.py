@@ -0,0 +1,47 @@
+"""LinkTable: structure-of-arrays links with congestion derived from route counts"""
+import numpy as np
+
+from sim.link_table import ROUTES_AT_FULL_CONGESTION, LinkTable
+
+
+def _table():
+    table = LinkTable(["a", "b", "c"])
+    table.add_links(src=[0, 0], dst=[1, 2], rtt_ms=[10.0, 30.0], packet_loss=0.001)
+    return table
+
+
+def test_add_links_broadcasts_scalars():
+    table = _table()
+    assert len(table) == 2
+    np.testing.assert_array_equal(table.packet_loss, [0.001, 0.001])
+    np.testing.assert_array_equal(table.rtt_stats(), [20.0, 10.0, 10.0])
+
+
+def test_congestion_follows_route_counts():
+    table = _table()
+    np.testing.assert_array_equal(table.congestion, [0.0, 0.0])
+    table.record_routes([1, 1, 2])
+    np.testing.assert_allclose(table.congestion, np.array([2, 1]) / ROUTES_AT_FULL_CONGESTION)
+    table.record_routes([1, 2], delta=-1)
+    table.record_route(0)
+    np.testing.assert_allclose(table.congestion, np.array([2, 1]) / ROUTES_AT_FULL_CONGESTION)
+    np.testing.assert_allclose(table.congestion_stats(), [1.5 / ROUTES_AT_FULL_CONGESTION, 2 / ROUTES_AT_FULL_CONGESTION])
+
+
+def test_congestion_saturates():
+    table = _table()
+    table.record_routes(np.zeros(int(ROUTES_AT_FULL_CONGESTION) * 2, dtype=int))
+    np.testing.assert_array_equal(table.congestion, [1.0, 1.0])
+
+
+def test_models_match_rows():
+    table = _table()
+    table.record_route(2)
+    links = table.to_models()
+    assert [link.id for link in links] == ["link_0", "link_1"]
+    assert (links[1].src_id, links[1].dst_id, links[1].rtt_ms) == ("a", "c", 30.0)
+    assert links[1].congestion_level == table.to_model(1).congestion_level
+    assert table.to_models(1, 5) == links[1:]
+    assert table.row_for_id("link_1") == 1
+    assert table.row_for_id("link_2") is None
+    assert table.row_for_id("node_1") is None
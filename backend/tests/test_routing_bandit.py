@@ -0,0 +1,32 @@
+"""RoutingBanditAgent: Sherman-Morrison updates against a direct inverse"""
+import numpy as np
+
+from sim.agent_routing_bandit import RoutingBanditAgent
+
+
+def test_sherman_morrison_matches_direct_inverse():
+    rng = np.random.default_rng(0)
+    dim, ridge = 6, 2.0
+    agent = RoutingBanditAgent(feature_dim=dim, ridge=ridge)
+    A = np.eye(dim) * ridge
+    b = np.zeros(dim)
+    for _ in range(200):
+        x = rng.normal(size=dim)
+        reward = float(rng.normal())
+        agent.update(x, reward)
+        A += np.outer(x, x)
+        b += reward * x
+    A_inv = np.linalg.inv(A)
+    np.testing.assert_allclose(agent.A_inv, A_inv, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(agent.theta, A_inv @ b, rtol=1e-8, atol=1e-10)
+    assert agent.updates == 200
+
+
+def test_select_action_picks_highest_ucb():
+    agent = RoutingBanditAgent(feature_dim=2, alpha=0.0)
+    for _ in range(20):
+        agent.update(np.array([1.0, 0.0]), 1.0)
+        agent.update(np.array([0.0, 1.0]), -1.0)
+    features = np.array([[0.0, 1.0], [1.0, 0.0], [0.5, 0.5]])
+    assert agent.select_action(features) == 1
+    assert agent.select_action(np.zeros((0, 2))) == 0
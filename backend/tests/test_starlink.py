@@ -0,0 +1,23 @@
+"""CelesTrak response checks against the committed TLE cache"""
+from pathlib import Path
+
+from services.starlink import is_blocked_response
+from services.tle_catalog import parse_tle_text
+
+TLE_CACHE = Path(__file__).resolve().parent.parent / "tle_cache.txt"
+
+
+def test_real_tle_payload_is_not_blocked():
+    text = TLE_CACHE.read_text()
+    # TLE lines routinely contain "403"; that alone must not look like a block page
+    assert "403" in text
+    assert not is_blocked_response(text, 200)
+    assert len(parse_tle_text(text)) > 0
+
+
+def test_block_pages_and_statuses_are_detected():
+    assert is_blocked_response("<!DOCTYPE html><html><body>403 Forbidden</body></html>", 200)
+    assert is_blocked_response("\n  <html><head></head></html>")
+    assert is_blocked_response("", 403)
+    assert is_blocked_response("", 429)
+    assert not is_blocked_response("STARLINK-1007\n1 44713U ...\n2 44713 ...", 200)
@@ -0,0 +1,63 @@
+"""Round trip of the OCS1 columnar wire format (shared with frontend/app/lib/api/stateCodec.ts)"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.state_codec import MAGIC, decode_columns, encode_columns, encode_satellites, pack_bits, unpack_bits
+
+
+def _satellite(i, sunlit):
+    return SimpleNamespace(
+        id=f"sat_{i}",
+        lat=10.5 + i,
+        lon=-120.25 + i,
+        alt_km=550.0,
+        sunlit=sunlit,
+        utilization=0.5,
+        capacityMw=0.003,
+        nearestGatewayId="gw_a" if i % 2 else "gw_b",
+        latencyMs=12.0 + i,
+    )
+
+
+def test_satellites_round_trip():
+    flags = [True, False, True, True, False, False, True, False, True]
+    satellites = [_satellite(i, flag) for i, flag in enumerate(flags)]
+    buffer = encode_satellites(satellites, meta={"tick": 7})
+
+    assert buffer[:4] == MAGIC
+    header, columns = decode_columns(buffer)
+    assert header["count"] == len(satellites)
+    assert header["meta"] == {"tick": 7, "idPrefix": "sat_"}
+    np.testing.assert_array_equal(columns["id"], np.arange(len(satellites)))
+    np.testing.assert_allclose(columns["lat"], [sat.lat for sat in satellites])
+    np.testing.assert_allclose(columns["latencyMs"], [sat.latencyMs for sat in satellites])
+    np.testing.assert_array_equal(columns["sunlit"], flags)
+    gateways = header["dictionaries"]["nearestGatewayId"]
+    assert [gateways[i] for i in columns["nearestGatewayId"]] == [sat.nearestGatewayId for sat in satellites]
+
+
+def test_columns_are_aligned():
+    buffer = encode_columns(3, [("a", "uint8", np.array([1, 2, 3])), ("b", "float32", np.array([1.0, 2.0, 3.0]))])
+    header, columns = decode_columns(buffer)
+    data_start = 8 + int.from_bytes(buffer[4:8], "little")
+    assert data_start % 8 == 0
+    assert all(column["offset"] % 8 == 0 for column in header["columns"])
+    np.testing.assert_array_equal(columns["b"], [1.0, 2.0, 3.0])
+
+
+def test_empty_buffer_round_trips():
+    header, columns = decode_columns(encode_satellites([]))
+    assert header["count"] == 0
+    assert len(columns["lat"]) == 0
+
+
+def test_bits_are_lsb_first():
+    assert pack_bits([True, False, False, False, False, False, False, False, True]).tolist() == [1, 1]
+    np.testing.assert_array_equal(unpack_bits(np.array([5], dtype=np.uint8), 3), [True, False, True])
+
+
+def test_rejects_other_formats():
+    with pytest.raises(ValueError):
+        decode_columns(b"JSON" + bytes(8))
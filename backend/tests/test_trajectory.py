@@ -0,0 +1,26 @@
+"""TrajectoryCache: interpolated positions against direct sgp4 on the committed TLE cache"""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+from services.propagator import ConstellationPropagator
+from services.tle_catalog import parse_tle_text
+from services.trajectory import TrajectoryCache
+
+TLE_CACHE = Path(__file__).resolve().parent.parent / "tle_cache.txt"
+
+
+def test_interpolated_ok_matches_direct_propagation():
+    # Every other satellite keeps the test quick; dates well past the TLE
+    # epochs include decayed and stale elements that are propagated directly
+    satellites = parse_tle_text(TLE_CACHE.read_text()).satrecs[::2]
+    for day in (datetime(2026, 1, 15, tzinfo=timezone.utc), datetime(2026, 10, 16, tzinfo=timezone.utc)):
+        propagator = ConstellationPropagator(satellites)
+        cache = TrajectoryCache(propagator)
+        times = [day + timedelta(seconds=float(s)) for s in np.linspace(0.0, 3500.0, 12)]
+        interpolated = cache.propagate(times)
+        direct = propagator.propagate(times)
+        np.testing.assert_array_equal(interpolated.ok, direct.ok)
+        error_km = np.linalg.norm(interpolated.positions_km - direct.positions_km, axis=-1)[direct.ok]
+        assert error_km.max() < 0.05
@@ -0,0 +1,47 @@
+/**
+ * Columnar State Codec Tests
+ *
+ * Decodes a buffer produced by backend/services/state_codec.py
+ * (encode_satellites on three satellites, meta {tick: 7}), so a change to the
+ * wire format on either side fails here.
+ */
+
+import { decodeColumnarState, getBit } from '../stateCodec';
+
+const PYTHON_FIXTURE =
+  'T0NTMaACAAB7InZlcnNpb24iOjEsImNvdW50IjozLCJjb2x1bW5zIjpbeyJuYW1lIjoiaWQiLCJkdHlwZSI6InVpbnQzMiIsIm9mZnNldCI6MCwibGVuZ3RoIjoxMn0seyJuYW1lIjoibGF0IiwiZHR5cGUiOiJmbG9hdDMyIiwib2Zmc2V0IjoxNiwibGVuZ3RoIjoxMn0seyJuYW1lIjoibG9uIiwiZHR5cGUiOiJmbG9hdDMyIiwib2Zmc2V0IjozMiwibGVuZ3RoIjoxMn0seyJuYW1lIjoiYWx0X2ttIiwiZHR5cGUiOiJmbG9hdDMyIiwib2Zmc2V0Ijo0OCwibGVuZ3RoIjoxMn0seyJuYW1lIjoidXRpbGl6YXRpb24iLCJkdHlwZSI6ImZsb2F0MzIiLCJvZmZzZXQiOjY0LCJsZW5ndGgiOjEyfSx7Im5hbWUiOiJjYXBhY2l0eU13IiwiZHR5cGUiOiJmbG9hdDMyIiwib2Zmc2V0Ijo4MCwibGVuZ3RoIjoxMn0seyJuYW1lIjoibGF0ZW5jeU1zIiwiZHR5cGUiOiJmbG9hdDMyIiwib2Zmc2V0Ijo5NiwibGVuZ3RoIjoxMn0seyJuYW1lIjoibmVhcmVzdEdhdGV3YXlJZCIsImR0eXBlIjoidWludDE2Iiwib2Zmc2V0IjoxMTIsImxlbmd0aCI6Nn0seyJuYW1lIjoic3VubGl0IiwiZHR5cGUiOiJiaXRzIiwib2Zmc2V0IjoxMjAsImxlbmd0aCI6MX1dLCJkaWN0aW9uYXJpZXMiOnsibmVhcmVzdEdhdGV3YXlJZCI6WyJnd19iIiwiZ3dfYSJdfSwibWV0YSI6eyJ0aWNrIjo3LCJpZFByZWZpeCI6InNhdF8ifX0gICAAAAAAAQAAAAIAAAAAAAAAAAAoQQAAOEEAAEhBAAAAAACA8MIAgO7CAIDswgAAAAAAgAlEAIAJRACACUQAAAAAAAAAPwAAAD8AAAA/AAAAAKabRDumm0Q7pptEOwAAAAAAAEBBAABQQQAAYEEAAAAAAAABAAAAAAAFAAAAAAAAAA==';
+
+function fixtureBuffer(): ArrayBuffer {
+  const bytes = Buffer.from(PYTHON_FIXTURE, 'base64');
+  // Copy into a fresh ArrayBuffer so column offsets are relative to byte 0
+  return bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.byteLength);
+}
+
+describe('decodeColumnarState', () => {
+  const state = decodeColumnarState(fixtureBuffer());
+
+  test('reads the header', () => {
+    expect(state.count).toBe(3);
+    expect(state.meta).toEqual({ tick: 7, idPrefix: 'sat_' });
+  });
+
+  test('decodes numeric columns', () => {
+    expect(Array.from(state.columns.id)).toEqual([0, 1, 2]);
+    expect(Array.from(state.columns.lat)).toEqual([10.5, 11.5, 12.5]);
+    expect(Array.from(state.columns.lon)).toEqual([-120.25, -119.25, -118.25]);
+    expect(Array.from(state.columns.latencyMs)).toEqual([12, 13, 14]);
+    expect(state.columns.alt_km[2]).toBe(550);
+  });
+
+  test('decodes dictionary and bit columns', () => {
+    const gateways = state.dictionaries.nearestGatewayId;
+    const ids = Array.from(state.columns.nearestGatewayId).map((i) => gateways[i]);
+    expect(ids).toEqual(['gw_b', 'gw_a', 'gw_b']);
+    const sunlit = state.bits.sunlit;
+    expect([0, 1, 2].map((i) => getBit(sunlit, i))).toEqual([true, false, true]);
+  });
+
+  test('rejects other formats', () => {
+    expect(() => decodeColumnarState(new ArrayBuffer(16))).toThrow('Not a columnar state buffer');
+  });
+});
@@ -0,0 +1,98 @@
+/**
+ * Decoder for the columnar state format served by /state?format=columnar and
+ * /api/state?format=columnar (layout documented in backend/services/state_codec.py).
+ * Numeric columns are zero-copy typed-array views over the response buffer.
+ */
+import axios from "axios";
+
+const API_BASE = process.env.NEXT_PUBLIC_API_BASE || "http://localhost:8000";
+
+export const COLUMNAR_MEDIA_TYPE = "application/vnd.orbital.columnar";
+
+type ColumnDtype = "float32" | "uint8" | "uint16" | "uint32" | "bits";
+
+interface ColumnDescriptor {
+  name: string;
+  dtype: ColumnDtype;
+  offset: number;
+  length: number;
+}
+
+interface ColumnarHeader {
+  version: number;
+  count: number;
+  columns: ColumnDescriptor[];
+  dictionaries: Record<string, string[]>;
+  meta: Record<string, any>;
+}
+
+export type Column = Float32Array | Uint8Array | Uint16Array | Uint32Array;
+
+export interface ColumnarState {
+  count: number;
+  columns: Record<string, Column>;
+  /** Packed flag columns; read with `getBit` */
+  bits: Record<string, Uint8Array>;
+  dictionaries: Record<string, string[]>;
+  meta: Record<string, any>;
+}
+
+export function getBit(packed: Uint8Array, index: number): boolean {
+  return ((packed[index >> 3] >> (index & 7)) & 1) === 1;
+}
+
+export function decodeColumnarState(buffer: ArrayBuffer): ColumnarState {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(
+    view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3)
+  );
+  if (magic !== "OCS1") {
+    throw new Error("Not a columnar state buffer");
+  }
+  const headerLength = view.getUint32(4, true);
+  const dataStart = 8 + headerLength;
+  const header: ColumnarHeader = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength))
+  );
+
+  const columns: Record<string, Column> = {};
+  const bits: Record<string, Uint8Array> = {};
+  for (const column of header.columns) {
+    const start = dataStart + column.offset;
+    switch (column.dtype) {
+      case "float32":
+        columns[column.name] = new Float32Array(buffer, start, column.length / 4);
+        break;
+      case "uint32":
+        columns[column.name] = new Uint32Array(buffer, start, column.length / 4);
+        break;
+      case "uint16":
+        columns[column.name] = new Uint16Array(buffer, start, column.length / 2);
+        break;
+      case "uint8":
+        columns[column.name] = new Uint8Array(buffer, start, column.length);
+        break;
+      case "bits":
+        bits[column.name] = new Uint8Array(buffer, start, column.length);
+        break;
+    }
+  }
+
+  return {
+    count: header.count,
+    columns,
+    bits,
+    dictionaries: header.dictionaries,
+    meta: header.meta,
+  };
+}
+
+export async function fetchColumnarState(path: "/state" | "/api/state" = "/state"): Promise<ColumnarState> {
+  const response = await axios.get<ArrayBuffer>(`${API_BASE}${path}`, {
+    params: { format: "columnar" },
+    headers: { Accept: COLUMNAR_MEDIA_TYPE },
+    responseType: "arraybuffer",
+    timeout: 30000,
+  });
+  return decodeColumnarState(response.data);
+}
@@ -0,0 +1,111 @@
+/**
+ * Client for /state/stream (Server-Sent Events): applies the keyframe + delta
+ * protocol documented in backend/services/state_stream.py and hands the
+ * reconstructed state to a callback on every tick.
+ */
+const API_BASE = process.env.NEXT_PUBLIC_API_BASE || "http://localhost:8000";
+
+export interface StreamSatellite {
+  id: string;
+  lat: number;
+  lon: number;
+  alt_km: number;
+  sunlit: boolean;
+  utilization: number;
+  capacityMw: number;
+  nearestGatewayId: string;
+  latencyMs: number;
+}
+
+export interface StreamState {
+  tick: number;
+  time: string;
+  satellites: StreamSatellite[];
+  groundSites: any[];
+  workload: any;
+  metrics: any;
+  events: string[];
+}
+
+const LON_RANGE_Q = 360000;
+
+function decodeInts(base64: string, bytesPerValue: 2 | 4): Int32Array {
+  const raw = atob(base64);
+  const bytes = new Uint8Array(raw.length);
+  for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+  const view = new DataView(bytes.buffer);
+  const out = new Int32Array(raw.length / bytesPerValue);
+  for (let i = 0; i < out.length; i++) {
+    out[i] = bytesPerValue === 2
+      ? view.getInt16(i * 2, true)
+      : view.getInt32(i * 4, true);
+  }
+  return out;
+}
+
+function wrapLon(q: number): number {
+  const half = LON_RANGE_Q / 2;
+  return ((((q + half) % LON_RANGE_Q) + LON_RANGE_Q) % LON_RANGE_Q) - half;
+}
+
+/**
+ * Subscribe to the state stream. Returns a function that closes the stream.
+ * EventSource reconnects on its own; the server starts every connection with a keyframe.
+ */
+export function subscribeStateStream(onState: (state: StreamState) => void): () => void {
+  const source = new EventSource(`${API_BASE}/state/stream`);
+  let state: StreamState | null = null;
+  let quantumDeg = 1e-3;
+  let altQuantumKm = 0.01;
+  let qLat = new Int32Array(0);
+  let qLon = new Int32Array(0);
+  let qAlt = new Int32Array(0);
+
+  const applyPositions = () => {
+    if (!state) return;
+    for (let i = 0; i < state.satellites.length; i++) {
+      const sat = state.satellites[i];
+      sat.lat = qLat[i] * quantumDeg;
+      sat.lon = qLon[i] * quantumDeg;
+      sat.alt_km = qAlt[i] * altQuantumKm;
+    }
+  };
+
+  source.addEventListener("keyframe", (event) => {
+    const data = JSON.parse((event as MessageEvent).data);
+    quantumDeg = data.positions.quantumDeg;
+    altQuantumKm = data.positions.altQuantumKm;
+    qLat = decodeInts(data.positions.lat, 4);
+    qLon = decodeInts(data.positions.lon, 4);
+    qAlt = decodeInts(data.positions.alt, 4);
+    state = { ...data.state, tick: data.tick };
+    applyPositions();
+    onState(state!);
+  });
+
+  source.addEventListener("delta", (event) => {
+    if (!state) return;
+    const data = JSON.parse((event as MessageEvent).data);
+    const dLat = decodeInts(data.positions.lat, 2);
+    const dLon = decodeInts(data.positions.lon, 2);
+    const dAlt = decodeInts(data.positions.alt, 2);
+    for (let i = 0; i < qLat.length; i++) {
+      qLat[i] += dLat[i];
+      qLon[i] = wrapLon(qLon[i] + dLon[i]);
+      qAlt[i] += dAlt[i];
+    }
+    applyPositions();
+
+    const sats = state.satellites;
+    for (const [row, flag] of data.sunlit) sats[row].sunlit = flag;
+    for (const [row, value] of data.utilization) sats[row].utilization = value;
+    for (const [row, value] of data.capacityMw) sats[row].capacityMw = value;
+    for (const [row, value] of data.latencyMs) sats[row].latencyMs = value;
+    for (const [row, gateway] of data.gateway) sats[row].nearestGatewayId = gateway;
+
+    state = { ...state, ...data.summary, satellites: sats, tick: data.tick };
+    onState(state!);
+  });
+
+  return () => source.close();
+}